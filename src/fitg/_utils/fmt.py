@@ -1,5 +1,7 @@
+import functools
 
 
+@functools.lru_cache(maxsize=None)
 def toCTimeFormat(simpleFormat):
 
     # a little care is needed here to avoid clashes between formats
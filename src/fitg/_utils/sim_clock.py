@@ -0,0 +1,150 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Simulated (discrete event) clock
+#
+# SimEventLoop's time() is virtual - whenever nothing is ready to run and no I/O is pending it jumps straight to the
+# next timer rather than sleeping. asyncio.sleep, co.until timeouts, conn.send timeouts and monotonicTimeMs all go
+# through loop.time() so they follow the virtual clock. Router.scheduleFn uses datetime.now() so SimRouter puts
+# scheduled functions on the loop's timers instead. Timers due at the same instant run in the order they were
+# scheduled (asyncio's heap only compares the due time so SimEventLoop's timers carry a sequence number to break ties),
+# so a game started with the same inputs always plays out the same way.
+#
+# OPEN: work handed to threads (run_in_executor) doesn't hold the clock back - only use LOCAL_MODE routing with it
+
+
+# Python imports
+import asyncio, datetime, heapq, itertools, logging, selectors
+
+# vlmessaging imports
+from vlmessaging import Router, VLM
+
+_log = logging.getLogger(__name__)
+
+
+class SimEventLoop(asyncio.SelectorEventLoop):
+
+    def __init__(self, startMs=0.0):
+        selector = _SimSelector()
+        super().__init__(selector)
+        selector.loop = self
+        self._simTime = startMs / 1000.0
+        self._timerSeq = itertools.count()
+
+    def time(self):
+        return self._simTime
+
+    def call_at(self, when, callback, *args, context=None):
+        # as BaseEventLoop.call_at (which call_later uses) but with a FIFO tiebreak
+        self._check_closed()
+        timer = _SimTimerHandle(when, callback, args, self, context, next(self._timerSeq))
+        heapq.heappush(self._scheduled, timer)
+        timer._scheduled = True
+        return timer
+
+    def _advance(self, secs):
+        self._simTime += secs
+
+
+class _SimTimerHandle(asyncio.TimerHandle):
+
+    __slots__ = ('_seq',)
+
+    def __init__(self, when, callback, args, loop, context, seq):
+        super().__init__(when, callback, args, loop, context)
+        self._seq = seq
+
+    def __lt__(self, other):
+        if self._when != other._when or not isinstance(other, _SimTimerHandle): return self._when < other._when
+        return self._seq < other._seq
+
+    def __le__(self, other):
+        return not other < self
+
+
+class _SimSelector(selectors.DefaultSelector):
+
+    loop = None
+
+    def select(self, timeout=None):
+        # poll for real I/O (e.g. the loop's self pipe) and, if there's none, move time on to the next timer
+        events = super().select(0)
+        if events or timeout == 0: return events
+        if timeout is None: return super().select(None)          # no timers so only I/O can wake us
+        self.loop._advance(timeout)
+        return []
+
+
+class SimRouter(Router):
+    """A Router whose scheduled functions run on virtual time - use with SimEventLoop."""
+
+    __slots__ = ('_handlesByFn',)
+
+    def __init__(self, mode=VLM.LOCAL_MODE, name='sim'):
+        self._handlesByFn = {}
+        super().__init__(mode=mode, name=name)
+
+    def scheduleFn(self, fn, after):
+        assert asyncio.iscoroutinefunction(fn)
+        secs = after.total_seconds() if isinstance(after, datetime.timedelta) else after / 1000.0
+        handles = self._handlesByFn.setdefault(fn, [])
+        handle = asyncio.get_running_loop().call_later(secs, self._fire, fn)
+        handles.append(handle)
+        return handle
+
+    def unscheduleFn(self, fn):
+        for handle in self._handlesByFn.pop(fn, ()):
+            handle.cancel()
+
+    def unscheduleFnAt(self, fn, at):
+        for handle in list(self._handlesByFn.get(fn, ())):
+            if handle is at:
+                handle.cancel()
+                self._dropHandle(fn, handle)
+
+    def shutdown(self):
+        for handles in self._handlesByFn.values():
+            for handle in handles:
+                handle.cancel()
+        self._handlesByFn = {}
+        super().shutdown()
+
+    def _fire(self, fn):
+        for handle in self._handlesByFn.get(fn, ()):
+            if handle.when() <= asyncio.get_running_loop().time():
+                self._dropHandle(fn, handle)
+                break
+        asyncio.get_running_loop().create_task(self._run(fn))
+
+    def _dropHandle(self, fn, handle):
+        handles = self._handlesByFn[fn]
+        handles.remove(handle)
+        if not handles: del self._handlesByFn[fn]
+
+    async def _run(self, fn):
+        try:
+            await fn()
+        except Exception as ex:
+            _log.error(f'Error executing scheduled function in router {self._name}: {ex}')
+
+
+def simNowMs() -> float:
+    """Answers the running loop's time in ms (virtual under a SimEventLoop)."""
+    return asyncio.get_running_loop().time() * 1000.0
+
+
+def startSimEventLoopWith(fn, startMs=0.0):
+    """Like co.startEventLoopWith but runs fn on a SimEventLoop."""
+    loop = SimEventLoop(startMs)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(fn())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,61 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# A hashed timer wheel - many timeouts share one periodic tick rather than each having its own scheduled callback.
+# Deadlines hash to slot (deadline // tickMs) % nSlots and a slot only fires the keys whose deadline has passed, so
+# deadlines more than a revolution away just wait for a later visit.
+
+
+class TimerWheel:
+
+    __slots__ = ['tickMs', '_slots', '_slotByKey', '_lastTick']
+
+    def __init__(self, tickMs=50, nSlots=512):
+        self.tickMs = tickMs
+        self._slots = [{} for _ in range(nSlots)]   # deadline by key
+        self._slotByKey = {}
+        self._lastTick = None
+
+    def schedule(self, key, atMs):
+        # (re)schedules key to expire at atMs
+        self.cancel(key)
+        tick = int(atMs // self.tickMs)
+        if self._lastTick is not None and tick <= self._lastTick:
+            tick = self._lastTick + 1           # the cursor has passed that slot so take the next one visited
+        slot = self._slots[tick % len(self._slots)]
+        slot[key] = atMs
+        self._slotByKey[key] = slot
+
+    def cancel(self, key):
+        if (slot := self._slotByKey.pop(key, None)) is not None:
+            del slot[key]
+
+    def advance(self, nowMs) -> list:
+        # answers the keys that have expired by nowMs in deadline order
+        nowTick = int(nowMs // self.tickMs)
+        firstTick = nowTick - len(self._slots) + 1                     # one revolution visits every slot
+        if self._lastTick is not None: firstTick = max(firstTick, self._lastTick + 1)
+        expired = []
+        for tick in range(firstTick, nowTick + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if slot:
+                for key, atMs in list(slot.items()):
+                    if atMs <= nowMs:
+                        del slot[key]
+                        del self._slotByKey[key]
+                        expired.append((atMs, key))
+        self._lastTick = nowTick - 1             # revisit the current slot as it may hold later deadlines in this tick
+        expired.sort(key=lambda x: x[0])
+        return [key for _, key in expired]
+
+    def __len__(self):
+        return len(self._slotByKey)
+
+    def __contains__(self, key):
+        return key in self._slotByKey
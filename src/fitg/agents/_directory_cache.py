@@ -0,0 +1,108 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Per process directory cache
+#
+# One cache per router, shared by every agent on it, holding the directory's entries by entry type. Agents register
+# and unregister through it so local changes are seen at once. The Directory doesn't publish changes, so changes made
+# in other processes are picked up by refreshing a type with GET_ENTRIES once its entries are older than the TTL -
+# sooner for a type with no entries yet, since that's usually something still starting up. Concurrent lookups of a
+# stale type share a single GET_ENTRIES. A local registration doesn't make a type fresh - the first lookup of a type
+# always fetches it, else entries registered in other processes would be hidden for the TTL.
+
+
+# Python imports
+import asyncio
+
+# vlmessaging imports
+from vlmessaging import VLM, Msg, Entry
+from vlmessaging.utils import Missing
+from vlmessaging._utils.utils import monotonicTimeMs
+
+
+DIRECTORY_CACHE_TTL_MS = 5_000          # entries of a type are refetched once older than this
+DIRECTORY_CACHE_MISS_TTL_MS = 200       # ...or this if there were none
+DIRECTORY_TIMEOUT_MS = 500
+
+
+class DirectoryCache:
+
+    __slots__ = ['conn', 'ttlMs', 'missTtlMs', '_entriesByType', '_fetchedAtByType', '_fetchByType']
+
+    _cacheByRouter = {}
+
+    @classmethod
+    def forRouter(cls, router) -> 'DirectoryCache':
+        if (cache := cls._cacheByRouter.get(router)) is None:
+            # Routers can't be weakly referenced (and a cache's connection holds its router anyway) so rather than a
+            # WeakKeyDictionary the caches of routers that have shut down are dropped here
+            for r in [r for r in cls._cacheByRouter if r.hasShutdown.is_set()]:
+                del cls._cacheByRouter[r]
+            cache = cls._cacheByRouter[router] = cls(router)
+        return cache
+
+    def __init__(self, router, ttlMs=DIRECTORY_CACHE_TTL_MS, missTtlMs=DIRECTORY_CACHE_MISS_TTL_MS):
+        self.conn = router.newConnection()
+        self.ttlMs = ttlMs
+        self.missTtlMs = missTtlMs
+        self._entriesByType = {}
+        self._fetchedAtByType = {}
+        self._fetchByType = {}          # in flight GET_ENTRIES by type
+
+
+    # LOOKUPS
+
+    async def entriesOfType(self, entryType, timeout=DIRECTORY_TIMEOUT_MS) -> list[Entry]:
+        entries = self._entriesByType.get(entryType, [])
+        fetchedAt = self._fetchedAtByType.get(entryType)
+        if fetchedAt is None or monotonicTimeMs() - fetchedAt >= (self.ttlMs if entries else self.missTtlMs):
+            entries = await self.refresh(entryType, timeout)
+        return entries
+
+    async def addrOfType(self, entryType, timeout=DIRECTORY_TIMEOUT_MS):
+        # answers the addr of the first entry of entryType or Missing
+        entries = await self.entriesOfType(entryType, timeout)
+        return entries[0].addr if entries else Missing
+
+    async def waitForAddrOfType(self, entryType, totalTimeout, pollMs):
+        # answers the addr of the first entry of entryType, waiting up to totalTimeout for one to appear, or Missing
+        deadline = monotonicTimeMs() + totalTimeout
+        while (addr := await self.addrOfType(entryType)) is Missing and monotonicTimeMs() < deadline:
+            await asyncio.sleep(pollMs / 1000)
+        return addr
+
+    async def refresh(self, entryType, timeout=DIRECTORY_TIMEOUT_MS) -> list[Entry]:
+        if (fetch := self._fetchByType.get(entryType)) is None:
+            fetch = self._fetchByType[entryType] = asyncio.ensure_future(self._fetch(entryType, timeout))
+        return await asyncio.shield(fetch)
+
+
+    # LOCAL CHANGES
+
+    def noteRegistered(self, entry:Entry):
+        entries = self._entriesByType.setdefault(entry.service, [])
+        if not any(e.addr == entry.addr and e.params == entry.params for e in entries):
+            entries.append(entry)
+
+    def noteUnregistered(self, addr, entryType):
+        if (entries := self._entriesByType.get(entryType)) is not None:
+            self._entriesByType[entryType] = [e for e in entries if e.addr != addr]
+
+
+    # HELPERS
+
+    async def _fetch(self, entryType, timeout):
+        try:
+            reply = await self.conn.send(Msg(self.conn.directoryAddr, VLM.GET_ENTRIES, entryType), timeout)
+            if reply is Missing: return self._entriesByType.get(entryType, [])     # keep what we had
+            entries = self._entriesByType[entryType] = [Entry.fromSeq(e) for e in reply.contents]
+            self._fetchedAtByType[entryType] = monotonicTimeMs()
+            return entries
+        finally:
+            del self._fetchByType[entryType]
@@ -0,0 +1,50 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Table driven message dispatch
+#
+# Handlers are methods decorated with @handles(subject, ...). Each subclass of MsgDispatcher gets its own subject ->
+# handler dict, built once when the class is created, from the handlers it and its bases define - a subclass handler
+# for a subject replaces the base's, and overriding a handler method by name keeps its registration. msgArrived is
+# then a single dict lookup with no chain of comparisons or super() hops.
+
+
+# vlmessaging imports
+from vlmessaging import VLM
+
+
+_UNHANDLED = (VLM.IGNORE_UNHANDLED_REPLIES, VLM.HANDLE_DOES_NOT_UNDERSTAND)
+
+
+def handles(*subjects):
+    """Registers the decorated async method as the handler of subjects."""
+    def _(fn):
+        fn._subjects = subjects
+        return fn
+    return _
+
+
+class MsgDispatcher:
+
+    __slots__ = ()
+
+    _handlerBySubject = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        nameBySubject = {}
+        for klass in reversed(cls.__mro__):
+            for name, fn in vars(klass).items():
+                for subject in getattr(fn, '_subjects', ()):
+                    nameBySubject[subject] = name
+        cls._handlerBySubject = {subject: getattr(cls, name) for subject, name in nameBySubject.items()}
+
+    async def msgArrived(self, msg):
+        if (handler := self._handlerBySubject.get(msg.subject)) is None: return _UNHANDLED
+        return await handler(self, msg)
@@ -8,20 +8,27 @@
 # **********************************************************************************************************************
 
 # Python imports
-import logging
+import asyncio, logging
 
 # vlmessaging imports
-from vlmessaging import VLM, Msg, Entry, ExitMessageHandler, Connection
+from vlmessaging import VLM, Msg, Entry, Connection
 from vlmessaging.utils import co, Missing, wip
 
 # local imports
+from fitg.agents._directory_cache import DirectoryCache
+from fitg.agents._dispatch import handles
+from fitg.agents._stats import AgentStats, InstrumentedDispatcher, StatsConnection
 from fitg.agents.game_master import GameMaster
 from fitg.utils.exceptions import FitgError
 
 _logger = logging.getLogger(__name__)
 
 
-class GameAgent:
+LOGIN_ATTEMPTS = 3                      # logins are idempotent so a timed out one is just sent again
+RECORD_TRADE_TIMEOUT_MS = 1_000
+
+
+class GameAgent(InstrumentedDispatcher):
     ENTRY_TYPE: str
     GET_NAME = 'GET_NAME'
 
@@ -31,11 +38,15 @@ class GameAgent:
     pswd: str
     running: bool
     game_token: int
+    stats: AgentStats
+    directory: DirectoryCache
 
-    __slots__ = ['conn', 'name', 'user', 'pswd', 'running', 'game_token']
+    __slots__ = ['conn', 'name', 'user', 'pswd', 'running', 'game_token', 'stats', 'directory']
 
     def __init__(self, router, name, user, pswd, *args, **kwargs):
-        self.conn = router.newConnection(self.msgArrived)
+        self.stats = AgentStats()
+        self.conn = StatsConnection(router.newConnection(self.msgArrived), self.stats)
+        self.directory = DirectoryCache.forRouter(router)
         self.name = name
         self.user = user
         self.pswd = pswd
@@ -47,29 +58,51 @@ class GameAgent:
         reply = await self.conn.send(msg, 500)
         if reply is Missing:
             _logger.warning(f'Failed to unregister {self.ENTRY_TYPE}({self.name})')
+        self.directory.noteUnregistered(self.conn.addr, self.ENTRY_TYPE)
 
     async def loginToGameMaster(self):
-        gmAddr = await wip._waitForSingleEntryAddrOfTypeOrReplyAndExit(
-            self.conn,
-            GameMaster.ENTRY_TYPE,
-            5_000,
-            200,
-            errMsg=Missing
-        )
+        if self.game_token is not Missing: return               # e.g. already done by bootstrap.bulkLogin
+        gmAddr = await self.directory.waitForAddrOfType(GameMaster.ENTRY_TYPE, 5_000, 200)
+        if gmAddr is Missing: raise FitgError('GameMaster not found')
         msg = Msg(gmAddr, GameMaster.LOGIN, (self.user, self.pswd))
-        reply = await self.conn.send(msg, 2000, additional_subjects=[GameMaster.LOGIN_INVALID, GameMaster.LOGIN_TOKEN])
+        subjects = [GameMaster.LOGIN_INVALID, GameMaster.LOGIN_TOKEN]
+        for attempt in range(LOGIN_ATTEMPTS):
+            if reply := await self.conn.send(msg, 2000, additional_subjects=subjects): break
+            _logger.warning(f'{self.name} login timed out (attempt {attempt + 1} of {LOGIN_ATTEMPTS})')
         if not reply or reply.subject == GameMaster.LOGIN_INVALID: raise FitgError('Login failed')
         self.game_token = reply.contents
 
+    async def recordTrades(self, reports):
+        # sends a batch of TradeReports to the GameMaster answering its status for each, or Missing if it couldn't be
+        # reached - reports are idempotent so Missing ones can just be sent again
+        if (gmAddr := await self.directory.addrOfType(GameMaster.ENTRY_TYPE)) is Missing: return Missing
+        msg = Msg(gmAddr, GameMaster.RECORD_TRADE, (self.game_token, reports))
+        reply = await self.conn.send(msg, RECORD_TRADE_TIMEOUT_MS, additional_subjects=[GameMaster.LOGIN_INVALID])
+        if not reply: return Missing
+        if reply.subject == GameMaster.LOGIN_INVALID: raise FitgError(f'{self.name} isn\'t logged in')
+        return reply.contents
+
     async def registerSelfWithDirectory(self, vnets, entryDetails):
         vnets = [vnets] if not isinstance(vnets, (list, tuple)) else vnets
-        msg = Msg(self.conn.directoryAddr, VLM.REGISTER_ENTRY, Entry(self.conn.addr, self.ENTRY_TYPE, entryDetails, vnets, None))
-        reply = await self.conn.send(msg, 500)
+        entry = Entry(self.conn.addr, self.ENTRY_TYPE, entryDetails, vnets, None)
+        reply = await self.conn.send(Msg(self.conn.directoryAddr, VLM.REGISTER_ENTRY, entry), 500)
         if reply is Missing: raise Exception(f'Failed to register {self.ENTRY_TYPE}("{self.name}")')
+        self.directory.noteRegistered(entry)
+
+    async def broadcast(self, addrs, subject, contents, timeout=Missing):
+        """Sends subject / contents to every addr concurrently answering the addrs that failed, i.e. raised or, if a
+        timeout is given, didn't reply in time."""
+        addrs = list(addrs)
+        results = await asyncio.gather(
+            *[self.conn.send(Msg(addr, subject, contents), timeout) for addr in addrs],
+            return_exceptions=True
+        )
+        return [addr for addr, res in zip(addrs, results) if isinstance(res, BaseException) or (timeout and res is Missing)]
+
+
+    # MESSAGE HANDLERS
 
-    async def msgArrived(self, msg:Msg):
-        if msg.subject == self.GET_NAME:
-            reply = msg.reply(self.name)
-            await self.conn.send(reply)
-            raise ExitMessageHandler()
+    @handles(GET_NAME)
+    async def _onGetName(self, msg:Msg):
+        await self.conn.send(msg.reply(self.name))
 
@@ -0,0 +1,133 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Per agent hot path instrumentation
+#
+# Every message handled is timed by subject and every conn.send with a timeout is timed from send to reply (or
+# counted as a timeout). Timings go into log2 microsecond histograms - bucket b holds [2**(b-1), 2**b) us - so the
+# cost is a few integer ops per message. GET_STATS answers a snapshot:
+#
+#   {'sinceMs': ms covered, 'handled': {subject: timing}, 'sends': {subject: timing}, 'timeouts': {subject: n}}
+#
+# where timing is [count, totalUs, maxUs, bucket0, bucket1, ...] with trailing empty buckets dropped. Contents of
+# True resets the stats after the snapshot is taken.
+
+
+# Python imports
+import time
+
+# vlmessaging imports
+from vlmessaging.utils import Missing
+
+# local imports
+from fitg.agents._dispatch import MsgDispatcher, handles, _UNHANDLED
+
+
+N_BUCKETS = 32
+
+
+class Timing:
+
+    __slots__ = ['count', 'totalNs', 'maxNs', 'buckets']
+
+    def __init__(self):
+        self.count = 0
+        self.totalNs = 0
+        self.maxNs = 0
+        self.buckets = [0] * N_BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.totalNs += ns
+        if ns > self.maxNs: self.maxNs = ns
+        self.buckets[min((ns // 1000).bit_length(), N_BUCKETS - 1)] += 1
+
+    def snapshot(self):
+        buckets = self.buckets
+        n = len(buckets)
+        while n and not buckets[n - 1]: n -= 1
+        return [self.count, self.totalNs / 1000, self.maxNs / 1000] + buckets[:n]
+
+
+class AgentStats:
+
+    __slots__ = ['handledBySubject', 'sendsBySubject', 'timeoutsBySubject', 'sinceNs']
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.handledBySubject = {}
+        self.sendsBySubject = {}
+        self.timeoutsBySubject = {}
+        self.sinceNs = time.perf_counter_ns()
+
+    def onHandled(self, subject, ns):
+        if (t := self.handledBySubject.get(subject)) is None: t = self.handledBySubject[subject] = Timing()
+        t.add(ns)
+
+    def onReply(self, subject, ns):
+        if (t := self.sendsBySubject.get(subject)) is None: t = self.sendsBySubject[subject] = Timing()
+        t.add(ns)
+
+    def onTimeout(self, subject):
+        self.timeoutsBySubject[subject] = self.timeoutsBySubject.get(subject, 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            'sinceMs': (time.perf_counter_ns() - self.sinceNs) / 1_000_000,
+            'handled': {s: t.snapshot() for s, t in self.handledBySubject.items()},
+            'sends': {s: t.snapshot() for s, t in self.sendsBySubject.items()},
+            'timeouts': dict(self.timeoutsBySubject),
+        }
+
+
+class StatsConnection:
+    """Wraps a Connection so sends with a timeout are timed, everything else is passed through."""
+
+    __slots__ = ['_conn', '_stats']
+
+    def __init__(self, conn, stats:AgentStats):
+        self._conn = conn
+        self._stats = stats
+
+    async def send(self, msg, timeout=Missing, additional_subjects=Missing):
+        if not timeout: return await self._conn.send(msg, timeout, additional_subjects)
+        t0 = time.perf_counter_ns()
+        reply = await self._conn.send(msg, timeout, additional_subjects)
+        if reply is Missing:
+            self._stats.onTimeout(msg.subject)
+        else:
+            self._stats.onReply(msg.subject, time.perf_counter_ns() - t0)
+        return reply
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class InstrumentedDispatcher(MsgDispatcher):
+    """A MsgDispatcher that times its handlers and answers GET_STATS - subclasses set self.stats and self.conn."""
+
+    GET_STATS = 'GET_STATS'
+
+    __slots__ = ()
+
+    async def msgArrived(self, msg):
+        t0 = time.perf_counter_ns()
+        try:
+            if (handler := self._handlerBySubject.get(msg.subject)) is None: return _UNHANDLED
+            return await handler(self, msg)
+        finally:
+            self.stats.onHandled(msg.subject, time.perf_counter_ns() - t0)
+
+    @handles(GET_STATS)
+    async def _onGetStats(self, msg):
+        snapshot = self.stats.snapshot()
+        if msg.contents is True: self.stats.reset()
+        await self.conn.send(msg.reply(snapshot))
@@ -29,18 +29,34 @@
 # For the first implementation we will assume well coded agents that behave correctly
 # No error handling for invalid messages, bad behaviour etc.
 # Providers may only quote for RFQs they have provided indicative prices for
+#
+# PACKED INDICATIONS:
+# Each venue has an asset id table - its assets' names in order, an id being an index into it - which is the reply to
+# REGISTER_PROVIDER (and GET_ASSET_IDS). SUBMIT_INDIC_PACKED and GET_COMPOSITES_PACKED then carry (ids, bids, asks) as
+# bytes of int32 / float64 buffers rather than a tuple or list per asset - see packIndications / unpackIndications.
+# Indications are held in [provider, asset] arrays so a packed submission goes straight in with no per asset Python.
+# An asset may appear at most once per submission. A NaN bid or ask (None in a SUBMIT_INDIC) withdraws the provider's
+# indication for that asset. A submission whose buffers don't line up, or that has an id outside the table, is
+# answered False and ignored.
 
 
 
 # Python imports
+import itertools, logging
 from typing import Annotated, TypeAlias, Iterable, cast
+import numpy as np
 
 # vlmessaging imports
 from vlmessaging import VLM, Msg, Entry
 from vlmessaging.utils import co, Missing, wip
+from vlmessaging._utils.utils import monotonicTimeMs
 
 # local imports
-from fitg.agents._game_agent_base import GameAgent
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg._utils.timer_wheel import TimerWheel
+from fitg.utils.exceptions import FitgError
+
+_log = logging.getLogger(__name__)
 
 # types
 AssetName = str
@@ -49,14 +65,128 @@ Bid = Ask = float
 BidAsk: TypeAlias = Annotated[list[float], "BidAsk: [bid, ask]"]    # providers must provide a 2-way price so bid/ask are never None
 Indication: TypeAlias = tuple[AssetName, Bid, Ask]
 Indications: TypeAlias = Iterable[Indication]
+PackedIndications: TypeAlias = tuple[bytes, bytes, bytes]     # asset ids (int32), bids, asks (float64)
 
 
 RFQ_TIMEOUT_MS = 5000                   # time allowed for providers to respond with quotes
+RFQ_ACCEPT_TIMEOUT_MS = 3000            # time allowed for the taker to accept or decline once quotes are shown
 QUOTE_OBLIGATION_INTERVAL_MS = 10000    # interval within which providers must submit indicative prices
+RFQ_TIMER_TICK_MS = 50                  # resolution of the RFQ timeouts
+ASSET_ID_DTYPE = np.int32
+
+
+def packIndications(ids, bids, asks) -> PackedIndications:
+    ids = np.asarray(ids, dtype=ASSET_ID_DTYPE)
+    bids, asks = np.asarray(bids, dtype=np.float64), np.asarray(asks, dtype=np.float64)
+    if not len(ids) == len(bids) == len(asks):
+        raise FitgError(f'{len(ids)} ids but {len(bids)} bids and {len(asks)} asks')
+    return ids.tobytes(), bids.tobytes(), asks.tobytes()
+
+def unpackIndications(packed:PackedIndications):
+    # answers read only (ids, bids, asks) arrays over the buffers
+    ids, bids, asks = packed
+    n = len(ids) // ASSET_ID_DTYPE().itemsize
+    if len(ids) % ASSET_ID_DTYPE().itemsize or len(bids) != 8 * n or len(asks) != 8 * n:
+        raise FitgError(f'Packed indications of {len(ids)}, {len(bids)} and {len(asks)} bytes don\'t line up')
+    return np.frombuffer(ids, dtype=ASSET_ID_DTYPE), np.frombuffer(bids, dtype=np.float64), np.frombuffer(asks, dtype=np.float64)
+
+
+def applyCompositeDelta(compositeByAsset, changed):
+    # updates compositeByAsset in place with a COMPOSITE_DELTA's changes, dropping composites that have gone
+    for asset, composite in changed.items():
+        if composite is None:
+            compositeByAsset.pop(asset, None)
+        else:
+            compositeByAsset[asset] = composite
+
+
+class CompositeSubscription:
+    # an agent's copy of a venue's composites, kept in sync by giving it the venue's COMPOSITE_DELTAs - deltas already
+    # covered are dropped and a gap resyncs from a fresh snapshot, at most one at a time, with the deltas that arrive
+    # whilst it's in flight applied on top of it. noteFn, if given, is called with the snapshot and then each delta
+
+    __slots__ = [
+        'agent', 'venueAddr', 'noteFn',
+        'seq',                          # of the last delta applied
+        'composites',                   # BidAsk by AssetName
+        '_deltasDuringResync',          # COMPOSITE_DELTAs that arrived whilst a snapshot was in flight, else None
+    ]
+
+    def __init__(self, agent, venueAddr, noteFn=None):
+        self.agent = agent
+        self.venueAddr = venueAddr
+        self.noteFn = noteFn
+        self.seq = -1
+        self.composites = {}
+        self._deltasDuringResync = None
+
+    async def subscribe(self) -> bool:
+        # subscribes, or resyncs after a gap, answering True if we're now in sync
+        if self._deltasDuringResync is not None: return False
+        deltas = self._deltasDuringResync = []
+        try:
+            msg = Msg(self.venueAddr, BondVenue.SUBSCRIBE_COMPOSITES, self.agent.name)
+            if (reply := await self.agent.conn.send(msg, 1000)) is Missing:
+                _log.warning(f'{self.agent.name} failed to subscribe to composites at {self.venueAddr}')
+                return False
+            seq, composites = reply.contents
+            self.composites = dict(composites)
+            if self.noteFn: self.noteFn(composites)
+            for s, changed in sorted(deltas, key=lambda x: x[0]):
+                if s <= seq: continue
+                if s != seq + 1: break                              # still a gap so the next delta resyncs again
+                self._apply(changed)
+                seq = s
+            self.seq = seq
+            return True
+        finally:
+            self._deltasDuringResync = None
+
+    async def unsubscribe(self):
+        await self.agent.conn.send(Msg(self.venueAddr, BondVenue.UNSUBSCRIBE_COMPOSITES, self.agent.name), 500)
+
+    async def onDelta(self, seq, changed):
+        if self._deltasDuringResync is not None:
+            self._deltasDuringResync.append((seq, changed))        # applied once the snapshot arrives
+            return
+        if seq <= self.seq: return                                  # already covered by a snapshot
+        if seq != self.seq + 1:
+            _log.info(f'{self.agent.name} composite gap from {self.venueAddr}, resubscribing')
+            await self.subscribe()
+        else:
+            self.seq = seq
+            self._apply(changed)
+
+    def _apply(self, changed):
+        applyCompositeDelta(self.composites, changed)
+        if self.noteFn: self.noteFn(changed)
 
 
 class Rfq:
-    __slots__ = ['taker', 'takerId', 'venueId', 'asset', 'size', 'providers', 'startDT']
+    QUOTING = 'QUOTING'
+    QUOTED = 'QUOTED'
+
+    __slots__ = [
+        'taker', 'takerAddr', 'takerId', 'venueId', 'asset', 'size', 'providers', 'startDT',
+        'priceByProvider',              # firm quotes received so far
+        'state',
+    ]
+
+    def __init__(self, taker, takerAddr, takerId, venueId, asset, size, providers, startDT):
+        self.taker = taker
+        self.takerAddr = takerAddr
+        self.takerId = takerId
+        self.venueId = venueId
+        self.asset = asset
+        self.size = size
+        self.providers = providers
+        self.startDT = startDT
+        self.priceByProvider = {}
+        self.state = Rfq.QUOTING
+
+    def rankedQuotes(self):
+        # best first - the taker buys (+ve size) at the lowest price and sells at the highest
+        return sorted(self.priceByProvider.items(), key=lambda x: x[1], reverse=self.size < 0)
 
 
 
@@ -70,7 +200,13 @@ class BondVenue(GameAgent):
     REGISTER_TAKER = 'REGISTER_TAKER'   # takers are more secretive so no join / left protocol
     UNREGISTER_TAKER = 'UNREGISTER_TAKER'
     SUBMIT_INDIC = 'SUBMIT_INDIC'       # providers must submit indicative prices regularly
+    SUBMIT_INDIC_PACKED = 'SUBMIT_INDIC_PACKED'         # the same as PackedIndications
+    GET_ASSET_IDS = 'GET_ASSET_IDS'     # the asset id table, i.e. asset names by id
     GET_COMPOSITES = 'GET_COMPOSITES'   # anyone can get current indicative prices
+    GET_COMPOSITES_PACKED = 'GET_COMPOSITES_PACKED'     # the same as PackedIndications
+    SUBSCRIBE_COMPOSITES = 'SUBSCRIBE_COMPOSITES'       # reply is a (seq, snapshot), then COMPOSITE_DELTAs follow
+    UNSUBSCRIBE_COMPOSITES = 'UNSUBSCRIBE_COMPOSITES'
+    COMPOSITE_DELTA = 'COMPOSITE_DELTA' # (seq, {asset: composite, None if gone}) - a gap in seq means resubscribe
     RFQ_START = 'RFQ_START'             # taker initiates this
     RFQ_QUOTE_FOR = 'RFQ_QUOTE_FOR'     # ask provider for quote
     RFQ_QUOTES = 'RFQ_QUOTES'           # inform taker of levels
@@ -80,15 +216,24 @@ class BondVenue(GameAgent):
     RFQ_NEAR_MISS = 'RFQ_NEAR_MISS'     # inform provider they were next best
     RFQ_NO_TRADE = 'RFQ_NO_TRADE'       # informs provider they didn't trade
 
-    _baByProviderByAsset: dict[AssetName, dict[ProviderName, Indication]]
-    _compositeByAsset: dict[AssetName, BidAsk]
-
     __slots__ = [
         'addrByProviderName',
+        'providerNameByAddr',           # reverse index so indications can be attributed in O(1)
         'addrByTakerName',
+        'takerNameByAddr',
         'assets',
-        '_baByProviderByAsset',         # bid / ask by provider by asset
-        '_compositeByAsset',            # current composite indicative bid / ask (averaged across providers) by asset
+        '_assetNames',                  # the asset id table
+        '_assetIdxByName',
+        '_providerIdxByName',           # row in _bids / _asks by provider
+        '_bids', '_asks',               # [capacity, nAssets] each provider's indications, NaN where there are none
+        '_sumBid', '_sumAsk', '_nQuoting',      # [nAssets] running sums so composites update in O(1)
+        '_compBid', '_compAsk',         # [nAssets] composite indicative bid / ask (averaged across providers), NaN if none
+        '_compositeSeq',                # bumped each time a delta is published
+        '_compositeSubscribers',        # addrs sent COMPOSITE_DELTAs
+        '_rfqById',                     # in flight RFQs by venue id
+        '_rfqIdSeed',
+        '_rfqTimers',                   # one timer wheel for both the quoting and acceptance timeouts
+        '_rfqTicking',                  # True whilst the wheel's tick is scheduled
     ]
 
 
@@ -97,10 +242,27 @@ class BondVenue(GameAgent):
     def __init__(self, router, *, assets, **kwargs):
         super().__init__(router, **kwargs)
         self.addrByProviderName = {}
+        self.providerNameByAddr = {}
         self.addrByTakerName = {}
+        self.takerNameByAddr = {}
         self.assets = assets
-        self._baByProviderByAsset = {}
-        self._compositeByAsset = {}
+        self._assetNames = [a.alias for a in assets]
+        self._assetIdxByName = {n: i for i, n in enumerate(self._assetNames)}
+        self._providerIdxByName = {}
+        n = len(self._assetNames)
+        self._bids = np.full((8, n), np.nan)
+        self._asks = np.full((8, n), np.nan)
+        self._sumBid = np.zeros(n)
+        self._sumAsk = np.zeros(n)
+        self._nQuoting = np.zeros(n, dtype=np.int64)
+        self._compBid = np.full(n, np.nan)
+        self._compAsk = np.full(n, np.nan)
+        self._compositeSeq = 0
+        self._compositeSubscribers = set()
+        self._rfqById = {}
+        self._rfqIdSeed = itertools.count(1)
+        self._rfqTimers = TimerWheel(RFQ_TIMER_TICK_MS)
+        self._rfqTicking = False
 
     async def start(self, vnets=[]):
         await self.loginToGameMaster()
@@ -110,132 +272,303 @@ class BondVenue(GameAgent):
 
     async def stop(self):
         await super().stop()
+        self.conn._router.unscheduleFn(self._tickRfqTimers)
         self.running = False
 
 
     # MESSAGE HANDLERS
 
-    async def msgArrived(self, msg):
-
-        await super().msgArrived(msg)
-
-        # LIFETIME PROTOCOL
-
-        if msg.subject == self.REGISTER_PROVIDER:
-            providerName = msg.contents     # assume valid
-            self.addrByProviderName[providerName] = msg.sender.addr
-            await self.conn.send(msg.reply(True))                       # inform provider of successful registration
-            for name, addr in self.addrByProviderName.items():
-                if name != providerName:
-                    await self.conn.send(Msg(addr, self.PROVIDER_JOINED, providerName))
-            for name, addr in self.addrByTakerName.items():
-                await self.conn.send(Msg(addr, self.PROVIDER_JOINED, providerName))
-
-        elif msg.subject == self.UNREGISTER_PROVIDER:
-            providerName = msg.contents     # assume valid
-            if self.addrByProviderName.pop(providerName, None):
-                await self.conn.send(msg.reply(None))                   # inform provider of successful unregistration
-                for addr in self.addrByProviderName.values():
-                    await self.conn.send(Msg(addr, self.PROVIDER_LEFT, providerName))
-                for addr in self.addrByTakerName.values():
-                    await self.conn.send(Msg(addr, self.PROVIDER_LEFT, providerName))
-
-        elif msg.subject == self.GET_PROVIDERS:
-            # OPEN: PROVIDERS_BY_ASSET instead
-            await self.conn.send(msg.reply(list(self.addrByProviderName.keys())))
-
-        elif msg.subject == self.REGISTER_TAKER:
-            takerName = msg.contents
-            self.addrByTakerName[takerName] = msg.sender.addr
-            await self.conn.send(msg.reply(True))
-
-        elif msg.subject == self.UNREGISTER_TAKER:
-            takerName = msg.contents
-            self.addrByTakerName.pop(takerName, None)
-            await self.conn.send(msg.reply(None))
-
-
-        # COMPOSITE PROTOCOL
-
-        elif msg.subject == self.SUBMIT_INDIC:
-            addr = msg.sender.addr
-            providerName = next((n for n, a in self.addrByProviderName.items() if a == addr), None)  # OPEN: O(n) reverse lookup
-            if not providerName: return    # don't inform unknown providers of failure
-
-            changed = set()
-
-            # update provider quotes
-            for assetName, bid, ask in cast(Indications, msg.contents):
-                baByProviderName = self._baByProviderByAsset.get(assetName)
-                if baByProviderName is None:
-                    baByProviderName = self._baByProviderByAsset[assetName] = {}
-                baByProviderName[providerName] = [bid, ask]
-                changed.add(assetName)
-
-            # update composite quotes
-            for assetName in changed:
-                bidSum = askSum = 0.0
-                n = 0
-                for bid, ask in self._baByProviderByAsset.get(assetName, {}).values():
-                    bidSum += bid
-                    askSum += ask
-                    n += 1
-                if not n:
-                    self._compositeByAsset.pop(assetName, None)
-                else:
-                    self._compositeByAsset[assetName] = [bidSum / n, askSum / n]
-
-            await self.conn.send(msg.reply(True))
-
-        elif msg.subject == self.GET_COMPOSITES:
-            await self.conn.send(msg.reply(self._compositeByAsset))
-
-
-        # RFQ PROTOCOL
-
-        elif msg.subject == self.RFQ_START:
-            # contents - [assets, quantities, side, providers]
-            # create new rfq (with unique id) and send RFQ_QUOTE_FOR to each provider
-            # reply to taker with rfq id
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-        elif msg.subject == self.RFQ_QUOTE_FOR:
-            if msg.isReply:
-                # add the quote to the rfq
-                pass
-                return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-        elif msg.subject == self.RFQ_ACCEPT:
-            # check acceptance received within time limit
-            # inform:
-            #   best provider with RFQ_ACCEPTED,
-            #   2nd best with RFQ_NEAR_MISS
-            #   others with RFQ_NO_TRADE
-            # taker and provider must inform GameMaster / Bookkeeper of trade
-            # reply to taker that trade is done (provider, size, price, side)
-            # if not within time limit send RFQ_NO_TRADE to taker
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-        elif msg.subject == self.RFQ_DECLINE:
-            # inform all providers with RFQ_NO_TRADE
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-
-        # DEFAULT
-
-        else:
-            return [VLM.IGNORE_UNHANDLED_REPLIES, VLM.HANDLE_DOES_NOT_UNDERSTAND]
+    # LIFETIME PROTOCOL
+
+    @handles(REGISTER_PROVIDER)
+    async def _onRegisterProvider(self, msg):
+        providerName = msg.contents     # assume valid
+        if (oldAddr := self.addrByProviderName.get(providerName)) is not None:
+            self.providerNameByAddr.pop(oldAddr, None)
+        self.addrByProviderName[providerName] = msg.replyAddr
+        self.providerNameByAddr[msg.replyAddr] = providerName
+        self._providerIdx(providerName)
+        await self.conn.send(msg.reply(self._assetNames))           # inform provider of successful registration
+        await self._broadcastProviderChange(self.PROVIDER_JOINED, providerName)
+
+    @handles(UNREGISTER_PROVIDER)
+    async def _onUnregisterProvider(self, msg):
+        providerName = msg.contents     # assume valid
+        if addr := self.addrByProviderName.pop(providerName, None):
+            self.providerNameByAddr.pop(addr, None)
+            changed = self._withdrawIndications(providerName)        # so it leaves the composites and RFQs
+            await self.conn.send(msg.reply(None))                   # inform provider of successful unregistration
+            await self._broadcastProviderChange(self.PROVIDER_LEFT, providerName)
+            if len(changed): await self._publishCompositeDelta(changed)
+
+    @handles(GET_PROVIDERS)
+    async def _onGetProviders(self, msg):
+        # OPEN: PROVIDERS_BY_ASSET instead
+        await self.conn.send(msg.reply(list(self.addrByProviderName.keys())))
+
+    @handles(REGISTER_TAKER)
+    async def _onRegisterTaker(self, msg):
+        takerName = msg.contents
+        if (oldAddr := self.addrByTakerName.get(takerName)) is not None:
+            self.takerNameByAddr.pop(oldAddr, None)
+        self.addrByTakerName[takerName] = msg.replyAddr
+        self.takerNameByAddr[msg.replyAddr] = takerName
+        await self.conn.send(msg.reply(True))
+
+    @handles(UNREGISTER_TAKER)
+    async def _onUnregisterTaker(self, msg):
+        takerName = msg.contents
+        if (addr := self.addrByTakerName.pop(takerName, None)) is not None:
+            self.takerNameByAddr.pop(addr, None)
+        await self.conn.send(msg.reply(None))
+
+
+    # COMPOSITE PROTOCOL
+
+    @handles(SUBMIT_INDIC)
+    async def _onSubmitIndic(self, msg):
+        providerName = self.providerNameByAddr.get(msg.replyAddr)
+        if not providerName: return    # don't inform unknown providers of failure
+        ids, bids, asks = [], [], []
+        idxByName = self._assetIdxByName
+        for assetName, bid, ask in cast(Indications, msg.contents):
+            if (i := idxByName.get(assetName)) is None: continue         # not traded here
+            ids.append(i)
+            bids.append(bid)
+            asks.append(ask)
+        bids, asks = np.array(bids, dtype=np.float64), np.array(asks, dtype=np.float64)       # None is NaN
+        changed = self._applyIndications(providerName, np.array(ids, dtype=np.intp), bids, asks)
+        await self.conn.send(msg.reply(True))
+        if len(changed): await self._publishCompositeDelta(changed)
+
+    @handles(SUBMIT_INDIC_PACKED)
+    async def _onSubmitIndicPacked(self, msg):
+        providerName = self.providerNameByAddr.get(msg.replyAddr)
+        if not providerName: return
+        try:
+            ids, bids, asks = unpackIndications(msg.contents)
+        except FitgError:
+            await self.conn.send(msg.reply(False))
+            return
+        if len(ids) and (ids.min() < 0 or ids.max() >= len(self._assetNames)):
+            await self.conn.send(msg.reply(False))
+            return
+        changed = self._applyIndications(providerName, ids, bids, asks)
+        await self.conn.send(msg.reply(True))
+        if len(changed): await self._publishCompositeDelta(changed)
+
+    @handles(GET_ASSET_IDS)
+    async def _onGetAssetIds(self, msg):
+        await self.conn.send(msg.reply(self._assetNames))
+
+    @handles(GET_COMPOSITES)
+    async def _onGetComposites(self, msg):
+        await self.conn.send(msg.reply(self.compositeByAsset()))
+
+    @handles(GET_COMPOSITES_PACKED)
+    async def _onGetCompositesPacked(self, msg):
+        ids = np.flatnonzero(~np.isnan(self._compBid))
+        await self.conn.send(msg.reply(packIndications(ids, self._compBid[ids], self._compAsk[ids])))
+
+    @handles(SUBSCRIBE_COMPOSITES)
+    async def _onSubscribeComposites(self, msg):
+        # also used to resync after a gap
+        self._compositeSubscribers.add(msg.replyAddr)
+        await self.conn.send(msg.reply((self._compositeSeq, self.compositeByAsset())))
+
+    @handles(UNSUBSCRIBE_COMPOSITES)
+    async def _onUnsubscribeComposites(self, msg):
+        self._compositeSubscribers.discard(msg.replyAddr)
+        await self.conn.send(msg.reply(None))
+
+
+    # RFQ PROTOCOL
+
+    @handles(RFQ_START)
+    async def _onRfqStart(self, msg):
+        # contents - (takerId, asset, size, providers), size is +ve for buy, -ve for sell
+        takerId, asset, size, providers = msg.contents
+        takerAddr = msg.replyAddr
+        taker = self.takerNameByAddr.get(takerAddr)
+        providers = [p for p in providers if p in self.addrByProviderName and self._isQuoting(p, asset)]
+        if not taker or not providers:
+            await self.conn.send(msg.reply(takerId, subject=self.RFQ_NO_TRADE))
+            return
+        rfq = Rfq(taker, takerAddr, takerId, next(self._rfqIdSeed), asset, size, providers, monotonicTimeMs())
+        self._rfqById[rfq.venueId] = rfq
+        self._scheduleRfqTimeout(rfq.venueId, rfq.startDT + RFQ_TIMEOUT_MS)
+        await self.conn.send(msg.reply(rfq.venueId))
+        addrs = [self.addrByProviderName[p] for p in providers]
+        await self.broadcast(addrs, self.RFQ_QUOTE_FOR, (rfq.venueId, asset, size))
+
+    @handles(RFQ_QUOTE_FOR)
+    async def _onRfqQuote(self, msg):
+        if not msg.isReply: return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
+        # add the quote to the rfq - contents (venueId, price)
+        venueId, price = msg.contents
+        rfq = self._rfqById.get(venueId)
+        provider = self.providerNameByAddr.get(msg.replyAddr)
+        if rfq is None or rfq.state is not Rfq.QUOTING or provider not in rfq.providers: return
+        rfq.priceByProvider[provider] = price
+        if len(rfq.priceByProvider) == len(rfq.providers):
+            await self.sendQuotesToTaker(rfq)                   # everyone has quoted so don't wait
+
+    @handles(RFQ_ACCEPT)
+    async def _onRfqAccept(self, msg):
+        # contents - venueId
+        rfq = self._rfqById.get(msg.contents)
+        if rfq is None or rfq.state is not Rfq.QUOTED or msg.replyAddr != rfq.takerAddr:
+            # too late (or not quoted yet)
+            await self.conn.send(msg.reply(msg.contents, subject=self.RFQ_NO_TRADE))
+            return
+        self._retireRfq(rfq)
+        ranked = rfq.rankedQuotes()
+        best, price = ranked[0]
+        if (bestAddr := self.addrByProviderName.get(best)) is None:
+            # the best provider unregistered after quoting - the taker accepted their price so no one else's
+            await self._sendNoTrade(rfq, rfq.providers)
+            await self.conn.send(msg.reply(msg.contents, subject=self.RFQ_NO_TRADE))
+            return
+        trade = (rfq.venueId, rfq.asset, rfq.size, price)
+        # taker and provider must inform GameMaster / Bookkeeper of trade
+        await self.conn.send(Msg(bestAddr, self.RFQ_ACCEPTED, trade + (rfq.taker,)))
+        if len(ranked) > 1 and (nextAddr := self.addrByProviderName.get(ranked[1][0])) is not None:
+            await self.conn.send(Msg(nextAddr, self.RFQ_NEAR_MISS, rfq.venueId))
+        await self._sendNoTrade(rfq, [p for p, _ in ranked[2:]] + [p for p in rfq.providers if p not in rfq.priceByProvider])
+        await self.conn.send(msg.reply(trade + (best,)))
+
+    @handles(RFQ_DECLINE)
+    async def _onRfqDecline(self, msg):
+        # contents - venueId
+        if (rfq := self._rfqById.get(msg.contents)) is not None and msg.replyAddr == rfq.takerAddr:
+            self._retireRfq(rfq)
+            await self._sendNoTrade(rfq, rfq.providers)
+        await self.conn.send(msg.reply(msg.contents))
+
+
+    # LIFETIME HELPERS
+
+    async def _broadcastProviderChange(self, subject, providerName):
+        # tell the other providers and all the takers at once rather than one send after another
+        addrs = [a for n, a in self.addrByProviderName.items() if n != providerName]
+        addrs.extend(self.addrByTakerName.values())
+        for addr in await self.broadcast(addrs, subject, providerName):
+            _log.warning(f'{self.name} failed to send {subject}({providerName}) to {addr}')
+
+
+    # COMPOSITE HELPERS
+
+    def compositeByAsset(self, ids=None) -> dict[AssetName, BidAsk]:
+        # the composites of the given asset ids, or of every asset with one - None for an asset no one quotes any more
+        if ids is None: ids = np.flatnonzero(~np.isnan(self._compBid))
+        names = self._assetNames
+        return {
+            names[i]: (None if b != b else [b, a])
+            for i, b, a in zip(ids.tolist(), self._compBid[ids].tolist(), self._compAsk[ids].tolist())
+        }
+
+    def _applyIndications(self, providerName, ids, bids, asks) -> np.ndarray:
+        # updates the provider's indications and the running sums behind each composite, answering the ids of the
+        # composites that changed - NaN withdraws rather than going into the sums
+        p = self._providerIdxByName[providerName]
+        withdrawn = None
+        if (gone := np.isnan(bids) | np.isnan(asks)).any():
+            withdrawn = self._withdrawIndications(providerName, ids[gone])
+            keep = ~gone
+            ids, bids, asks = ids[keep], bids[keep], asks[keep]
+        oldBids, oldAsks = self._bids[p, ids], self._asks[p, ids]
+        isNew = np.isnan(oldBids)
+        self._nQuoting[ids] += isNew
+        self._sumBid[ids] += bids - np.where(isNew, 0.0, oldBids)
+        self._sumAsk[ids] += asks - np.where(isNew, 0.0, oldAsks)
+        self._bids[p, ids] = bids
+        self._asks[p, ids] = asks
+        n = self._nQuoting[ids]
+        compBids, compAsks = self._sumBid[ids] / n, self._sumAsk[ids] / n
+        moved = (compBids != self._compBid[ids]) | (compAsks != self._compAsk[ids])     # NaN != x so new ones count
+        self._compBid[ids] = compBids
+        self._compAsk[ids] = compAsks
+        return ids[moved] if withdrawn is None else np.concatenate([withdrawn, ids[moved]])
+
+    def _withdrawIndications(self, providerName, ids=None) -> np.ndarray:
+        # takes the provider's indications for ids (by default all of them) out of the composites, answering the ids of
+        # the composites that changed
+        if (p := self._providerIdxByName.get(providerName)) is None: return np.empty(0, dtype=np.intp)
+        ids = np.flatnonzero(~np.isnan(self._bids[p])) if ids is None else ids[~np.isnan(self._bids[p, ids])]
+        self._nQuoting[ids] -= 1
+        self._sumBid[ids] -= self._bids[p, ids]
+        self._sumAsk[ids] -= self._asks[p, ids]
+        self._bids[p, ids] = np.nan
+        self._asks[p, ids] = np.nan
+        n = self._nQuoting[ids]
+        none = n == 0
+        self._sumBid[ids[none]] = 0.0                   # no drift carries over to the next provider to quote
+        self._sumAsk[ids[none]] = 0.0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._compBid[ids] = np.where(none, np.nan, self._sumBid[ids] / n)
+            self._compAsk[ids] = np.where(none, np.nan, self._sumAsk[ids] / n)
+        return ids
+
+    def _providerIdx(self, providerName):
+        if (p := self._providerIdxByName.get(providerName)) is None:
+            p = self._providerIdxByName[providerName] = len(self._providerIdxByName)
+            if p == len(self._bids):
+                # double the capacity
+                self._bids = np.concatenate([self._bids, np.full_like(self._bids, np.nan)])
+                self._asks = np.concatenate([self._asks, np.full_like(self._asks, np.nan)])
+        return p
+
+    def _isQuoting(self, providerName, asset):
+        p, i = self._providerIdxByName.get(providerName), self._assetIdxByName.get(asset)
+        return p is not None and i is not None and not np.isnan(self._bids[p, i])
+
+    async def _publishCompositeDelta(self, ids):
+        self._compositeSeq += 1
+        if not self._compositeSubscribers: return
+        changed = self.compositeByAsset(ids)
+        failed = await self.broadcast(self._compositeSubscribers, self.COMPOSITE_DELTA, (self._compositeSeq, changed))
+        for addr in failed:
+            _log.warning(f'{self.name} dropping composite subscriber {addr}')
+            self._compositeSubscribers.discard(addr)
 
 
     # RFQ HELPERS
 
-    async def sendQuotesToTaker(self):
-        # RFQ_QUOTES
-        pass
-
-
-    async def quoteAcceptanceTimeout(self):
-        # if rfq is not done within time limit, inform providers and taker that
-        # RFQ_NO_TRADE
-        pass
-
+    async def sendQuotesToTaker(self, rfq):
+        # RFQ_QUOTES - (venueId, takerId, [(provider, price)] best first), then the taker has to accept in time
+        rfq.state = Rfq.QUOTED
+        self._scheduleRfqTimeout(rfq.venueId, monotonicTimeMs() + RFQ_ACCEPT_TIMEOUT_MS)
+        await self.conn.send(Msg(rfq.takerAddr, self.RFQ_QUOTES, (rfq.venueId, rfq.takerId, rfq.rankedQuotes())))
+
+    async def quoteAcceptanceTimeout(self, rfq):
+        # rfq is not done within time limit so inform providers and taker that RFQ_NO_TRADE
+        self._retireRfq(rfq)
+        await self._sendNoTrade(rfq, rfq.providers)
+        await self.conn.send(Msg(rfq.takerAddr, self.RFQ_NO_TRADE, rfq.venueId))
+
+    async def _sendNoTrade(self, rfq, providers):
+        addrs = [a for p in providers if (a := self.addrByProviderName.get(p))]
+        if addrs: await self.broadcast(addrs, self.RFQ_NO_TRADE, rfq.venueId)
+
+    def _retireRfq(self, rfq):
+        self._rfqById.pop(rfq.venueId, None)
+        self._rfqTimers.cancel(rfq.venueId)
+
+    def _scheduleRfqTimeout(self, venueId, atMs):
+        self._rfqTimers.schedule(venueId, atMs)
+        if not self._rfqTicking:
+            self._rfqTicking = True
+            self.conn.scheduleFn(self._tickRfqTimers, after=RFQ_TIMER_TICK_MS)
+
+    async def _tickRfqTimers(self):
+        # the single scheduled callback for all RFQs - it stops rescheduling itself once the wheel is empty
+        for venueId in self._rfqTimers.advance(monotonicTimeMs()):
+            if (rfq := self._rfqById.get(venueId)) is None: continue
+            if rfq.state is Rfq.QUOTING and rfq.priceByProvider:
+                await self.sendQuotesToTaker(rfq)          # show the taker whatever arrived in time
+            else:
+                await self.quoteAcceptanceTimeout(rfq)
+        if len(self._rfqTimers):
+            self.conn.scheduleFn(self._tickRfqTimers, after=RFQ_TIMER_TICK_MS)
+        else:
+            self._rfqTicking = False
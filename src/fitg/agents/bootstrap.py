@@ -0,0 +1,78 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Game bootstrap
+#
+# Starts agents in dependency stages, e.g. [[gm], [tweb, eurex], [dealer1, dealer2, ..., taker]]. Every agent in a
+# stage is started concurrently and the stage is fully up before the next one starts. The GameAgents of a stage are
+# logged in with a single LOGIN_BULK to the GameMaster first, so their start() skips its own LOGIN round trip and
+# startup costs a couple of round trips per stage rather than per agent.
+
+
+# Python imports
+import asyncio, logging
+
+# vlmessaging imports
+from vlmessaging import Msg
+from vlmessaging.utils import Missing
+
+# local imports
+from fitg.agents._game_agent_base import GameAgent, LOGIN_ATTEMPTS
+from fitg.agents.game_master import GameMaster
+from fitg.utils.exceptions import FitgError
+
+_log = logging.getLogger(__name__)
+
+GM_WAIT_MS = 5_000
+GM_POLL_MS = 200
+LOGIN_TIMEOUT_MS = 2_000
+
+
+async def bulkLogin(agents, timeout=LOGIN_TIMEOUT_MS):
+    """Logs in the agents with a single LOGIN_BULK setting each one's game_token."""
+    agents = list(agents)
+    if not agents: return
+    via = agents[0]
+    gmAddr = await via.directory.waitForAddrOfType(GameMaster.ENTRY_TYPE, GM_WAIT_MS, GM_POLL_MS)
+    if gmAddr is Missing: raise FitgError('GameMaster not found')
+    msg = Msg(gmAddr, GameMaster.LOGIN_BULK, [(a.user, a.pswd) for a in agents])
+    for attempt in range(LOGIN_ATTEMPTS):
+        if reply := await via.conn.send(msg, timeout): break
+        _log.warning(f'Bulk login timed out (attempt {attempt + 1} of {LOGIN_ATTEMPTS})')
+    else:
+        raise FitgError('Bulk login timed out')
+    failed = [a.name for a, token in zip(agents, reply.contents) if token is None]
+    if failed: raise FitgError(f'Login failed for {", ".join(failed)}')
+    for agent, token in zip(agents, reply.contents):
+        agent.game_token = token
+
+async def startInStages(stages, vnets=[]):
+    """Starts each stage's agents concurrently, one stage after another, answering the started agents. If any agent
+    fails to start, every agent that did start is stopped and the failure is raised."""
+    answer = []
+    try:
+        for stage in stages:
+            await bulkLogin(a for a in stage if isinstance(a, GameAgent) and a.game_token is Missing)
+            results = await asyncio.gather(*[a.start(vnets) for a in stage], return_exceptions=True)
+            answer.extend(res for res in results if not isinstance(res, BaseException))
+            failed = [(a, res) for a, res in zip(stage, results) if isinstance(res, BaseException)]
+            if failed:
+                raise FitgError(f'Failed to start {", ".join(a.name for a, _ in failed)}') from failed[0][1]
+    except BaseException:
+        await stopAll(answer)
+        raise
+    return answer
+
+async def stopAll(agents):
+    """Stops the agents in the reverse of the order they were started, carrying on past any that fail to stop."""
+    for agent in reversed(agents):
+        try:
+            await agent.stop()
+        except Exception as ex:
+            _log.warning(f'Failed to stop {agent.name}: {ex!r}')
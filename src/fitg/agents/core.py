@@ -16,4 +16,5 @@ from fitg.agents.game_master import GameMaster
 from fitg.agents.bond_venue import BondVenue
 from fitg.agents.exchange import Exchange
 from fitg.agents.simple_bond_dealer import SimpleBondDealer
-from fitg.agents.simple_bond_liquidity_taker import SimpleBondLiquidityTaker
\ No newline at end of file
+from fitg.agents.simple_bond_liquidity_taker import SimpleBondLiquidityTaker
+from fitg.agents.curve_service import CurveService
\ No newline at end of file
@@ -0,0 +1,121 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Shared yield curve fitted to a BondVenue's composites
+#
+# Subscribes to the venue's composites and, every FIT_INTERVAL_MS that some have changed, feeds the latest mid of each
+# changed asset to an NssFitter (so a burst of deltas costs one update per asset) and refits - warm started, so a fit
+# after a few changes is a handful of 4x4 solves. Each fit is published to subscribers so agents share one fit rather
+# than each refitting on every composite tick.
+#
+# CURVE: (seq, (params, rmse, n)) - params are NssParams as a tuple, see fitg.core.curve.nssYields and fairPrices,
+# or (seq, None) before there's a fit
+
+
+# Python imports
+import datetime, logging
+
+# local imports
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg.agents.bond_venue import BondVenue, CompositeSubscription
+from fitg.core.curve import NssFitter
+
+_log = logging.getLogger(__name__)
+
+
+FIT_INTERVAL_MS = 500
+
+
+class CurveService(GameAgent):
+    ENTRY_TYPE = 'CurveService'
+    SUBSCRIBE_CURVE = 'SUBSCRIBE_CURVE'         # reply is the CURVE, then CURVE_UPDATEs follow
+    UNSUBSCRIBE_CURVE = 'UNSUBSCRIBE_CURVE'
+    GET_CURVE = 'GET_CURVE'                     # reply is the CURVE
+    CURVE_UPDATE = 'CURVE_UPDATE'               # the CURVE after each fit
+
+    __slots__ = (
+        'bondVenue',
+        'subscription',                 # CompositeSubscription to bondVenue once found
+        'midByAsset',                   # changed composite mids not yet given to the fitter
+        'fitter', 'curveSeq', 'subscribers',
+    )
+
+    def __init__(self, router, *, bondVenue, assets, settleDt=None, **kwargs):
+        super().__init__(router, **kwargs)
+        self.bondVenue = bondVenue
+        self.subscription = None
+        self.midByAsset = {}
+        self.fitter = NssFitter(assets, settleDt or datetime.date.today())
+        self.curveSeq = 0
+        self.subscribers = set()
+
+    async def start(self, vnets=[]):
+        await self.loginToGameMaster()
+        await self.registerSelfWithDirectory(vnets, self.name)
+        self.running = True
+        await self.ensureSubscribedAndFit()
+        return self
+
+    async def stop(self):
+        self.running = False
+        self.conn._router.unscheduleFn(self.ensureSubscribedAndFit)
+        if self.subscription is not None:
+            await self.subscription.unsubscribe()
+        await super().stop()
+
+
+    # MESSAGE HANDLERS
+
+    @handles(BondVenue.COMPOSITE_DELTA)
+    async def _onCompositeDelta(self, msg):
+        if self.subscription is not None and msg.replyAddr == self.subscription.venueAddr:
+            await self.subscription.onDelta(*msg.contents)
+
+    @handles(SUBSCRIBE_CURVE)
+    async def _onSubscribeCurve(self, msg):
+        self.subscribers.add(msg.replyAddr)
+        await self.conn.send(msg.reply(self._curve()))
+
+    @handles(UNSUBSCRIBE_CURVE)
+    async def _onUnsubscribeCurve(self, msg):
+        self.subscribers.discard(msg.replyAddr)
+        await self.conn.send(msg.reply(None))
+
+    @handles(GET_CURVE)
+    async def _onGetCurve(self, msg):
+        await self.conn.send(msg.reply(self._curve()))
+
+
+    # FITTING
+
+    async def ensureSubscribedAndFit(self):
+        if not self.running: return
+        if self.subscription is None:
+            for entry in await self.directory.entriesOfType(BondVenue.ENTRY_TYPE):
+                if entry.params == self.bondVenue:
+                    # held whilst subscribing so the deltas that arrive meanwhile are kept, dropped if that fails
+                    self.subscription = CompositeSubscription(self, entry.addr, self._noteComposites)
+                    if not await self.subscription.subscribe(): self.subscription = None
+        if self.midByAsset:
+            self.fitter.setPrices(self.midByAsset)
+            self.midByAsset = {}
+            if self.fitter.fit() is not None:
+                self.curveSeq += 1
+                for addr in await self.broadcast(self.subscribers, self.CURVE_UPDATE, self._curve()):
+                    _log.warning(f'{self.name} dropping curve subscriber {addr}')
+                    self.subscribers.discard(addr)
+        self.conn.scheduleFn(self.ensureSubscribedAndFit, after=FIT_INTERVAL_MS)
+
+    def _noteComposites(self, compositeByAsset):
+        for asset, composite in compositeByAsset.items():
+            if composite is not None: self.midByAsset[asset] = (composite[0] + composite[1]) / 2
+
+    def _curve(self):
+        fit = self.fitter.last
+        return (self.curveSeq, None if fit is None else (tuple(fit.params), fit.rmse, fit.n))
@@ -7,26 +7,57 @@
 # License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
 # **********************************************************************************************************************
 
+# Central limit order book exchange for bond futures
+#
+# TERMS: size - +ve for buy, -ve for sell
+#        limit order - matches at its price or better, any remainder rests in the book
+#        market order - matches against whatever is resting, any remainder is cancelled
+#
+# Orders are matched with price-time priority. The aggressor gets its fills in the reply to SUBMIT_ORDER and the
+# owners of the resting orders are sent a FILL for each. Anyone can GET_DEPTH and subscribers are sent TOP_OF_BOOK
+# whenever the top of an asset's book changes.
+
+
 # Python imports
+import itertools, logging
 
 # vlmessaging imports
 from vlmessaging import VLM, Msg, Entry
 from vlmessaging.utils import co, Missing, wip
 
 # local imports
-from fitg.agents._game_agent_base import GameAgent
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg.core.order_book import OrderBook
+from fitg.utils.exceptions import FitgError
+
+_log = logging.getLogger(__name__)
+
 
+TICK_SIZE = 0.01
+MIN_PX = 0.0
+MAX_PX = 200.0
 
 
 class Exchange(GameAgent):
 
     ENTRY_TYPE = 'BondFuturesExchange'
+    SUBMIT_ORDER = 'SUBMIT_ORDER'       # (asset, size, price) - price None for a market order, reply (orderId, fills)
+    CANCEL_ORDER = 'CANCEL_ORDER'       # (asset, orderId), reply is the signed size cancelled
+    FILL = 'FILL'                       # sent to the owner of a resting order that traded
+    GET_DEPTH = 'GET_DEPTH'             # (asset, levels), reply ([(bid, size), ...], [(ask, size), ...])
+    SUBSCRIBE_TOP = 'SUBSCRIBE_TOP'     # asset, reply is the current top
+    UNSUBSCRIBE_TOP = 'UNSUBSCRIBE_TOP'
+    TOP_OF_BOOK = 'TOP_OF_BOOK'         # (asset, bid, bidSize, ask, askSize)
 
-    __slots__ = ['addrByMarketMakerName']
+    __slots__ = ['addrByMarketMakerName', 'bookByAsset', 'subscribersByAsset', '_orderIdSeed']
 
     def __init__(self, router, *, assets, **kwargs):
         super().__init__(router, **kwargs)
         self.addrByMarketMakerName = {}
+        tradeIdSeed = itertools.count(1)
+        self.bookByAsset = {bf.alias: OrderBook(bf.alias, TICK_SIZE, MIN_PX, MAX_PX, tradeIdSeed) for bf in assets}
+        self.subscribersByAsset = {}
+        self._orderIdSeed = itertools.count(1)
 
     async def start(self, vnets=[]):
         await self.loginToGameMaster()
@@ -39,10 +70,58 @@ class Exchange(GameAgent):
         self.running = False
 
 
-    async def msgArrived(self, msg):
-
-        await super().msgArrived(msg)
-
-        return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-
+    # MESSAGE HANDLERS
+
+    @handles(SUBMIT_ORDER)
+    async def _onSubmitOrder(self, msg):
+        asset, size, price = msg.contents
+        if (book := self.bookByAsset.get(asset)) is None or not size:
+            await self.conn.send(msg.reply(None))
+            return
+        before = book.top()
+        orderId = next(self._orderIdSeed)
+        try:
+            fills = book.market(orderId, msg.replyAddr, size) if price is None else book.limit(orderId, msg.replyAddr, size, price)
+        except FitgError:
+            await self.conn.send(msg.reply(None))       # price outside the book
+            return
+        await self.conn.send(msg.reply((orderId, [f._replace(aggressor=None, resting=None) for f in fills])))
+        for fill in fills:
+            await self.conn.send(Msg(fill.resting, self.FILL, fill._replace(aggressor=None, resting=None, size=-fill.size)))
+        await self._publishTopIfChanged(book, before)
+
+    @handles(CANCEL_ORDER)
+    async def _onCancelOrder(self, msg):
+        asset, orderId = msg.contents
+        if (book := self.bookByAsset.get(asset)) is None or book.ownerOf(orderId) != msg.replyAddr:
+            await self.conn.send(msg.reply(0))
+            return
+        before = book.top()
+        await self.conn.send(msg.reply(book.cancel(orderId)))
+        await self._publishTopIfChanged(book, before)
+
+    @handles(GET_DEPTH)
+    async def _onGetDepth(self, msg):
+        asset, levels = msg.contents
+        book = self.bookByAsset.get(asset)
+        await self.conn.send(msg.reply(book.depth(levels) if book else None))
+
+    @handles(SUBSCRIBE_TOP)
+    async def _onSubscribeTop(self, msg):
+        book = self.bookByAsset.get(msg.contents)
+        if book: self.subscribersByAsset.setdefault(book.asset, set()).add(msg.replyAddr)
+        await self.conn.send(msg.reply((book.asset, *book.top()) if book else None))
+
+    @handles(UNSUBSCRIBE_TOP)
+    async def _onUnsubscribeTop(self, msg):
+        self.subscribersByAsset.get(msg.contents, set()).discard(msg.replyAddr)
+        await self.conn.send(msg.reply(None))
+
+
+    # HELPERS
+
+    async def _publishTopIfChanged(self, book, before):
+        if (top := book.top()) != before and (subscribers := self.subscribersByAsset.get(book.asset)):
+            for addr in await self.broadcast(subscribers, self.TOP_OF_BOOK, (book.asset, *top)):
+                _log.warning(f'{self.name} dropping {book.asset} subscriber {addr}')
+                subscribers.discard(addr)
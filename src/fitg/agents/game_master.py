@@ -8,40 +8,106 @@
 # **********************************************************************************************************************
 
 # Python imports
-import itertools
+import collections, itertools
 
 # vlmessaging imports
 from vlmessaging import VLM, Msg, Entry
 from vlmessaging.utils import co, Missing, wip
 
-
-
-class GameMaster:
+# local imports
+from fitg.agents._directory_cache import DirectoryCache
+from fitg.agents._dispatch import handles
+from fitg.agents._stats import AgentStats, InstrumentedDispatcher, StatsConnection
+from fitg.core.pnl import PnlEngine
+
+
+# RECORD_TRADE - contents is (token, [TradeReport, ...]) so a batch of trades costs one message, both counterparties
+# report each trade and the pair is matched, by (venue, venueTradeId), into a single ClearedTrade. Reports are
+# idempotent - a resend of a report already seen answers DUPLICATE. The reply is a status per report. The reporter
+# must be the token's player, and is tied to the address of its first accepted (PENDING or CLEARED) report so later
+# reports for it from elsewhere are INVALID.
+TradeReport = collections.namedtuple(
+    'TradeReport',
+    ('venue', 'venueTradeId', 'reporter', 'buyer', 'seller', 'asset', 'size', 'price')
+)
+ClearedTrade = collections.namedtuple(
+    'ClearedTrade',
+    ('clearId', 'venue', 'venueTradeId', 'buyer', 'seller', 'asset', 'size', 'price')
+)
+PENDING = 'PENDING'                     # waiting for the counterparty's report
+CLEARED = 'CLEARED'
+DUPLICATE = 'DUPLICATE'
+MISMATCH = 'MISMATCH'                   # the counterparties disagree on the details
+INVALID = 'INVALID'                     # the reporter isn't the token's player, the buyer or the seller, or reports
+                                        # from another address
+UNKNOWN_ASSET = 'UNKNOWN_ASSET'         # the asset isn't one the risk manager knows
+
+# GET_RISK - contents is (token, agent, lastVersion), an agent's version only changes when its trades (or the risk
+# marks) change. The reply is RISK_UNCHANGED (version) if lastVersion is current, RISK_DELTA (version, totalDv01,
+# keyRateDv01, changedPositions) if lastVersion was the last snapshot served for the agent and otherwise RISK with a
+# full RiskSnapshot. Closed positions appear in changedPositions as 0.0. The reply is RISK_UNAVAILABLE if the game
+# isn't running a risk manager.
+RiskSnapshot = collections.namedtuple('RiskSnapshot', ('version', 'totalDv01', 'keyRateDv01', 'positions'))
+
+# GET_PNL - contents is (token, agent), the reply is the agent's FIFO realised PnL over its cleared trades.
+
+
+
+class GameMaster(InstrumentedDispatcher):
     ENTRY_TYPE = 'GAME_KEEPER'
     LOGIN = 'LOGIN'
     LOGIN_TOKEN = 'LOGIN_TOKEN'
     LOGIN_INVALID = 'LOGIN_INVALID'
+    LOGIN_BULK = 'LOGIN_BULK'           # [(player, pswd), ...], reply is [token or None, ...]
     REGISTER_AGENT = 'REGISTER_AGENT'
     RECORD_TRADE = 'RECORD_TRADE'
     GET_RISK = 'GET_RISK'
-
-    __slots__ = ('name', 'running', 'conn', 'playersAgentsByPlayer', 'pswdByPlayer', 'tokenByPlayer', 'tokenSeed')
-
-    def __init__(self, router, name, pswdByPlayer):
+    RISK = 'RISK'
+    RISK_DELTA = 'RISK_DELTA'
+    RISK_UNCHANGED = 'RISK_UNCHANGED'
+    RISK_UNAVAILABLE = 'RISK_UNAVAILABLE'
+    GET_PNL = 'GET_PNL'
+
+    __slots__ = (
+        'name', 'running', 'conn', 'stats', 'playersAgentsByPlayer', 'pswdByPlayer', 'tokenByPlayer', 'playerByToken',
+        'tokenSeed', 'bookKeeper',
+        'pendingByTradeKey',            # first TradeReport by (venue, venueTradeId)
+        'clearedByTradeKey',            # ClearedTrade by (venue, venueTradeId)
+        'clearIdSeed',
+        'addrByReporter',               # where each reporter's first accepted report came from
+        'riskManager',
+        'riskVersionByAgent',           # bumped on each change to the agent's risk
+        'riskSnapshotByAgent',          # last RiskSnapshot served, rebuilt only when the version has moved on
+        'pnlEngine',                    # every cleared trade is a fill for the buyer and one for the seller
+    )
+
+    def __init__(self, router, name, pswdByPlayer, bookKeeper=None, riskManager=None, pnlEngine=None):
         self.name = name
         self.running = False
-        self.conn = router.newConnection(self.msgArrived)
+        self.stats = AgentStats()
+        self.conn = StatsConnection(router.newConnection(self.msgArrived), self.stats)
         self.playersAgentsByPlayer = {}
         self.pswdByPlayer = pswdByPlayer
         self.tokenByPlayer = {}
+        self.playerByToken = {}
         self.tokenSeed = itertools.count(1)
+        self.bookKeeper = bookKeeper
+        self.pendingByTradeKey = {}
+        self.clearedByTradeKey = {}
+        self.clearIdSeed = itertools.count(1)
+        self.addrByReporter = {}
+        self.riskManager = riskManager
+        self.riskVersionByAgent = {}
+        self.riskSnapshotByAgent = {}
+        self.pnlEngine = PnlEngine() if pnlEngine is None else pnlEngine
 
     async def start(self, vnets=[]):
         vnets = [vnets] if not isinstance(vnets, (list, tuple)) else vnets
-        msg = Msg(self.conn.directoryAddr, VLM.REGISTER_ENTRY, Entry(self.conn.addr, self.ENTRY_TYPE, self.name, vnets, None))
-        reply = await self.conn.send(msg, 500)
+        entry = Entry(self.conn.addr, self.ENTRY_TYPE, self.name, vnets, None)
+        reply = await self.conn.send(Msg(self.conn.directoryAddr, VLM.REGISTER_ENTRY, entry), 500)
         if reply is Missing:
             raise Exception(f'Failed to register {self.ENTRY_TYPE} agent')
+        DirectoryCache.forRouter(self.conn._router).noteRegistered(entry)          # agents in this process find us at once
         self.running = True
         return self
 
@@ -50,34 +116,140 @@ class GameMaster:
         reply = await self.conn.send(msg, 1000)
         if reply is Missing:
             print(f'Failed to unregister {self.ENTRY_TYPE} agent')
+        DirectoryCache.forRouter(self.conn._router).noteUnregistered(self.conn.addr, self.ENTRY_TYPE)
         self.running = False
 
-    async def msgArrived(self, msg:Msg):
 
-        if msg.subject == self.LOGIN:
-            # answer a token for a player
-            player, pswd = msg.contents
-            if self.pswdByPlayer.get(player, Missing) == pswd:
-                if (token := self.tokenByPlayer.get(player, Missing)) is Missing:
-                    token = self.tokenByPlayer[player] = next(self.tokenSeed)
-                reply = msg.reply(token, subject=self.LOGIN_TOKEN)
-            else:
-                reply = msg.reply(None, subject=self.LOGIN_INVALID)
-            await self.conn.send(reply)
-
-        elif msg.subject == self.REGISTER_AGENT:
-            # note which player the agent belongs to
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-        elif msg.subject == self.RECORD_TRADE:
-            # note a trade between two agents
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
-
-        elif msg.subject == self.GET_RISK:
-            # return risk (and other details) for an agent
-            return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
+    # MESSAGE HANDLERS
 
+    @handles(LOGIN)
+    async def _onLogin(self, msg:Msg):
+        # answer a token for a player
+        player, pswd = msg.contents
+        if (token := self.tokenFor(player, pswd)) is not None:
+            reply = msg.reply(token, subject=self.LOGIN_TOKEN)
+        else:
+            reply = msg.reply(None, subject=self.LOGIN_INVALID)
+        await self.conn.send(reply)
+
+    @handles(LOGIN_BULK)
+    async def _onLoginBulk(self, msg:Msg):
+        # answer tokens for many agents in one go, e.g. at game start
+        await self.conn.send(msg.reply([self.tokenFor(player, pswd) for player, pswd in msg.contents]))
+
+    @handles(RECORD_TRADE)
+    async def _onRecordTrade(self, msg:Msg):
+        # note a batch of trades between agents
+        token, reports = msg.contents
+        if (player := self.playerByToken.get(token)) is None:
+            await self.conn.send(msg.reply(None, subject=self.LOGIN_INVALID))
+            return
+        statuses = [self.recordTradeReport(TradeReport(*r), msg.replyAddr, player) for r in reports]
+        await self.conn.send(msg.reply(statuses))
+
+    @handles(GET_RISK)
+    async def _onGetRisk(self, msg:Msg):
+        # return risk (and other details) for an agent
+        token, agent, lastVersion = msg.contents
+        if token not in self.playerByToken:
+            await self.conn.send(msg.reply(None, subject=self.LOGIN_INVALID))
+            return
+        if self.riskManager is None:
+            await self.conn.send(msg.reply(None, subject=self.RISK_UNAVAILABLE))
+            return
+        version = self.riskVersionByAgent.get(agent, 0)
+        if version == lastVersion:
+            await self.conn.send(msg.reply(version, subject=self.RISK_UNCHANGED))
+            return
+        prior = self.riskSnapshotByAgent.get(agent)
+        snapshot = self.riskSnapshotOf(agent)
+        if prior is not None and prior.version == lastVersion:
+            changed = {
+                a: snapshot.positions.get(a, 0.0) for a in prior.positions.keys() | snapshot.positions.keys()
+                if snapshot.positions.get(a, 0.0) != prior.positions.get(a, 0.0)
+            }
+            reply = msg.reply((version, snapshot.totalDv01, snapshot.keyRateDv01, changed), subject=self.RISK_DELTA)
         else:
-            return [VLM.IGNORE_UNHANDLED_REPLIES, VLM.HANDLE_DOES_NOT_UNDERSTAND]
+            reply = msg.reply(tuple(snapshot), subject=self.RISK)
+        await self.conn.send(reply)
+
+    @handles(GET_PNL)
+    async def _onGetPnl(self, msg:Msg):
+        token, agent = msg.contents
+        if token not in self.playerByToken:
+            await self.conn.send(msg.reply(None, subject=self.LOGIN_INVALID))
+            return
+        await self.conn.send(msg.reply(self.pnlEngine.realised(agent)))
+
+
+    # LOGINS
+
+    def tokenFor(self, player, pswd):
+        # answers the player's token, or None if the password is wrong
+        if self.pswdByPlayer.get(player, Missing) != pswd: return None
+        if (token := self.tokenByPlayer.get(player, Missing)) is Missing:
+            token = self.tokenByPlayer[player] = next(self.tokenSeed)
+            self.playerByToken[token] = player
+        return token
+
+
+    # TRADES
+
+    def recordTradeReport(self, report:TradeReport, addr=None, player=None):
+        # answers the report's status - everything is validated before any state changes so a bad report in a batch
+        # can't leave a trade half cleared, and a rejected report doesn't tie its reporter to addr
+        if player is not None and report.reporter != player: return INVALID
+        if report.reporter != report.buyer and report.reporter != report.seller: return INVALID
+        if self.riskManager is not None and not self.riskManager.hasAsset(report.asset): return UNKNOWN_ASSET
+        if addr is not None and self.addrByReporter.get(report.reporter, addr) != addr: return INVALID
+        key = (report.venue, report.venueTradeId)
+        if (cleared := self.clearedByTradeKey.get(key)) is not None:
+            return DUPLICATE if _sameTrade(cleared, report) else MISMATCH
+        if (first := self.pendingByTradeKey.get(key)) is None:
+            self.pendingByTradeKey[key] = report
+            if addr is not None: self.addrByReporter[report.reporter] = addr
+            return PENDING
+        if first.reporter == report.reporter:
+            return DUPLICATE if first == report else MISMATCH
+        if not _sameTrade(first, report):
+            return MISMATCH
+        del self.pendingByTradeKey[key]
+        if addr is not None: self.addrByReporter[report.reporter] = addr
+        trade = self.clearedByTradeKey[key] = ClearedTrade(next(self.clearIdSeed), *key, *report[3:])
+        self.tradeCleared(trade)
+        return CLEARED
+
+    def tradeCleared(self, trade:ClearedTrade):
+        self.pnlEngine.onFill(trade.buyer, trade.asset, trade.size, trade.price)
+        self.pnlEngine.onFill(trade.seller, trade.asset, -trade.size, trade.price)
+        if self.bookKeeper is not None:
+            self.bookKeeper.recordTrade(trade.buyer, trade.seller, trade.asset, trade.size, trade.price, ref=trade.clearId)
+        if self.riskManager is not None:
+            self.riskManager.onTrade(trade.buyer, trade.asset, trade.size)
+            self.riskManager.onTrade(trade.seller, trade.asset, -trade.size)
+            self.riskVersionByAgent[trade.buyer] = self.riskVersionByAgent.get(trade.buyer, 0) + 1
+            self.riskVersionByAgent[trade.seller] = self.riskVersionByAgent.get(trade.seller, 0) + 1
+
+
+    # RISK
+
+    def riskSnapshotOf(self, agent) -> RiskSnapshot:
+        version = self.riskVersionByAgent.get(agent, 0)
+        if (snapshot := self.riskSnapshotByAgent.get(agent)) is None or snapshot.version != version:
+            risk = self.riskManager.riskOf(agent)
+            snapshot = self.riskSnapshotByAgent[agent] = RiskSnapshot(
+                version, risk.totalDv01, risk.keyRateDv01, self.riskManager.positionsOf(agent)
+            )
+        return snapshot
+
+    def revalueRisk(self, maturities=None, dv01PerUnit=None):
+        # new marks change everyone's risk so every version moves on
+        self.riskManager.revalue(maturities, dv01PerUnit)
+        for agent in self.riskManager.agents:
+            self.riskVersionByAgent[agent] = self.riskVersionByAgent.get(agent, 0) + 1
+
+
+def _sameTrade(a, b):
+    return (a.buyer, a.seller, a.asset, a.size, a.price) == (b.buyer, b.seller, b.asset, b.size, b.price)
 
 
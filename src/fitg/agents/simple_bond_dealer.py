@@ -7,63 +7,208 @@
 # License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
 # **********************************************************************************************************************
 
+# Quotes indicative prices for its bonds on its BondVenues. Each cycle the dealer moves its curve, prices the universe
+# off it in one go and requotes with a QuoteEngine, skewing away from its inventory, then sends SUBMIT_INDIC with just
+# the indications that moved by more than a tick (and any due a refresh so QUOTE_OBLIGATION_INTERVAL_MS is always met).
+# Indications go as SUBMIT_INDIC_PACKED using the asset id table each venue answers on registration, and only count as
+# sent to a venue once it acknowledges them. RFQs are answered at the current bid / ask. Each trade done is reported
+# to the GameMaster (the taker reports the other side), reports it doesn't answer are sent again the next cycle.
+#
+# OPEN: the curve is a random walk - take it from the venues' composites instead
+
+
 # Python imports
+import asyncio, datetime, logging, random
+import numpy as np
 
 # vlmessaging imports
 from vlmessaging import VLM, Msg, Entry
-from vlmessaging.utils import co, Missing, wip, logging
+from vlmessaging.utils import co, Missing, wip
+from vlmessaging._utils.utils import monotonicTimeMs
 
 # local imports
-from fitg.agents._game_agent_base import GameAgent
+from fitg.agents._directory_cache import DIRECTORY_TIMEOUT_MS
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg.agents.bond_venue import BondVenue, QUOTE_OBLIGATION_INTERVAL_MS, packIndications
+from fitg.agents.game_master import TradeReport, PENDING, CLEARED, DUPLICATE
+from fitg.core import calcs
+from fitg.core.quote_engine import QuoteEngine
+from fitg.utils.exceptions import FitgError
 
 _log = logging.getLogger(__name__)
 
 
+QUOTE_CYCLE_MS = 1_000
+CONNECT_TIMEOUT_MS = 1_000              # per REGISTER_PROVIDER, the venues are registered with concurrently
+SUBMIT_TIMEOUT_MS = 1_000
+# a quote's refresh is only noticed at the start of a cycle, which can be a whole cycle late - the QUOTE_CYCLE_MS gap
+# plus the longest the previous cycle can take (a directory lookup, registering with venues and a submit) - and then
+# needs a submit to land, so quotes are refreshed that long before the venue's obligation runs out
+QUOTE_REFRESH_MS = QUOTE_OBLIGATION_INTERVAL_MS - (
+    QUOTE_CYCLE_MS + DIRECTORY_TIMEOUT_MS + CONNECT_TIMEOUT_MS + SUBMIT_TIMEOUT_MS
+) - SUBMIT_TIMEOUT_MS
+TICK = 0.005                            # price tick, quotes are only resent if they move more than this
+BASE_SPREAD = 0.05
+SKEW_PER_UNIT = 0.002                   # price skew per unit of inventory
+WIDEN_PER_UNIT = 0.001                  # extra spread per unit of inventory
+CURVE_LEVEL = 2.0                       # starting curve - CURVE_LEVEL + CURVE_SLOPE * years to maturity
+CURVE_SLOPE = 0.05
+CURVE_MOVE_BP = 0.05                    # stdev of the curve's parallel move per cycle
+
+
+def startingYtms(bonds, settleDt) -> np.ndarray:
+    """Answers the yields of the starting curve the dealers quote around, e.g. for the GameMaster's risk marks."""
+    yearsToMat = np.array([(b.maturityDt - settleDt).days / 365.25 for b in bonds])
+    return CURVE_LEVEL + CURVE_SLOPE * np.maximum(yearsToMat, 0.0)
+
+
 class SimpleBondDealer(GameAgent):
     ENTRY_TYPE = 'SimpleBondDealer'
 
-    __slots__ = ('addrByMarketMakerName', 'addrByBondVenue', 'addrByFutExchange')
-
-    def __init__(self, router, *, bondVenues, futExchanges, **kwargs):
+    __slots__ = (
+        'addrByBondVenue', 'futExchanges',
+        'venueIdsByBondVenue',          # [nAssets] each asset's id in the venue's asset id table, -1 if not traded there
+        'bonds', 'settleDt',
+        'baseYtms',                     # [nAssets] the starting curve at each bond's maturity
+        'curveShift',                   # parallel move of the curve since the start, in %
+        'inventory',                    # [nAssets] +ve long
+        'quotes', 'rng',
+        'unreportedTrades',             # TradeReports the GameMaster hasn't answered yet
+    )
+
+    def __init__(self, router, *, bondVenues, futExchanges, assets=(), settleDt=None, seed=None, **kwargs):
         super().__init__(router, **kwargs)
+        self.addrByBondVenue = dict.fromkeys(bondVenues, Missing)
+        self.venueIdsByBondVenue = {}
+        self.futExchanges = futExchanges
+        self.bonds = list(assets)
+        self.settleDt = settleDt or datetime.date.today()
+        self.baseYtms = startingYtms(self.bonds, self.settleDt)
+        self.curveShift = 0.0
+        self.inventory = np.zeros(len(self.bonds))
+        self.quotes = QuoteEngine(
+            [b.alias for b in self.bonds], BASE_SPREAD, TICK, QUOTE_REFRESH_MS,
+            SKEW_PER_UNIT, WIDEN_PER_UNIT
+        )
+        self.rng = random.Random(seed)
+        self.unreportedTrades = []
 
     async def start(self, vnets=[]):
-        # find the Tweb BondVenue via the directory
-        # register as a dealer
-        # find the Eurex Exchange via the directory
-        # subscribe to bond futures quotes and trade feeds
-        # find BookKeeper and register with it
-        # every few minutes check risk and trade hedges as necessary
+        # OPEN: find the Eurex Exchange, subscribe to bond futures quotes and hedge risk every few minutes
         await self.loginToGameMaster()
         await self.registerSelfWithDirectory(vnets, self.name)
         self.running = True
-        f'SimpleBondDealer {self.name} started' >> _log.info
+        await self.ensureConnectedAndSendQuotes()
+        _log.info(f'SimpleBondDealer {self.name} started')
         return self
 
     async def stop(self):
-        await super().stop()
-        self._conn.unscheduleFn(self.ensureConnectedAndSendQuotes)
         self.running = False
+        self.conn._router.unscheduleFn(self.ensureConnectedAndSendQuotes)
+        addrs = [a for a in self.addrByBondVenue.values() if a is not Missing]
+        await self.broadcast(addrs, BondVenue.UNREGISTER_PROVIDER, self.name, timeout=500)
+        await super().stop()
 
-    async def msgArrived(self, msg):
 
-        await super().msgArrived(msg)
+    # MESSAGE HANDLERS
 
-        if msg.subject == 'ADD_ONE_TO_CURRENT':
-            current = Missing
-            while not current:
-                current = await self.conn.send(Msg(self.conn.addr, 'GET_CURRENT', Missing), 200)
-            await self.conn.send(msg.reply(current.contents + 1))
+    @handles(BondVenue.RFQ_QUOTE_FOR)
+    async def _onRfqQuoteFor(self, msg):
+        # firm up the current indication - contents (venueId, asset, size), no reply if we're not quoting the asset
+        venueId, asset, size = msg.contents
+        if (price := self.quotes.quoteFor(asset, size)) is not None:
+            await self.conn.send(msg.reply((venueId, price)))
 
-        elif msg.subject == 'GET_CURRENT':
-            await co.until(self.wait / 1000)
-            self.wait -= 100
-            await self.conn.send(msg.reply(41))
+    @handles(BondVenue.RFQ_ACCEPTED)
+    async def _onRfqAccepted(self, msg):
+        # contents (venueId, asset, size, price, taker) - size is the taker's so we've done the other side
+        venueId, asset, size, price, taker = msg.contents
+        self.inventory[self.quotes.indexOf(asset)] -= size
+        venueName = next((n for n, addr in self.addrByBondVenue.items() if addr == msg.replyAddr), None)
+        buyer, seller = (taker, self.name) if size > 0 else (self.name, taker)
+        self.unreportedTrades.append(TradeReport(venueName, venueId, self.name, buyer, seller, asset, abs(size), price))
+        await self.reportTrades()
 
-        else:
-            return [VLM.IGNORE_UNHANDLED_REPLIES, VLM.HANDLE_DOES_NOT_UNDERSTAND]
+    @handles(BondVenue.RFQ_NEAR_MISS, BondVenue.RFQ_NO_TRADE, BondVenue.PROVIDER_JOINED, BondVenue.PROVIDER_LEFT)
+    async def _onIgnored(self, msg):
+        pass
 
+    @handles('ADD_ONE_TO_CURRENT')
+    async def _onAddOneToCurrent(self, msg):
+        current = Missing
+        while not current:
+            current = await self.conn.send(Msg(self.conn.addr, 'GET_CURRENT', Missing), 200)
+        await self.conn.send(msg.reply(current.contents + 1))
 
-    async def ensureConnectedAndSendQuotes(self):
-        self._conn.scheduleFn(self.ensureConnectedAndSendQuotes, after=3000)
+    @handles('GET_CURRENT')
+    async def _onGetCurrent(self, msg):
+        await co.until(self.wait / 1000)
+        self.wait -= 100
+        await self.conn.send(msg.reply(41))
 
+
+    # QUOTING
+
+    async def ensureConnectedAndSendQuotes(self):
+        if not self.running: return
+        if any(a is Missing for a in self.addrByBondVenue.values()):
+            await self.connectToVenues()
+        self.curveShift += self.rng.gauss(0.0, CURVE_MOVE_BP) / 100.0
+        self.quotes.requote(calcs.y2p(self.bonds, self.baseYtms + self.curveShift, self.settleDt), self.inventory)
+        if self.venueIdsByBondVenue:
+            await asyncio.gather(*[self.submitIndications(name) for name in self.venueIdsByBondVenue])
+        self.conn.scheduleFn(self.ensureConnectedAndSendQuotes, after=QUOTE_CYCLE_MS)
+        if self.unreportedTrades: await self.reportTrades()           # after scheduling so it can't delay quoting
+
+    async def submitIndications(self, venueName):
+        sentAtMs = monotonicTimeMs()
+        idxs = self.quotes.dueIdxs(venueName, sentAtMs)
+        ids = self.venueIdsByBondVenue[venueName][idxs]
+        idxs, ids = idxs[ids >= 0], ids[ids >= 0]
+        if not len(ids): return
+        bids, asks = self.quotes.bid[idxs], self.quotes.ask[idxs]
+        msg = Msg(self.addrByBondVenue[venueName], BondVenue.SUBMIT_INDIC_PACKED, packIndications(ids, bids, asks))
+        if (reply := await self.conn.send(msg, SUBMIT_TIMEOUT_MS)) is Missing or reply.contents is not True:
+            _log.warning(f'{self.name} failed to submit indications to {venueName}')       # still due next cycle
+            return
+        self.quotes.noteSent(venueName, idxs, bids, asks, sentAtMs)
+
+
+
+    # TRADES
+
+    async def reportTrades(self):
+        reports, self.unreportedTrades = self.unreportedTrades, []
+        try:
+            statuses = await self.recordTrades(reports)
+        except FitgError as ex:
+            _log.error(f'{ex} so dropping {len(reports)} trade reports')
+            return
+        if statuses is Missing:
+            _log.warning(f'{self.name} failed to report {len(reports)} trades')
+            self.unreportedTrades = reports + self.unreportedTrades
+            return
+        for report, status in zip(reports, statuses):
+            if status not in (PENDING, CLEARED, DUPLICATE):
+                _log.warning(f'{self.name} trade {report.venueTradeId} on {report.venue} was {status}')
+
+
+    # VENUES
+
+    async def connectToVenues(self):
+        entries = [
+            e for e in await self.directory.entriesOfType(BondVenue.ENTRY_TYPE)
+            if self.addrByBondVenue.get(e.params, None) is Missing
+        ]
+        replies = await asyncio.gather(
+            *[self.conn.send(Msg(e.addr, BondVenue.REGISTER_PROVIDER, self.name), CONNECT_TIMEOUT_MS) for e in entries]
+        )
+        for entry, reply in zip(entries, replies):
+            name = entry.params
+            if reply is Missing:
+                _log.warning(f'{self.name} failed to register with {name}')
+                continue
+            venueIdByAsset = {asset: i for i, asset in enumerate(reply.contents)}
+            self.venueIdsByBondVenue[name] = np.array([venueIdByAsset.get(a, -1) for a in self.quotes.assetNames])
+            self.addrByBondVenue[name] = entry.addr
+            self.quotes.resendAll(name)             # the venue needs every indication
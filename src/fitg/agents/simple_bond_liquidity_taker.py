@@ -8,15 +8,15 @@
 # **********************************************************************************************************************
 
 # Python imports
+import logging
 
 # vlmessaging imports
 from vlmessaging import VLM, Msg, Entry
-from vlmessaging.utils import co, Missing, wip, logging
-from vlmessaging._utils import directory
+from vlmessaging.utils import co, Missing, wip
 
 # local imports
-from fitg.agents._game_agent_base import GameAgent
-from fitg.agents.bond_venue import BondVenue
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg.agents.bond_venue import BondVenue, CompositeSubscription
 
 
 _log = logging.getLogger(__name__)
@@ -25,7 +25,7 @@ _log = logging.getLogger(__name__)
 class SimpleBondLiquidityTaker(GameAgent):
     ENTRY_TYPE = 'SimpleLiquidityTaker'
 
-    __slots__ = ('addrByMarketMakerName', 'bondVenuesByName', 'futExchanges')
+    __slots__ = ('addrByMarketMakerName', 'bondVenuesByName', 'futExchanges', 'subscriptionByVenueAddr')
 
     def __init__(self, router, *, bondVenues, futExchanges, **kwargs):
         super().__init__(router, **kwargs)
@@ -33,6 +33,7 @@ class SimpleBondLiquidityTaker(GameAgent):
         for name in bondVenues:
             self.bondVenuesByName[name] = Missing
         self.futExchanges = futExchanges
+        self.subscriptionByVenueAddr = {}
 
     async def start(self, vnets=[]):
         await self.loginToGameMaster()
@@ -45,27 +46,24 @@ class SimpleBondLiquidityTaker(GameAgent):
         await super().stop()
         self.running = False
 
-    async def msgArrived(self, msg):
-        if msg.subject == BondVenue.NEW_TRADES:
-            print(f'got new trades: {msg.contents}')
-            return
 
-        return [VLM.HANDLE_DOES_NOT_UNDERSTAND]
+    # MESSAGE HANDLERS
+
+    @handles(BondVenue.COMPOSITE_DELTA)
+    async def _onCompositeDelta(self, msg):
+        if (subscription := self.subscriptionByVenueAddr.get(msg.replyAddr)) is not None:
+            await subscription.onDelta(*msg.contents)
+
 
     async def maybeInitiateRfq(self):
-        print('maybeInitiateRfq')
+        _log.debug(f'{self.name} maybeInitiateRfq')
 
-        # try to find missing venues
+        # try to find missing venues - a venue only counts as found once we're subscribed so a failure is retried
         missingVenues = [name for name, addr in self.bondVenuesByName.items() if addr is Missing]
         if missingVenues:
-            entries:list[Entry] = directory._findEntriesOfTypeOrExit(
-                self.conn,
-                BondVenue.ENTRY_TYPE,
-                timeout=200,
-                errMsg=Missing
-            )
+            entries:list[Entry] = await self.directory.entriesOfType(BondVenue.ENTRY_TYPE, timeout=200)
             for entry in entries:
-                if (name:=entry.params['name']) in missingVenues:
+                if (name:=entry.params) in missingVenues and await self.subscribeToComposites(entry.addr):
                     _log.info(f'found venue {name} at {entry.addr}')
                     self.bondVenuesByName[name] = entry.addr
                     # register as liquidity taker
@@ -81,4 +79,10 @@ class SimpleBondLiquidityTaker(GameAgent):
 
         self.conn.scheduleFn(self.maybeInitiateRfq, after=500)
 
+    async def subscribeToComposites(self, venueAddr):
+        # answers True if we're now in sync with the venue's composites
+        if (subscription := self.subscriptionByVenueAddr.get(venueAddr)) is None:
+            subscription = self.subscriptionByVenueAddr[venueAddr] = CompositeSubscription(self, venueAddr)
+        return await subscription.subscribe()
+
 
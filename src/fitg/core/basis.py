@@ -0,0 +1,127 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Bond futures basis analytics
+#
+# TERMS: gross basis - P - F * CF
+#        carry - coupon income (accrual to delivery plus coupons paid) less financing the dirty price at repo
+#        net basis - gross basis - carry
+#        implied repo - the financing rate at which buying the bond and delivering it into the future breaks even
+#        CTD - the cheapest to deliver, i.e. the basket bond with the highest implied repo
+#
+# Every (contract, basket bond) pair is a column and scenarios are rows so all contracts, and all scenarios, are done
+# in one numpy pass. Rates are percentages and financing is ACT/360.
+
+
+# standard Python imports
+import collections
+import numpy as np
+
+# fitg imports
+from fitg.core import calcs
+from fitg.core.structs import BondFut
+
+
+BasisResult = collections.namedtuple('BasisResult', (
+    'grossBasis',       # [..., nPairs]
+    'carry',            # [..., nPairs]
+    'netBasis',         # [..., nPairs]
+    'impliedRepo',      # [..., nPairs]
+    'ctd',              # [..., nContracts] index into bonds, -1 for an empty basket
+))
+
+
+def conversionFactor(bond, bondFut:BondFut, notionalCpn) -> float:
+    """Answers the conversion factor of bond for delivery into bondFut, i.e. its clean price per 1 at a yield of the
+    notional coupon on the delivery date."""
+    return calcs.y2p(bond, notionalCpn, bondFut.lastDlvDt) / 100.0
+
+
+class BasisGrid:
+    """Holds the price independent terms of every (contract, basket bond) pair for a settle date."""
+
+    __slots__ = [
+        'bondFuts', 'bonds', 'settleDt',
+        'contractIdx', 'bondIdx',       # [nPairs] - which contract and bond each pair is
+        'cf', 'ai0', 'aiDlv', 'cpnsPaid', 'days',
+        '_pairIdx',                     # [nContracts, maxBasket] pairs of each contract, -1 padded
+    ]
+
+    def __init__(self, bondFuts, baskets:calcs.BasketEngine, settleDt, asOf=None):
+        self.bondFuts = list(bondFuts)
+        self.settleDt = settleDt
+        self.bonds = []
+        bondIdxByIsin = {}
+        contractIdx, bondIdx, cf, ai0, aiDlv, cpnsPaid, days = [], [], [], [], [], [], []
+        pairsByContract = []
+        settle = np.datetime64(settleDt, 'D')
+        for ci, bf in enumerate(self.bondFuts):
+            pairs = []
+            rule = baskets.ruleFor(bf, asOf or bf.lastDlvDt)
+            dlv = np.datetime64(bf.lastDlvDt, 'D')
+            for b in baskets.basketFor(bf, asOf):
+                if (bi := bondIdxByIsin.get(b.isin)) is None:
+                    bi = bondIdxByIsin[b.isin] = len(self.bonds)
+                    self.bonds.append(b)
+                pairs.append(len(contractIdx))
+                contractIdx.append(ci)
+                bondIdx.append(bi)
+                cf.append(conversionFactor(b, bf, rule.cpn))
+                ai0.append(calcs.accrued(b, settleDt))
+                aiDlv.append(calcs.accrued(b, bf.lastDlvDt))
+                sched = calcs.bondSchedule(b, settleDt)
+                cpnsPaid.append(sched['cf'][sched['dt'] <= dlv].sum())
+                days.append((dlv - settle).astype(np.int64))
+            pairsByContract.append(pairs)
+        self.contractIdx = np.array(contractIdx, dtype=np.int64)
+        self.bondIdx = np.array(bondIdx, dtype=np.int64)
+        self.cf = np.array(cf, dtype=np.float64)
+        self.ai0 = np.array(ai0, dtype=np.float64)
+        self.aiDlv = np.array(aiDlv, dtype=np.float64)
+        self.cpnsPaid = np.array(cpnsPaid, dtype=np.float64)
+        self.days = np.array(days, dtype=np.float64)
+        self._pairIdx = np.full((len(self.bondFuts), max(map(len, pairsByContract), default=0)), -1, dtype=np.int64)
+        for ci, pairs in enumerate(pairsByContract):
+            self._pairIdx[ci, :len(pairs)] = pairs
+
+    def analyse(self, bondPrices, futPrices, repo) -> BasisResult:
+        """bondPrices - clean prices aligned with self.bonds, either [nBonds] or a matrix of scenarios [nScenarios,
+        nBonds], futPrices - aligned with self.bondFuts, [nContracts] or [nScenarios, nContracts], repo - percentage
+        (scalar or per scenario)."""
+        P = np.asarray(bondPrices, dtype=np.float64)[..., self.bondIdx]
+        F = np.asarray(futPrices, dtype=np.float64)[..., self.contractIdx]
+        r = np.asarray(repo, dtype=np.float64)
+        if r.ndim: r = r[:, None]
+        r = r / 100.0
+        t = self.days / 360.0
+        dirty = P + self.ai0
+        invoice = F * self.cf + self.aiDlv
+        gross = P - F * self.cf
+        carry = (self.aiDlv - self.ai0 + self.cpnsPaid) - dirty * r * t
+        with np.errstate(divide='ignore', invalid='ignore'):
+            impliedRepo = (invoice + self.cpnsPaid - dirty) / (dirty * t) * 100.0
+        return BasisResult(gross, carry, gross - carry, impliedRepo, self._ctd(impliedRepo))
+
+    def ctdProbabilities(self, bondPriceScenarios, futPrices, repo) -> np.ndarray:
+        """Answers [nContracts, nBonds] - the fraction of the scenarios in which each bond is the CTD of each contract
+        (0 for bonds not in the contract's basket)."""
+        ctd = self.analyse(bondPriceScenarios, futPrices, repo).ctd.reshape(-1, len(self.bondFuts))
+        answer = np.zeros((len(self.bondFuts), len(self.bonds)))
+        for ci in range(len(self.bondFuts)):
+            col = ctd[:, ci]
+            col = col[col >= 0]
+            if len(col): answer[ci] = np.bincount(col, minlength=len(self.bonds)) / len(ctd)
+        return answer
+
+    def _ctd(self, impliedRepo):
+        if not self._pairIdx.size: return np.full(impliedRepo.shape[:-1] + (len(self.bondFuts),), -1)
+        padded = np.where(self._pairIdx >= 0, impliedRepo[..., self._pairIdx], -np.inf)
+        best = np.argmax(padded, axis=-1)
+        pair = np.take_along_axis(np.broadcast_to(self._pairIdx, padded.shape), best[..., None], axis=-1)[..., 0]
+        return np.where(pair >= 0, self.bondIdx[pair], -1)
@@ -1,6 +1,11 @@
-
-
-
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
 
 # keeps track of money market account, interest payments, who has traded with who, settlements, margin calls,
 # monitors risk and liquidity and adjusts interest rates accordingly, can force partial / full liquidations if necessary
@@ -8,5 +13,244 @@
 # tracks collateral and haircuts, can liquidate collateral if necessary, tracks margin requirements and can
 # issue margin calls, tracks cash flows and can generate cash flow statements, tracks balance sheets
 # basically the entity that runs the entire game
+#
+# The BookKeeper is event sourced - every trade and cash movement is appended to a Ledger, a file of fixed size
+# binary records that is memory mapped for reading, and the positions and cash are just a fold over those events. A
+# snapshot of that state is taken every snapshotEvery events so a restart loads the latest snapshot and replays only
+# the tail of the ledger. Agent and asset names are interned to ids in separate append only names files so positions
+# are an [agents, assets] array.
+
+
+# standard Python imports
+import glob, os
+import numpy as np
+
+# fitg imports
+from fitg.utils.exceptions import FitgError
+
+
+# event kinds
+TRADE = 1           # agent buys size of asset from cpty at price (% of par)
+CASH = 2            # amount paid to agent (-ve for paid by agent)
+COUPON = 3
+INTEREST = 4
+MARGIN = 5
+
+EVENT_DTYPE = np.dtype([
+    ('seq', np.int64),
+    ('kind', np.int8),
+    ('tsMs', np.int64),
+    ('agent', np.int32),
+    ('cpty', np.int32),         # -1 for cash events
+    ('asset', np.int32),        # -1 for cash events
+    ('size', np.float64),
+    ('price', np.float64),
+    ('amount', np.float64),     # cash to agent, for a trade -size * price / 100
+    ('ref', np.int64),          # e.g. the venue's trade id
+])
+
+
+class Ledger:
+    """Append only log of EVENT_DTYPE records."""
+
+    __slots__ = ['ffn', '_f', '_n', '_view']
+
+    def __init__(self, ffn):
+        self.ffn = ffn
+        self._f = open(ffn, 'ab')
+        size = self._f.tell()
+        if size % EVENT_DTYPE.itemsize:
+            # a torn write at the end - drop the partial record
+            self._f.truncate(size - size % EVENT_DTYPE.itemsize)
+            self._f.seek(0, os.SEEK_END)
+        self._n = self._f.tell() // EVENT_DTYPE.itemsize
+        self._view = None
+
+    def __len__(self):
+        return self._n
+
+    def append(self, events:np.ndarray):
+        self._f.write(events.tobytes())
+        self._f.flush()
+        self._n += len(events)
+
+    def events(self, start=0) -> np.ndarray:
+        """Answers a read only memory mapped view of the events from start."""
+        if self._view is None or len(self._view) < self._n:
+            self._view = np.memmap(self.ffn, dtype=EVENT_DTYPE, mode='r', shape=(self._n,)) if self._n else np.empty(0, EVENT_DTYPE)
+        return self._view[start:self._n]
+
+    def close(self):
+        self._f.close()
+        self._view = None
+
+
+class BookKeeper:
+
+    __slots__ = [
+        'folder', 'snapshotEvery', 'ledger',
+        'agents', '_agentIdByName', '_agentsFile',
+        'assets', '_assetIdByName', '_assetsFile',
+        '_cash',                        # [agent capacity] by agent id
+        '_positions',                   # [agent capacity, asset capacity] by agent id, asset id
+        '_sinceSnapshot',
+    ]
+
+    def __init__(self, folder, snapshotEvery=100_000):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.snapshotEvery = snapshotEvery
+        self.agents, self._agentIdByName, self._agentsFile = _openNames(os.path.join(folder, 'agents.txt'))
+        self.assets, self._assetIdByName, self._assetsFile = _openNames(os.path.join(folder, 'assets.txt'))
+        self.ledger = Ledger(os.path.join(folder, 'ledger.bin'))
+        self._cash = np.zeros(0)
+        self._positions = np.zeros((0, 0))
+        self._ensureCapacity(len(self.agents), len(self.assets))
+        self._recover()
+
+
+    # RECORDING
+
+    def recordTrade(self, buyer, seller, asset, size, price, ref=0, tsMs=0) -> int:
+        """Records buyer buying size of asset from seller, answering the event's seq."""
+        ev = self._newEvent(TRADE, buyer, tsMs, ref)
+        ev['cpty'] = self._agentId(seller)
+        ev['asset'] = self._assetId(asset)
+        ev['size'] = size
+        ev['price'] = price
+        ev['amount'] = -size * price / 100.0
+        return self._commit(ev)
+
+    def recordCash(self, agent, amount, kind=CASH, ref=0, tsMs=0) -> int:
+        if kind == TRADE: raise FitgError('Use recordTrade for trades')
+        ev = self._newEvent(kind, agent, tsMs, ref)
+        ev['amount'] = amount
+        return self._commit(ev)
+
+
+    # QUERIES
+
+    def cashOf(self, agent) -> float:
+        return float(self._cash[i]) if (i := self._agentIdByName.get(agent)) is not None else 0.0
+
+    def positionOf(self, agent, asset) -> float:
+        if (a := self._agentIdByName.get(agent)) is None or (i := self._assetIdByName.get(asset)) is None: return 0.0
+        return float(self._positions[a, i])
+
+    def positionsOf(self, agent) -> dict:
+        if (a := self._agentIdByName.get(agent)) is None: return {}
+        row = self._positions[a, :len(self.assets)]
+        return {self.assets[i]: float(row[i]) for i in np.flatnonzero(row)}
+
+
+    # SNAPSHOTS
+
+    def snapshot(self):
+        nAgents, nAssets = len(self.agents), len(self.assets)
+        seq = len(self.ledger)
+        tmp = os.path.join(self.folder, 'snapshot.tmp.npz')
+        np.savez(
+            tmp, seq=seq, nAgents=nAgents, nAssets=nAssets, cash=self._cash[:nAgents],
+            positions=self._positions[:nAgents, :nAssets]
+        )
+        os.replace(tmp, os.path.join(self.folder, f'snapshot_{seq:012d}.npz'))
+        for old in sorted(glob.glob(os.path.join(self.folder, 'snapshot_*.npz')))[:-2]:
+            os.remove(old)                      # keep the previous one in case the latest is unreadable
+        self._sinceSnapshot = 0
+
+    def close(self):
+        self.ledger.close()
+        self._agentsFile.close()
+        self._assetsFile.close()
+
+
+    # HELPERS
+
+    def _recover(self):
+        start = 0
+        for ffn in reversed(sorted(glob.glob(os.path.join(self.folder, 'snapshot_*.npz')))):
+            try:
+                with np.load(ffn) as snap:
+                    nAgents, nAssets = int(snap['nAgents']), int(snap['nAssets'])
+                    self._cash[:nAgents] = snap['cash']
+                    self._positions[:nAgents, :nAssets] = snap['positions']
+                    start = int(snap['seq'])
+                break
+            except (OSError, ValueError, KeyError):
+                continue
+        tail = self.ledger.events(start)
+        self._applyBatch(tail)
+        self._sinceSnapshot = len(tail)
+
+    def _applyBatch(self, evs):
+        # vectorised replay - np.add.at accumulates repeated indices
+        np.add.at(self._cash, evs['agent'], evs['amount'])
+        trades = evs[evs['kind'] == TRADE]
+        np.add.at(self._cash, trades['cpty'], -trades['amount'])
+        np.add.at(self._positions, (trades['agent'], trades['asset']), trades['size'])
+        np.add.at(self._positions, (trades['cpty'], trades['asset']), -trades['size'])
+
+    def _newEvent(self, kind, agent, tsMs, ref):
+        ev = np.zeros(1, dtype=EVENT_DTYPE)
+        ev['seq'] = len(self.ledger)
+        ev['kind'] = kind
+        ev['tsMs'] = tsMs
+        ev['agent'] = self._agentId(agent)
+        ev['cpty'] = -1
+        ev['asset'] = -1
+        ev['ref'] = ref
+        return ev
+
+    def _commit(self, ev):
+        self.ledger.append(ev)
+        e = ev[0]
+        self._cash[e['agent']] += e['amount']
+        if e['kind'] == TRADE:
+            self._cash[e['cpty']] -= e['amount']
+            self._positions[e['agent'], e['asset']] += e['size']
+            self._positions[e['cpty'], e['asset']] -= e['size']
+        self._sinceSnapshot += 1
+        if self._sinceSnapshot >= self.snapshotEvery: self.snapshot()
+        return int(e['seq'])
+
+    def _agentId(self, name):
+        if (i := self._agentIdByName.get(name)) is None:
+            i = _intern(name, self.agents, self._agentIdByName, self._agentsFile)
+            self._ensureCapacity(len(self.agents), len(self.assets))
+        return i
+
+    def _assetId(self, name):
+        if (i := self._assetIdByName.get(name)) is None:
+            i = _intern(name, self.assets, self._assetIdByName, self._assetsFile)
+            self._ensureCapacity(len(self.agents), len(self.assets))
+        return i
+
+    def _ensureCapacity(self, nAgents, nAssets):
+        agentCap, assetCap = self._positions.shape
+        if nAgents <= agentCap and nAssets <= assetCap: return
+        agentCap, assetCap = _grown(agentCap, nAgents), _grown(assetCap, nAssets)
+        cash = np.zeros(agentCap)
+        cash[:len(self._cash)] = self._cash
+        positions = np.zeros((agentCap, assetCap))
+        positions[:self._positions.shape[0], :self._positions.shape[1]] = self._positions
+        self._cash, self._positions = cash, positions
+
+
+def _openNames(ffn):
+    names = []
+    if os.path.exists(ffn):
+        with open(ffn, encoding='utf-8') as f:
+            names = [line.rstrip('\n') for line in f]
+    return names, {n: i for i, n in enumerate(names)}, open(ffn, 'a', encoding='utf-8')
 
+def _intern(name, names, idByName, f):
+    i = idByName[name] = len(names)
+    names.append(name)
+    f.write(name + '\n')
+    f.flush()                                   # before any event refers to it
+    return i
 
+def _grown(cap, n):
+    cap = max(8, cap)
+    while cap < n: cap *= 2
+    return cap
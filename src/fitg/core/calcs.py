@@ -8,14 +8,12 @@
 # **********************************************************************************************************************
 
 # standard Python imports
+import calendar, collections, datetime
 import numpy as np
 
 # 3rd party imports
 from pyxirr import year_fraction as dcf, DayCount as dct
 
-# vlmessage imports
-from vlmessaging._utils.errors import NotYetImplemented
-
 # fitg imports
 from fitg.core.structs import BondFut, BulletBond
 
@@ -23,44 +21,278 @@ from fitg.core.structs import BondFut, BulletBond
 
 
 
+# BOND MATHS
+# yields are percentages, e.g. 3.25 for 3.25%, and prices are clean as a percentage of par, e.g. 101.25
+# periods are measured ACT/ACT ICMA (the Bund and Treasury convention) and yields compound at the coupon frequency
+
+SCHEDULE_DTYPE = np.dtype([
+    ('dt', 'datetime64[D]'),    # payment date
+    ('cf', np.float64),         # cash flow per 100 face (the last includes the redemption)
+    ('t', np.float64),          # time from settlement to the payment in coupon periods
+])
+
+_MAX_ITERS = 50
+_TOL = 1e-12
+_PRICE_TOL = 1e-8                       # a solved yield must reprice the bond to within this (per 100 face)
+_Y_LO, _Y_HI = -0.5, 1.0                # bracket the yields are solved in, decimal
+
+_Flows = collections.namedtuple('_Flows', ('dts', 'cfs', 'ts', 'accrued'))
+_NO_TS = np.empty(0)
+
+_Schedule = collections.namedtuple('_Schedule', (
+    'dts',          # payment dates, datetime64[D]
+    'accStarts',    # date each period starts accruing (the dated date for the first period), datetime64[D]
+    'periodDays',   # days in each (notional) coupon period, int64
+    'cfs',          # cash flows per 100 face, float64
+    'ks',           # 0, 1, 2, ... n-1 as float64 so remaining period offsets are a slice not an arange
+    'c',            # regular coupon per period
+))
+
+
 def bondSchedule(bond:BulletBond, settleDt) -> np.ndarray:
-    raise NotYetImplemented()
-
-def y2p(bond, ytm, settleDt) -> float:
-    raise NotYetImplemented()
-
-def p2y(bond, price, settleDt) -> float:
-    raise NotYetImplemented()
-    # #
-    # #     bond: BulletBond
-    # #     y: yield as a percentage, e.g. 3.25 for 3.25%
-    # #     p: price as a percentage of par, e.g. 101.25 for 101.25% of par
-    # #
-    # #     assumes settlement on coupon date
-    # #
-    # #     uses simple annual compounding
-    # #
-    # #     ignores tax, transaction costs, liquidity, credit risk etc.
-    # #
-    # c = bond.cpn / 100
-    # f = bond.freqInMonths
-    # m = bond.maturityDt
-    # n = (m.year - 2023) * (12 // f) + (m.month - 6) // f + (1 if m.day >= 15 else 0)
-    # if n <= 0:
-    #     raise ValueError('bond has matured')
-    # if y <= 0:
-    #     return 100 * (1 + c * n) / (1 + c * n + c * (n - 1) * f / 12)
-    # return 100 * (c * n + 1) / ((1 + y / 100) ** (n * f / 12))
-
-
-def basketFor(bondFut:BondFut, bonds:list) -> list:
+    """Answers the cash flows of bond remaining after settleDt as a SCHEDULE_DTYPE array."""
+    flows = _remainingFlows(bond, _toDt64(settleDt))
+    answer = np.empty(len(flows.cfs), dtype=SCHEDULE_DTYPE)
+    answer['dt'] = flows.dts
+    answer['cf'] = flows.cfs
+    answer['t'] = flows.ts
+    return answer
+
+def accrued(bonds, settleDts):
+    """Answers the accrued interest per 100 face - a float for a single bond else an array."""
+    single, bonds, settles = _bondsAndSettles(bonds, settleDts)
+    answer = np.array([_remainingFlows(b, s).accrued for b, s in zip(bonds, settles)])
+    return float(answer[0]) if single else answer
+
+def y2p(bonds, ytms, settleDts):
+    """Answers the clean price(s) of bonds at the given yield(s) - scalars broadcast against sequences so a whole
+    universe can be priced in one call. Answers a float for a single bond else an array (NaN for matured bonds)."""
+    single, bonds, settles = _bondsAndSettles(bonds, settleDts)
+    cfs, ts, acc, f = _flowMatrix(bonds, settles)
+    y = np.broadcast_to(np.asarray(ytms, dtype=np.float64), acc.shape) / 100.0
+    pv, _ = _pvAndDeriv(cfs, ts, f, y)
+    answer = np.where(cfs.any(axis=1), pv - acc, np.nan)          # matured bonds have no price
+    return float(answer[0]) if single else answer
+
+def p2y(bonds, prices, settleDts):
+    """Answers the yield(s) of bonds at the given clean price(s) solving all bonds at once with a bracketed Newton
+    (Newton steps that leave the bracket fall back to bisection). Answers a float for a single bond else an array - NaN
+    for matured bonds and for prices with no yield in [-50%, 100%]."""
+    single, bonds, settles = _bondsAndSettles(bonds, settleDts)
+    cfs, ts, acc, f = _flowMatrix(bonds, settles)
+    target = np.broadcast_to(np.asarray(prices, dtype=np.float64), acc.shape) + acc
+    answer = _solveYields(cfs, ts, f, target) * 100.0
+    return float(answer[0]) if single else answer
+
+def dv01(bonds, ytms, settleDts):
+    """Answers the price gain per 100 face for a 1bp fall in yield (central difference) - a float for a single bond
+    else an array."""
+    ytms = np.asarray(ytms, dtype=np.float64)
+    return y2p(bonds, ytms - 0.005, settleDts) - y2p(bonds, ytms + 0.005, settleDts)
+
+
+# SCHEDULE STORE
+
+class ScheduleStore:
+    """Holds each bond's full schedule as contiguous arrays built once and answers any settle date by slicing after a
+    binary search. Bounded with least recently used eviction keyed by ISIN."""
+
+    __slots__ = ['maxSize', '_scheduleByIsin']
+
+    def __init__(self, maxSize=4096):
+        self.maxSize = maxSize
+        self._scheduleByIsin = collections.OrderedDict()
+
+    def scheduleFor(self, bond:BulletBond) -> _Schedule:
+        if (sched := self._scheduleByIsin.get(bond.isin)) is not None:
+            self._scheduleByIsin.move_to_end(bond.isin)
+            return sched
+        sched = self._scheduleByIsin[bond.isin] = _buildSchedule(bond)
+        if len(self._scheduleByIsin) > self.maxSize:
+            self._scheduleByIsin.popitem(last=False)
+        return sched
+
+    def evict(self, isin):
+        self._scheduleByIsin.pop(isin, None)
+
+    def clear(self):
+        self._scheduleByIsin.clear()
+
+    def __len__(self):
+        return len(self._scheduleByIsin)
+
+
+def _buildSchedule(bond) -> _Schedule:
+    months = 12 // _cpnsPerYear(bond)
+    # roll back from maturity (always from maturity so month ends don't drift) to the period containing the dated date
+    dts = []
+    k = 0
+    while (dt := _addMonths(bond.maturityDt, -months * k)) > bond.datedDt:
+        dts.append(dt)
+        k += 1
+    dts.append(dt)
+    dts.reverse()
+    bounds = np.array(dts, dtype='datetime64[D]')
+    dts, periodStarts = bounds[1:], bounds[:-1]
+    accStarts = periodStarts.copy()
+    accStarts[0] = np.datetime64(bond.datedDt, 'D')
+    periodDays = (dts - periodStarts).astype(np.int64)
+    c = bond.cpn / _cpnsPerYear(bond)
+    cfs = np.full(len(dts), c)
+    cfs[0] = c * (dts[0] - accStarts[0]).astype(np.int64) / periodDays[0]     # short first coupon
+    cfs[-1] += 100.0
+    return _Schedule(dts, accStarts, periodDays, cfs, np.arange(len(dts), dtype=np.float64), c)
+
+
+schedules = ScheduleStore()
+
+
+# BOND MATHS HELPERS
+
+def _solveYields(cfs, ts, f, target):
+    # pv is monotonically decreasing in y so keep a bracket [lo, hi] around the root for each bond
+    n = len(target)
+    lo = np.full(n, _Y_LO)
+    hi = np.full(n, _Y_HI)
+    active = cfs.any(axis=1)                            # matured bonds have no yield
+    y = np.where(active, 0.03, np.nan)
+    for _ in range(_MAX_ITERS):
+        pv, dpv = _pvAndDeriv(cfs[active], ts[active], f[active], y[active])
+        err = pv - target[active]
+        ya, loa, hia = y[active], lo[active], hi[active]
+        loa = np.where(err > 0, ya, loa)            # price too high => yield too low
+        hia = np.where(err > 0, hia, ya)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yNew = ya - err / dpv
+        outside = ~((yNew > loa) & (yNew < hia))
+        yNew = np.where(outside, (loa + hia) / 2, yNew)
+        idx = np.flatnonzero(active)
+        y[idx], lo[idx], hi[idx] = yNew, loa, hia
+        active[idx[np.abs(yNew - ya) < _TOL]] = False
+        if not active.any(): break
+    # a row still going didn't converge and one whose root is outside the bracket ends up stuck at an edge, neither
+    # reprices the bond
+    y[active] = np.nan
+    solved = np.flatnonzero(~np.isnan(y))
+    pv, _ = _pvAndDeriv(cfs[solved], ts[solved], f[solved], y[solved])
+    y[solved[~(np.abs(pv - target[solved]) <= _PRICE_TOL)]] = np.nan
+    return y
+
+def _pvAndDeriv(cfs, ts, f, y):
+    # dirty pv and its derivative w.r.t. y (decimal) for rows of padded cash flows
+    g = 1.0 + y / f
+    dfs = g[:, None] ** -ts
+    pv = (cfs * dfs).sum(axis=1)
+    dpv = -(cfs * ts * dfs).sum(axis=1) / (f * g)
+    return pv, dpv
+
+def _flowMatrix(bonds, settles):
+    # pads each bond's remaining flows into rows of a matrix - the zero cash flows contribute nothing
+    flows = [_remainingFlows(b, s) for b, s in zip(bonds, settles)]
+    m = max((len(fl.cfs) for fl in flows), default=0)
+    cfs = np.zeros((len(flows), m))
+    ts = np.zeros((len(flows), m))
+    for i, fl in enumerate(flows):
+        cfs[i, :len(fl.cfs)] = fl.cfs
+        ts[i, :len(fl.ts)] = fl.ts
+    acc = np.array([fl.accrued for fl in flows], dtype=np.float64)
+    f = np.array([_cpnsPerYear(b) for b in bonds], dtype=np.float64)
+    return cfs, ts, acc, f
+
+def _remainingFlows(bond, settle) -> _Flows:
+    sched = schedules.scheduleFor(bond)
+    i = int(np.searchsorted(sched.dts, settle, side='right'))         # first payment strictly after settle
+    if i == len(sched.dts):
+        return _Flows(sched.dts[i:], sched.cfs[i:], _NO_TS, 0.0)
+    periodDays = sched.periodDays[i]
+    ts = (sched.dts[i] - settle).astype(np.int64) / periodDays + sched.ks[:len(sched.dts) - i]
+    accrued = sched.c * max((settle - sched.accStarts[i]).astype(np.int64), 0) / periodDays
+    return _Flows(sched.dts[i:], sched.cfs[i:], ts, accrued)
+
+def _bondsAndSettles(bonds, settleDts):
+    single = isinstance(bonds, BulletBond)
+    bonds = [bonds] if single else list(bonds)
+    if isinstance(settleDts, (datetime.date, np.datetime64, str)):
+        settles = [_toDt64(settleDts)] * len(bonds)
+    else:
+        settles = [_toDt64(s) for s in settleDts]
+        if len(settles) != len(bonds): raise ValueError(f'{len(bonds)} bonds but {len(settles)} settle dates')
+    return single, bonds, settles
+
+def _cpnsPerYear(bond):
+    # OPEN: bonds.csv holds coupons per year in the freqInMonths column (the Bunds pay annually, i.e. 1)
+    return bond.freqInMonths
+
+def _addMonths(d, n):
+    y, m = divmod(d.month - 1 + n, 12)
+    y += d.year
+    return datetime.date(y, m + 1, min(d.day, calendar.monthrange(y, m + 1)[1]))
+
+def _toDt64(d):
+    if isinstance(d, datetime.datetime): d = d.date()
+    return np.datetime64(d, 'D')
+
+
+# DELIVERABLE BASKETS
+
+class BasketEngine:
+    """Answers the deliverable basket of a bond future from the BFBasketRules. Bonds are indexed by ticker sorted by
+    maturity so the remaining maturity rule is a range query, the other rules are then checked on that small range.
+    Baskets are cached by (contract, asOf)."""
+
+    __slots__ = ['_bondsByTicker', '_maturitiesByTicker', '_rulesByBbgCode', '_basketByKey']
+
+    def __init__(self, bonds, rules):
+        byTicker = collections.defaultdict(list)
+        for b in bonds:
+            byTicker[b.cls].append(b)
+        self._bondsByTicker = {t: sorted(bs, key=lambda b: b.maturityDt) for t, bs in byTicker.items()}
+        self._maturitiesByTicker = {
+            t: np.array([b.maturityDt for b in bs], dtype='datetime64[D]') for t, bs in self._bondsByTicker.items()
+        }
+        self._rulesByBbgCode = collections.defaultdict(list)
+        for r in sorted(rules, key=lambda r: r.asOf):
+            self._rulesByBbgCode[r.bbgCode].append(r)
+        self._basketByKey = {}
+
+    def basketFor(self, bondFut:BondFut, asOf=None) -> list:
+        """Answers the bonds deliverable into bondFut as of asOf (default the last delivery date) sorted by maturity."""
+        asOf = bondFut.lastDlvDt if asOf is None else asOf
+        if (basket := self._basketByKey.get(key := (bondFut.alias, asOf))) is not None: return basket
+        basket = self._basketByKey[key] = self._determine(bondFut, asOf)
+        return basket
+
+    def ruleFor(self, bondFut:BondFut, asOf):
+        # the latest rule in force at asOf else the earliest we have
+        rules = self._rulesByBbgCode.get(bondFut.bbgCode)
+        if not rules: return None
+        return next((r for r in reversed(rules) if r.asOf <= asOf), rules[0])
+
+    def _determine(self, bondFut, asOf):
+        if (rule := self.ruleFor(bondFut, asOf)) is None: return []
+        dlvDt = bondFut.lastDlvDt
+        lo = np.datetime64(_addMonths(dlvDt, rule.minMat), 'D')
+        hi = np.datetime64(_addMonths(dlvDt, rule.maxMat), 'D')
+        basket = []
+        for ticker in rule.tickers:
+            if (mats := self._maturitiesByTicker.get(ticker)) is None: continue
+            bonds = self._bondsByTicker[ticker]
+            for i in range(np.searchsorted(mats, lo, side='left'), np.searchsorted(mats, hi, side='right')):
+                b = bonds[i]
+                if b.issueDt > asOf: continue
+                if b.maturityDt > _addMonths(b.issueDt, rule.maxIssue): continue
+                if b.outstanding < rule.minOut * 1_000_000: continue
+                basket.append(b)
+        basket.sort(key=lambda b: b.maturityDt)
+        return basket
+
+
+def basketFor(bondFut:BondFut, baskets:BasketEngine, asOf=None) -> list:
     """Returns the subset of bonds that are elidgible for delivery for the given bond future."""
-    # OPEN: implement properly
-    if bondFut.alias == 'OEH26': return [b for b in bonds if b.alias == 'DBRAug31']
-    if bondFut.alias == 'RXH26': return [b for b in bonds if b.alias == 'DBRFeb35']
+    return baskets.basketFor(bondFut, asOf)
 
 
-def ctd(bondFut, basket, prices):
-    "Returns the ctd of the given bond future."
-    # OPEN: implement properly
-    return basket[0]
+def ctd(bondFut, basket, prices, notionalCpn=6.0):
+    "Returns the ctd of the given bond future, i.e. the bond with the cheapest converted price (see basis.BasisGrid for the implied repo version)."
+    cfs = y2p(basket, notionalCpn, bondFut.lastDlvDt) / 100.0
+    return basket[int(np.argmin(np.asarray(prices, dtype=np.float64) / cfs))]
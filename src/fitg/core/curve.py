@@ -0,0 +1,168 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Nelson-Siegel-Svensson yield curve fitted to bond yields
+#
+#   y(t) = b0 + b1 * S(t, tau1) + b2 * C(t, tau1) + b3 * C(t, tau2)
+#   S(t, tau) = (1 - exp(-t / tau)) / (t / tau),  C(t, tau) = S(t, tau) - exp(-t / tau)
+#
+# t is years to maturity and yields are percentages as in calcs. For fixed taus the curve is linear in the betas so
+# each (tau1, tau2) on a grid is an ordinary least squares problem. The fitter keeps the sufficient statistics X'X, X'y
+# and y'y for every grid point at once ([nGrid, 4, 4], [nGrid, 4] and a scalar), so setting k yields costs O(k * nGrid)
+# and a fit is a batch of 4x4 solves rather than a pass over the bonds. A fit warm starts from the previous one,
+# searching only the grid points next to the previous taus, unless more than REFIT_FRACTION of the yields changed (or
+# there's no previous fit) when it searches the whole grid after recomputing the statistics from scratch, which also
+# clears any drift from the incremental updates.
+
+
+# standard Python imports
+import collections
+import numpy as np
+
+# fitg imports
+from fitg.core import calcs
+from fitg.utils.exceptions import FitgError
+
+
+TAU1_GRID = tuple(np.geomspace(0.25, 8.0, 12).tolist())        # years
+TAU2_GRID = tuple(np.geomspace(1.0, 30.0, 12).tolist())
+REFIT_FRACTION = 0.25                   # more than this fraction of yields changed since the last fit => search the whole grid
+WARM_RADIUS = 1                         # grid steps either side of the previous taus searched by a warm fit
+MIN_POINTS = 6
+MIN_T = 1.0 / 365.25
+_RIDGE = 1e-10                          # keeps near collinear loadings solvable
+
+NssParams = collections.namedtuple('NssParams', ('b0', 'b1', 'b2', 'b3', 'tau1', 'tau2'))
+CurveFit = collections.namedtuple('CurveFit', ('params', 'rmse', 'n', 'warm'))
+
+
+def nssLoadings(t, tau1, tau2) -> np.ndarray:
+    """Answers the [..., 4] loadings of the betas at times t - tau1 and tau2 broadcast against t."""
+    t = np.maximum(np.asarray(t, dtype=np.float64), MIN_T)
+    x1, x2 = t / tau1, t / tau2
+    e1, e2 = np.exp(-x1), np.exp(-x2)
+    s1, s2 = (1.0 - e1) / x1, (1.0 - e2) / x2
+    return np.stack(np.broadcast_arrays(np.ones_like(x1), s1, s1 - e1, s2 - e2), axis=-1)
+
+def nssYields(params:NssParams, t) -> np.ndarray:
+    """Answers the curve's yields at times t (years)."""
+    return nssLoadings(t, params.tau1, params.tau2) @ np.asarray(params[:4], dtype=np.float64)
+
+def fairPrices(params:NssParams, bonds, settleDt) -> np.ndarray:
+    """Answers the clean prices of bonds on the curve."""
+    return calcs.y2p(bonds, nssYields(params, yearsToMaturity(bonds, settleDt)), settleDt)
+
+def yearsToMaturity(bonds, settleDt) -> np.ndarray:
+    mats = np.array([b.maturityDt for b in bonds], dtype='datetime64[D]')
+    return (mats - np.datetime64(settleDt, 'D')).astype(np.float64) / 365.25
+
+
+
+class NssFitter:
+
+    __slots__ = [
+        'bonds', 'settleDt', 'assetNames', '_assetIdxByName',
+        'ts',                           # [nAssets] years to maturity
+        'yields',                       # [nAssets] NaN where there isn't one
+        'last',                         # the last CurveFit or None
+        '_tau1s', '_tau2s',             # [nGrid] the grid's taus
+        '_gridIdx1', '_gridIdx2',       # [nGrid] their indices into TAU1_GRID / TAU2_GRID
+        '_X',                           # [nGrid, nAssets, 4] loadings
+        '_xtx', '_xty', '_yty',         # sufficient statistics of the yields set so far
+        '_nChanged',                    # yields set since the last fit
+    ]
+
+    def __init__(self, bonds, settleDt, tau1Grid=TAU1_GRID, tau2Grid=TAU2_GRID):
+        self.bonds = list(bonds)
+        self.settleDt = settleDt
+        self.assetNames = [b.alias for b in self.bonds]
+        self._assetIdxByName = {n: i for i, n in enumerate(self.assetNames)}
+        self.ts = yearsToMaturity(self.bonds, settleDt)
+        self.yields = np.full(len(self.bonds), np.nan)
+        self.last = None
+        i1, i2 = np.meshgrid(np.arange(len(tau1Grid)), np.arange(len(tau2Grid)), indexing='ij')
+        tau1s, tau2s = np.asarray(tau1Grid)[i1.ravel()], np.asarray(tau2Grid)[i2.ravel()]
+        valid = tau2s > tau1s                   # otherwise the two curvature terms swap roles
+        self._tau1s, self._tau2s = tau1s[valid], tau2s[valid]
+        self._gridIdx1, self._gridIdx2 = i1.ravel()[valid], i2.ravel()[valid]
+        self._X = nssLoadings(self.ts[None, :], self._tau1s[:, None], self._tau2s[:, None])
+        self._recompute()
+
+
+    # INPUTS
+
+    def setPrices(self, priceByAsset):
+        """Sets the yields of the assets from {asset: clean price}, e.g. composite mids - unknown assets are ignored."""
+        idxs = [i for a in priceByAsset if (i := self._assetIdxByName.get(a)) is not None]
+        if not idxs: return
+        prices = [priceByAsset[self.assetNames[i]] for i in idxs]
+        self.setYields(idxs, calcs.p2y([self.bonds[i] for i in idxs], prices, self.settleDt))
+
+    def setYields(self, idxs, ys):
+        """Sets the yields of the assets at idxs (each at most once) updating the statistics by just their change.
+        NaN yields (e.g. matured bonds) are ignored."""
+        idxs, ys = np.asarray(idxs, dtype=np.intp), np.asarray(ys, dtype=np.float64)
+        keep = ~np.isnan(ys)
+        idxs, ys = idxs[keep], ys[keep]
+        old = self.yields[idxs]
+        isNew = np.isnan(old)
+        old = np.where(isNew, 0.0, old)
+        X = self._X[:, idxs]
+        Xn = X[:, isNew]
+        self._xtx += np.einsum('gki,gkj->gij', Xn, Xn)              # new assets add a row to the regression
+        self._xty += np.einsum('gki,k->gi', X, ys - old)
+        self._yty += ys @ ys - old @ old
+        self.yields[idxs] = ys
+        self._nChanged += len(idxs)
+
+
+    # FITTING
+
+    def fit(self) -> CurveFit:
+        """Fits the curve to the yields so far, answering the CurveFit (also held as last) or None if there are
+        too few of them."""
+        n = int((~np.isnan(self.yields)).sum())
+        if n < MIN_POINTS: return None
+        warm = self.last is not None and self._nChanged <= REFIT_FRACTION * n
+        if warm:
+            p = self.last.params
+            g = np.flatnonzero(
+                (np.abs(self._gridIdx1 - self._gridIdx1[self._gridOf(p)]) <= WARM_RADIUS)
+                & (np.abs(self._gridIdx2 - self._gridIdx2[self._gridOf(p)]) <= WARM_RADIUS)
+            )
+        else:
+            self._recompute()
+            g = np.arange(len(self._tau1s))
+        xtx, xty = self._xtx[g] + _RIDGE * np.eye(4), self._xty[g]
+        betas = np.linalg.solve(xtx, xty[..., None])[..., 0]
+        sse = self._yty - 2.0 * (betas * xty).sum(axis=1) + np.einsum('gi,gij,gj->g', betas, xtx, betas)
+        best = int(np.argmin(sse))
+        gi = g[best]
+        params = NssParams(*betas[best].tolist(), float(self._tau1s[gi]), float(self._tau2s[gi]))
+        self.last = CurveFit(params, float(np.sqrt(max(sse[best], 0.0) / n)), n, warm)
+        self._nChanged = 0
+        return self.last
+
+    def fairPrices(self) -> np.ndarray:
+        if self.last is None: raise FitgError('No curve fitted yet')
+        return fairPrices(self.last.params, self.bonds, self.settleDt)
+
+
+    # HELPERS
+
+    def _gridOf(self, params):
+        return int(np.flatnonzero((self._tau1s == params.tau1) & (self._tau2s == params.tau2))[0])
+
+    def _recompute(self):
+        have = np.flatnonzero(~np.isnan(self.yields))
+        X, y = self._X[:, have], self.yields[have]
+        self._xtx = np.einsum('gki,gkj->gij', X, X)
+        self._xty = np.einsum('gki,k->gi', X, y)
+        self._yty = float(y @ y)
+        self._nChanged = 0
@@ -0,0 +1,240 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Price-time priority central limit order book
+#
+# Prices are held as tick indices into per side arrays - each level has its total resting size and a FIFO queue of
+# orders. Sizes are +ve for buy and -ve for sell. A limit price between ticks is rounded away from the market (buys
+# down, sells up) so an order never trades or rests through its limit. Each side keeps a heap of the ticks that have
+# held orders so finding the next best level after one empties is O(log levels) rather than a scan over the empty
+# ones. Cancels just zero the order and the level's size - the dead order is dropped when it reaches the front of its
+# queue, when its level empties, or when dead orders are over half the queue - so cancel is amortised O(1) and matching
+# at the best price is O(1) per fill.
+
+
+# Python imports
+import collections, heapq, itertools, math
+
+# local imports
+from fitg.utils.exceptions import FitgError
+
+
+Fill = collections.namedtuple(
+    'Fill',
+    ('tradeId', 'asset', 'aggressor', 'aggressorOrderId', 'resting', 'restingOrderId', 'size', 'price')
+)   # size is from the aggressor's point of view
+
+_ON_TICK = 1e-9                         # fraction of a tick within which a price counts as on it
+
+
+class Order:
+    __slots__ = ['orderId', 'owner', 'isBuy', 'tick', 'remaining']
+
+    def __init__(self, orderId, owner, isBuy, tick, remaining):
+        self.orderId = orderId
+        self.owner = owner
+        self.isBuy = isBuy
+        self.tick = tick
+        self.remaining = remaining      # unsigned
+
+
+class OrderBook:
+
+    __slots__ = [
+        'asset', 'tickSize', 'minPx',
+        '_bids', '_asks',               # _Side
+        '_bestBid', '_bestAsk',         # tick indices, -1 / nLevels when the side is empty
+        '_orderById',
+        '_tradeIdSeed',
+    ]
+
+    def __init__(self, asset, tickSize, minPx, maxPx, tradeIdSeed=None):
+        self.asset = asset
+        self.tickSize = tickSize
+        self.minPx = minPx
+        n = int(round((maxPx - minPx) / tickSize)) + 1
+        self._bids = _Side(True, n)
+        self._asks = _Side(False, n)
+        self._bestBid = -1
+        self._bestAsk = n
+        self._orderById = {}
+        self._tradeIdSeed = tradeIdSeed or itertools.count(1)
+
+
+    # ORDERS
+
+    def limit(self, orderId, owner, size, price) -> list[Fill]:
+        """Matches size at price or better and rests any remainder, answering the fills."""
+        tick = self.toTick(price, size > 0)
+        if not 0 <= tick < len(self._bids.sizes): raise FitgError(f'{price} is outside the book for {self.asset}')
+        fills, remaining = self._match(orderId, owner, size, tick)
+        if remaining:
+            self._rest(Order(orderId, owner, size > 0, tick, remaining))
+        return fills
+
+    def market(self, orderId, owner, size) -> list[Fill]:
+        """Matches size against whatever is resting, any remainder is cancelled."""
+        fills, _ = self._match(orderId, owner, size, len(self._bids.sizes) - 1 if size > 0 else 0)
+        return fills
+
+    def cancel(self, orderId) -> int:
+        """Answers the signed size that was cancelled, 0 if the order is unknown or done."""
+        if (order := self._orderById.pop(orderId, None)) is None: return 0
+        if order.isBuy:
+            remaining = self._bids.cancel(order)
+            if order.tick == self._bestBid: self._bestBid = self._bids.best()
+            return remaining
+        else:
+            remaining = self._asks.cancel(order)
+            if order.tick == self._bestAsk: self._bestAsk = self._asks.best()
+            return -remaining
+
+    def ownerOf(self, orderId):
+        return (order := self._orderById.get(orderId)) and order.owner
+
+
+    # MARKET DATA
+
+    def top(self):
+        """Answers (bid, bidSize, ask, askSize) with None for an empty side."""
+        bb, ba = self._bestBid, self._bestAsk
+        bid = (self.toPx(bb), self._bids.sizes[bb]) if bb >= 0 else (None, 0)
+        ask = (self.toPx(ba), self._asks.sizes[ba]) if ba < len(self._asks.sizes) else (None, 0)
+        return bid + ask
+
+    def depth(self, levels=5):
+        """Answers ([(bid, size), ...], [(ask, size), ...]) best first."""
+        return (
+            [(self.toPx(t), self._bids.sizes[t]) for t in self._bids.levels(levels)],
+            [(self.toPx(t), self._asks.sizes[t]) for t in self._asks.levels(levels)],
+        )
+
+    def toTick(self, price, isBuy=None):
+        """Answers the tick of price - if it's between ticks the nearest one, or for a buy the one below and for a
+        sell the one above."""
+        x = (price - self.minPx) / self.tickSize
+        if abs(x - (nearest := round(x))) <= _ON_TICK or isBuy is None: return int(nearest)
+        return math.floor(x) if isBuy else math.ceil(x)
+
+    def toPx(self, tick):
+        return round(self.minPx + tick * self.tickSize, 10)
+
+
+    # HELPERS
+
+    def _match(self, orderId, owner, size, limitTick):
+        fills = []
+        remaining = abs(size)
+        if size > 0:
+            side, best = self._asks, self._bestAsk
+            while remaining and best <= limitTick:
+                remaining = self._fillLevel(orderId, owner, True, remaining, side, best, fills)
+                if not side.sizes[best]: best = side.best()
+            self._bestAsk = best
+        else:
+            side, best = self._bids, self._bestBid
+            while remaining and best >= limitTick:
+                remaining = self._fillLevel(orderId, owner, False, remaining, side, best, fills)
+                if not side.sizes[best]: best = side.best()
+            self._bestBid = best
+        return fills, remaining
+
+    def _fillLevel(self, orderId, owner, isBuy, remaining, side, tick, fills):
+        price = self.toPx(tick)
+        sizes, q = side.sizes, side.queues[tick]
+        while remaining and q:
+            resting = q[0]
+            if not resting.remaining:
+                q.popleft()                                 # cancelled
+                side.dead[tick] -= 1
+                continue
+            n = min(remaining, resting.remaining)
+            resting.remaining -= n
+            remaining -= n
+            sizes[tick] -= n
+            if not resting.remaining:
+                q.popleft()
+                del self._orderById[resting.orderId]
+            fills.append(Fill(
+                next(self._tradeIdSeed), self.asset, owner, orderId, resting.owner, resting.orderId,
+                n if isBuy else -n, price
+            ))
+        return remaining
+
+    def _rest(self, order):
+        self._orderById[order.orderId] = order
+        if order.isBuy:
+            self._bids.add(order)
+            if order.tick > self._bestBid: self._bestBid = order.tick
+        else:
+            self._asks.add(order)
+            if order.tick < self._bestAsk: self._bestAsk = order.tick
+
+
+
+class _Side:
+    # one side of the book
+
+    __slots__ = [
+        'isBuy', 'empty',               # empty is the best tick answered when there are no orders
+        'sizes',                        # total resting size by tick
+        'queues',                       # deque of Order by tick, created on first use
+        'dead',                         # cancelled orders still in each tick's queue
+        'heap',                         # ticks that may have resting size, negated for bids so the best is first
+        'listed',                       # True for the ticks in the heap
+    ]
+
+    def __init__(self, isBuy, n):
+        self.isBuy = isBuy
+        self.empty = -1 if isBuy else n
+        self.sizes = [0] * n
+        self.queues = [None] * n
+        self.dead = [0] * n
+        self.heap = []
+        self.listed = [False] * n
+
+    def add(self, order):
+        t = order.tick
+        if (q := self.queues[t]) is None:
+            q = self.queues[t] = collections.deque()
+        q.append(order)
+        self.sizes[t] += order.remaining
+        if not self.listed[t]:
+            self.listed[t] = True
+            heapq.heappush(self.heap, -t if self.isBuy else t)
+
+    def cancel(self, order) -> int:
+        # answers the unsigned size cancelled
+        t, remaining = order.tick, order.remaining
+        order.remaining = 0
+        self.sizes[t] -= remaining
+        q = self.queues[t]
+        if not self.sizes[t]:
+            q.clear()                                       # every order left at the level is dead
+            self.dead[t] = 0
+        elif (dead := self.dead[t] + 1) * 2 > len(q):
+            self.queues[t] = collections.deque(o for o in q if o.remaining)
+            self.dead[t] = 0
+        else:
+            self.dead[t] = dead
+        return remaining
+
+    def best(self) -> int:
+        # answers the best tick with resting size, dropping the emptied ticks in front of it from the heap
+        heap, sizes, sign = self.heap, self.sizes, -1 if self.isBuy else 1
+        while heap:
+            if sizes[t := sign * heap[0]]: return t
+            heapq.heappop(heap)
+            self.listed[t] = False
+        return self.empty
+
+    def levels(self, n) -> list:
+        # answers up to n ticks with resting size, best first
+        sign = -1 if self.isBuy else 1
+        return [t for t in (sign * x for x in sorted(self.heap)) if self.sizes[t]][:n]
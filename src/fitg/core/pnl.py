@@ -0,0 +1,134 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# FIFO and mark to market PnL
+#
+# Each (agent, asset) has a deque of open lots, all the same sign. A fill first closes lots from the front, realising
+# PnL on each match, and any remainder opens a new lot at the back so each fill is amortised O(1). Every (agent, asset)
+# is also a slot in flat arrays of open position and open cost so mark to market is one numpy pass over all slots.
+#
+# Sizes are face (+ve buy, -ve sell) and prices are per priceScale of face, i.e. % of par by default.
+
+
+# standard Python imports
+import collections
+import numpy as np
+
+
+class PnlEngine:
+
+    __slots__ = [
+        'priceScale',
+        'agents', '_agentIdxByName',
+        'assets', '_assetIdxByName',
+        '_slotByKey',                   # slot by (agent, asset)
+        '_lots',                        # deque of [size, price] by slot
+        '_realisedByAgent',
+        '_n',                           # slots in use
+        '_pos', '_cost',                # open size and open cost (size * price) by slot
+        '_agentIdx', '_assetIdx',       # by slot
+    ]
+
+    def __init__(self, priceScale=100.0):
+        self.priceScale = priceScale
+        self.agents = []
+        self._agentIdxByName = {}
+        self.assets = []
+        self._assetIdxByName = {}
+        self._slotByKey = {}
+        self._lots = []
+        self._realisedByAgent = []
+        self._n = 0
+        self._pos = np.zeros(64)
+        self._cost = np.zeros(64)
+        self._agentIdx = np.zeros(64, dtype=np.int64)
+        self._assetIdx = np.zeros(64, dtype=np.int64)
+
+
+    # FILLS
+
+    def onFill(self, agent, asset, size, price) -> float:
+        """Applies a fill answering the PnL it realised."""
+        if (slot := self._slotByKey.get((agent, asset))) is None: slot = self._newSlot(agent, asset)
+        lots = self._lots[slot]
+        realised = 0.0
+        remaining = size
+        while remaining and lots and (lot := lots[0])[0] * remaining < 0:
+            # closing - the lot and the fill have opposite signs
+            lotSize, lotPx = lot
+            if abs(remaining) >= abs(lotSize):
+                n = lotSize
+                lots.popleft()
+            else:
+                n = -remaining
+                lot[0] = lotSize - n
+            realised += n * (price - lotPx)
+            self._cost[slot] -= n * lotPx
+            remaining += n
+        if remaining:
+            lots.append([remaining, price])
+            self._cost[slot] += remaining * price
+        self._pos[slot] += size
+        realised /= self.priceScale
+        if realised: self._realisedByAgent[self._agentIdx[slot]] += realised
+        return realised
+
+
+    # QUERIES
+
+    def realised(self, agent) -> float:
+        return self._realisedByAgent[a] if (a := self._agentIdxByName.get(agent)) is not None else 0.0
+
+    def position(self, agent, asset) -> float:
+        return float(self._pos[slot]) if (slot := self._slotByKey.get((agent, asset))) is not None else 0.0
+
+    def openLots(self, agent, asset) -> list:
+        return [tuple(lot) for lot in self._lots[slot]] if (slot := self._slotByKey.get((agent, asset))) is not None else []
+
+
+    # MARK TO MARKET
+
+    def markToMarket(self, marks) -> np.ndarray:
+        """marks - by asset name (dict) or aligned with self.assets (NaN for unmarked). Answers the unrealised PnL
+        aligned with self.agents."""
+        if isinstance(marks, dict):
+            marks = np.array([marks.get(a, np.nan) for a in self.assets], dtype=np.float64)
+        n = self._n
+        pos = self._pos[:n]
+        unrealised = pos * np.asarray(marks, dtype=np.float64)[self._assetIdx[:n]] - self._cost[:n]
+        unrealised = np.where(pos != 0, unrealised, 0.0) / self.priceScale     # flat slots need no mark
+        return np.bincount(self._agentIdx[:n], weights=unrealised, minlength=len(self.agents))
+
+    def totalPnl(self, marks) -> dict:
+        unrealised = self.markToMarket(marks)
+        return {a: self._realisedByAgent[i] + float(unrealised[i]) for i, a in enumerate(self.agents)}
+
+
+    # HELPERS
+
+    def _newSlot(self, agent, asset):
+        if (a := self._agentIdxByName.get(agent)) is None:
+            a = self._agentIdxByName[agent] = len(self.agents)
+            self.agents.append(agent)
+            self._realisedByAgent.append(0.0)
+        if (i := self._assetIdxByName.get(asset)) is None:
+            i = self._assetIdxByName[asset] = len(self.assets)
+            self.assets.append(asset)
+        slot = self._slotByKey[(agent, asset)] = self._n
+        self._n += 1
+        if slot == len(self._pos):
+            # double the capacity
+            self._pos = np.concatenate([self._pos, np.zeros_like(self._pos)])
+            self._cost = np.concatenate([self._cost, np.zeros_like(self._cost)])
+            self._agentIdx = np.concatenate([self._agentIdx, np.zeros_like(self._agentIdx)])
+            self._assetIdx = np.concatenate([self._assetIdx, np.zeros_like(self._assetIdx)])
+        self._agentIdx[slot] = a
+        self._assetIdx[slot] = i
+        self._lots.append(collections.deque())
+        return slot
@@ -0,0 +1,119 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Vectorised two way quotes for a dealer's universe
+#
+# TERMS: fair - the price the curve implies for an asset
+#        skew - shift of both sides away from the inventory, i.e. a long dealer quotes lower to get sold to
+#
+# mid, spread and skew are [nAssets] arrays so requote() regenerates every asset's bid / ask in one numpy pass:
+#
+#   mid = fair, skew = -skewPerUnit * inventory, spread = baseSpread + widenPerUnit * |inventory|
+#   bid, ask = mid + skew -/+ spread / 2
+#
+# The engine remembers, for each venue, the bid / ask of each asset the venue last acknowledged and when they were sent.
+# dueIdxs() answers only the assets whose bid or ask has moved by more than a tick since then, plus those not sent for
+# refreshMs, so every indication is resent within a venue's quote obligation however quiet the market. Nothing is
+# remembered until noteSent() - a send that times out leaves its quotes due for that venue. Assets without a fair
+# price (NaN, e.g. matured) aren't quoted.
+
+
+# standard Python imports
+import numpy as np
+
+# fitg imports
+from fitg.utils.exceptions import FitgError
+
+
+class QuoteEngine:
+
+    __slots__ = [
+        'assetNames', '_assetIdxByName',
+        'baseSpread', 'tick', 'refreshMs', 'skewPerUnit', 'widenPerUnit',
+        'mid', 'spread', 'skew',        # [nAssets] inputs to the quotes
+        'bid', 'ask',                   # [nAssets] current quotes
+        '_sentByVenue',                 # {venue: (bid, ask, atMs)} [nAssets] quotes last acknowledged and when sent
+    ]
+
+    def __init__(self, assetNames, baseSpread, tick, refreshMs, skewPerUnit=0.0, widenPerUnit=0.0):
+        self.assetNames = list(assetNames)
+        self._assetIdxByName = {n: i for i, n in enumerate(self.assetNames)}
+        self.baseSpread = baseSpread
+        self.tick = tick
+        self.refreshMs = refreshMs
+        self.skewPerUnit = skewPerUnit
+        self.widenPerUnit = widenPerUnit
+        n = len(self.assetNames)
+        self.mid = np.full(n, np.nan)
+        self.spread = np.full(n, float(baseSpread))
+        self.skew = np.zeros(n)
+        self.bid = np.full(n, np.nan)
+        self.ask = np.full(n, np.nan)
+        self._sentByVenue = {}
+
+
+    # QUOTING
+
+    def requote(self, fair, inventory=None):
+        """Regenerates every bid / ask from the fair prices and, if given, the [nAssets] inventory."""
+        self.mid[:] = fair
+        if inventory is not None:
+            np.multiply(inventory, -self.skewPerUnit, out=self.skew)
+            np.abs(inventory, out=self.spread)
+            self.spread *= self.widenPerUnit
+            self.spread += self.baseSpread
+        np.add(self.mid, self.skew, out=self.bid)
+        self.ask[:] = self.bid
+        half = self.spread * 0.5
+        self.bid -= half
+        self.ask += half
+
+    def quoteFor(self, asset, size):
+        """Answers the price we'd trade size (+ve the other side buys) of asset at or None if we're not quoting it."""
+        if (i := self._assetIdxByName.get(asset)) is None: return None
+        price = self.ask[i] if size > 0 else self.bid[i]
+        return None if np.isnan(price) else float(price)
+
+
+    # SENDING
+
+    def dueIdxs(self, venue, nowMs) -> np.ndarray:
+        """Answers the indices of the quotes that moved by more than a tick since venue last acknowledged them or are
+        due a refresh there."""
+        sentBid, sentAsk, sentAtMs = self._sentFor(venue)
+        due = ~np.isnan(self.bid) & ~np.isnan(self.ask) & (
+            (np.abs(self.bid - sentBid) > self.tick)
+            | (np.abs(self.ask - sentAsk) > self.tick)
+            | (nowMs - sentAtMs >= self.refreshMs)
+        )
+        return np.flatnonzero(due)
+
+    def noteSent(self, venue, idxs, bids, asks, sentAtMs):
+        """Notes that venue acknowledged bids / asks for the quotes at idxs, sent at sentAtMs."""
+        sentBid, sentAsk, atMs = self._sentFor(venue)
+        sentBid[idxs] = bids
+        sentAsk[idxs] = asks
+        atMs[idxs] = sentAtMs
+
+    def resendAll(self, venue):
+        """Makes every quote due for venue, e.g. after (re)connecting to it."""
+        self._sentByVenue.pop(venue, None)
+
+    def indexOf(self, asset) -> int:
+        if (i := self._assetIdxByName.get(asset)) is None: raise FitgError(f'Unknown asset "{asset}"')
+        return i
+
+
+    # HELPERS
+
+    def _sentFor(self, venue):
+        if (sent := self._sentByVenue.get(venue)) is None:
+            n = len(self.assetNames)
+            sent = self._sentByVenue[venue] = (np.full(n, np.nan), np.full(n, np.nan), np.full(n, -np.inf))
+        return sent
@@ -0,0 +1,163 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Columnar reference data
+#
+# Bonds and bond futures are held as one numpy array per column (datetime64 dates, float coupons, int outstanding) with
+# the BulletBond / BondFut namedtuples built from the columns on demand. After a csv is parsed its columns are written
+# to a snapshot folder as .npy files and later loads memory map them as long as the csv's size and mtime are unchanged.
+
+
+# standard Python imports
+import csv, json, os, tempfile
+import numpy as np
+
+# fitg imports
+from fitg.core.structs import BulletBond, BondFut
+
+
+SNAPSHOT_VERSION = 1
+
+_MONTH_BY_NAME = {m: i + 1 for i, m in enumerate(('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'))}
+
+_BOND_DTYPES = (
+    ('isin', str), ('alias', str), ('issueDt', 'datetime64[D]'), ('datedDt', 'datetime64[D]'),
+    ('maturityDt', 'datetime64[D]'), ('cpn', np.float64), ('freqInMonths', np.int64), ('outstanding', np.int64),
+    ('cls', str),
+)
+_FUT_DTYPES = (
+    ('exchange', str), ('alias', str), ('bbgCode', str), ('firstTradingDt', 'datetime64[D]'),
+    ('firstDlvDt', 'datetime64[D]'), ('lastDlvDt', 'datetime64[D]'), ('cf', np.float64),
+)
+
+
+class RefTable:
+    """A table of columns with namedtuple views of its rows and an index on its key column."""
+
+    __slots__ = ['colByName', 'rowType', '_idxByKey', '_rows']
+
+    def __init__(self, colByName, rowType, keyCol):
+        self.colByName = colByName
+        self.rowType = rowType
+        self._idxByKey = {k: i for i, k in enumerate(colByName[keyCol].tolist())}
+        self._rows = None
+
+    def __len__(self):
+        return len(self._idxByKey)
+
+    def __getitem__(self, colName) -> np.ndarray:
+        return self.colByName[colName]
+
+    def rows(self) -> list:
+        if self._rows is None:
+            # tolist() converts datetime64[D] to datetime.date and numpy scalars to Python ones in one go
+            cols = [self.colByName[f].tolist() for f in self.rowType._fields]
+            self._rows = [self.rowType(*xs) for xs in zip(*cols)]
+        return self._rows
+
+    def row(self, key):
+        if (i := self._idxByKey.get(key)) is None: return None
+        return self._rows[i] if self._rows is not None else self.rowType(*[self.colByName[f][i].tolist() for f in self.rowType._fields])
+
+    def indexOf(self, key) -> int:
+        return self._idxByKey.get(key, -1)
+
+
+class RefData:
+
+    __slots__ = ['bonds', 'bondFuts']
+
+    def __init__(self, bonds:RefTable, bondFuts:RefTable):
+        self.bonds = bonds
+        self.bondFuts = bondFuts
+
+    @classmethod
+    def load(cls, dataFolder, snapshotFolder=None) -> 'RefData':
+        snapshotFolder = snapshotFolder or os.path.join(dataFolder, '__snapshot__')
+        bonds = _loadTable(os.path.join(dataFolder, 'bonds.csv'), snapshotFolder, 'bonds', _BOND_DTYPES, _bondColumns)
+        bondFuts = _loadTable(os.path.join(dataFolder, 'bond_futs.csv'), snapshotFolder, 'bond_futs', _FUT_DTYPES, _futColumns)
+        return cls(RefTable(bonds, BulletBond, 'isin'), RefTable(bondFuts, BondFut, 'alias'))
+
+
+# SNAPSHOTS
+
+def _loadTable(csvFfn, snapshotFolder, name, dtypes, parseFn):
+    st = os.stat(csvFfn)
+    stamp = {'version': SNAPSHOT_VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    metaFfn = os.path.join(snapshotFolder, f'{name}.json')
+    try:
+        with open(metaFfn) as f:
+            if json.load(f) == stamp:
+                return {c: np.load(os.path.join(snapshotFolder, f'{name}.{c}.npy'), mmap_mode='r') for c, _ in dtypes}
+    except (OSError, ValueError):
+        pass
+    with open(csvFfn, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))[1:]
+    cols = parseFn(rows)
+    try:
+        os.makedirs(snapshotFolder, exist_ok=True)
+        for c, _ in dtypes:
+            _replaceFile(os.path.join(snapshotFolder, f'{name}.{c}.npy'), lambda f: np.save(f, cols[c]))
+        # written last so a partial snapshot is never trusted
+        _replaceFile(metaFfn, lambda f: f.write(json.dumps(stamp).encode()))
+    except OSError:
+        pass                                    # e.g. read only data folder - just parse each time
+    return cols
+
+def _replaceFile(ffn, writeFn):
+    # other processes may have the old file mmapped so write a new one alongside and swap it in atomically rather than
+    # truncating the old one under them
+    fd, tmpFfn = tempfile.mkstemp(dir=os.path.dirname(ffn), prefix=os.path.basename(ffn), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writeFn(f)
+        os.replace(tmpFfn, ffn)
+    except BaseException:
+        try:
+            os.unlink(tmpFfn)
+        except OSError:
+            pass
+        raise
+
+
+# CSV PARSING
+
+def _bondColumns(rows):
+    xs = list(zip(*rows)) if rows else [()] * len(_BOND_DTYPES)
+    return {
+        'isin': np.array(xs[0], dtype=str),
+        'alias': np.array(xs[1], dtype=str),
+        'issueDt': _dates(xs[2]),
+        'datedDt': _dates(xs[3]),
+        'maturityDt': _dates(xs[4]),
+        'cpn': np.array(xs[5], dtype=np.float64),
+        'freqInMonths': np.array(xs[6], dtype=np.int64),
+        'outstanding': np.array([x.replace(',', '') for x in xs[7]], dtype=np.int64),
+        'cls': np.array(xs[8], dtype=str),
+    }
+
+def _futColumns(rows):
+    xs = list(zip(*rows)) if rows else [()] * len(_FUT_DTYPES)
+    return {
+        'exchange': np.array(xs[0], dtype=str),
+        'alias': np.array(xs[1], dtype=str),
+        'bbgCode': np.array(xs[2], dtype=str),
+        'firstTradingDt': _dates(xs[3]),
+        'firstDlvDt': _dates(xs[4]),
+        'lastDlvDt': _dates(xs[5]),
+        'cf': np.array(xs[6], dtype=np.float64),
+    }
+
+def _dates(xs):
+    # 'YYYY-MMM-D' (structs.ISO_FMT) to datetime64[D] without going through strptime
+    answer = []
+    for x in xs:
+        y, m, d = x.split('-')
+        answer.append(f'{y}-{_MONTH_BY_NAME[m]:02d}-{int(d):02d}')
+    return np.array(answer, dtype='datetime64[D]')
@@ -0,0 +1,131 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Portfolio DV01 and key rate DV01 by agent
+#
+# TERMS: DV01 - gain in value for a 1bp fall in yield, per 1 of face here so a position's DV01 is size * dv01PerUnit
+#        key rate DV01 - DV01 split into tenor buckets, each asset's DV01 is allocated to the two buckets either side
+#           of its maturity by linear interpolation (all to the first / last bucket outside the range)
+#
+# Positions are a [nAgents, nAssets] array. A trade adjusts the agent's totals by the trade's own risk so queries never
+# revalue the book - revalue() does the full matrix product when the per unit risks change, e.g. at end of day.
+
+
+# standard Python imports
+import collections
+import numpy as np
+
+# fitg imports
+from fitg.core import calcs
+from fitg.utils.exceptions import FitgError
+
+
+KEY_RATE_TENORS = (2, 5, 10, 30)        # years
+
+Risk = collections.namedtuple('Risk', ('totalDv01', 'keyRateDv01'))
+
+
+class RiskManager:
+
+    __slots__ = [
+        'tenors',
+        'assetNames', '_assetIdxByName',
+        'maturities',                   # [nAssets] years to maturity
+        'dv01PerUnit',                  # [nAssets]
+        '_krWeights',                   # [nAssets, nTenors] key rate allocation of each asset
+        '_krPerUnit',                   # [nAssets, nTenors] dv01PerUnit * weights
+        '_agentIdxByName',
+        '_positions',                   # [capacity, nAssets]
+        '_totals',                      # [capacity]
+        '_krs',                         # [capacity, nTenors]
+    ]
+
+    def __init__(self, assetNames, maturities, dv01PerUnit, tenors=KEY_RATE_TENORS):
+        self.tenors = np.asarray(tenors, dtype=np.float64)
+        self.assetNames = list(assetNames)
+        self._assetIdxByName = {n: i for i, n in enumerate(self.assetNames)}
+        self._agentIdxByName = {}
+        self._positions = np.zeros((8, len(self.assetNames)))
+        self._totals = np.zeros(8)
+        self._krs = np.zeros((8, len(self.tenors)))
+        self._setRisks(maturities, dv01PerUnit)
+
+    @classmethod
+    def fromBonds(cls, bonds, ytms, settleDt, tenors=KEY_RATE_TENORS) -> 'RiskManager':
+        """Keyed by bond alias with the risks at the given yields - matured bonds carry no risk."""
+        dv01PerUnit = np.nan_to_num(calcs.dv01(bonds, ytms, settleDt) / 100.0)
+        return cls([b.alias for b in bonds], _yearsToMaturity(bonds, settleDt), dv01PerUnit, tenors)
+
+
+    # TRADES
+
+    def onTrade(self, agent, asset, size):
+        """Applies a trade of size (+ve buy) in asset to agent's position and its risk totals."""
+        if (i := self._assetIdxByName.get(asset)) is None: raise FitgError(f'Unknown asset "{asset}"')
+        a = self._agentIdx(agent)
+        self._positions[a, i] += size
+        self._totals[a] += size * self.dv01PerUnit[i]
+        self._krs[a] += size * self._krPerUnit[i]
+
+
+    # QUERIES
+
+    def hasAsset(self, asset) -> bool:
+        return asset in self._assetIdxByName
+
+    def riskOf(self, agent) -> Risk:
+        if (a := self._agentIdxByName.get(agent)) is None: return Risk(0.0, (0.0,) * len(self.tenors))
+        return Risk(float(self._totals[a]), tuple(self._krs[a].tolist()))
+
+    def positionsOf(self, agent) -> dict:
+        if (a := self._agentIdxByName.get(agent)) is None: return {}
+        row = self._positions[a]
+        return {self.assetNames[i]: float(row[i]) for i in np.flatnonzero(row)}
+
+    @property
+    def agents(self):
+        return list(self._agentIdxByName)
+
+
+    # END OF DAY
+
+    def revalue(self, maturities=None, dv01PerUnit=None):
+        """Replaces the per unit risks (if given) and recomputes every agent's totals from their positions."""
+        self._setRisks(
+            self.maturities if maturities is None else maturities,
+            self.dv01PerUnit if dv01PerUnit is None else dv01PerUnit,
+        )
+        n = len(self._agentIdxByName)
+        self._totals[:n] = self._positions[:n] @ self.dv01PerUnit
+        self._krs[:n] = self._positions[:n] @ self._krPerUnit
+
+
+    # HELPERS
+
+    def _setRisks(self, maturities, dv01PerUnit):
+        self.maturities = np.asarray(maturities, dtype=np.float64)
+        self.dv01PerUnit = np.asarray(dv01PerUnit, dtype=np.float64)
+        eye = np.eye(len(self.tenors))
+        self._krWeights = np.stack([np.interp(self.maturities, self.tenors, eye[j]) for j in range(len(self.tenors))], axis=1)
+        self._krPerUnit = self._krWeights * self.dv01PerUnit[:, None]
+
+    def _agentIdx(self, agent):
+        if (a := self._agentIdxByName.get(agent)) is None:
+            a = self._agentIdxByName[agent] = len(self._agentIdxByName)
+            if a == len(self._totals):
+                # double the capacity
+                self._positions = np.concatenate([self._positions, np.zeros_like(self._positions)])
+                self._totals = np.concatenate([self._totals, np.zeros_like(self._totals)])
+                self._krs = np.concatenate([self._krs, np.zeros_like(self._krs)])
+        return a
+
+
+def _yearsToMaturity(bonds, settleDt):
+    mats = np.array([b.maturityDt for b in bonds], dtype='datetime64[D]')
+    return (mats - np.datetime64(settleDt, 'D')).astype(np.float64) / 365.25
@@ -44,32 +44,44 @@ BondFut.csvLine = csvLine
 
 
 BFBasketRule = collections.namedtuple(
-    'BondFut',
+    'BFBasketRule',
     (
-        'asOf',         # date
+        'asOf',         # date the rule applies from
         'bbgCode',
         'firstExpiry',
-        'lastExpiry',
         'exchange',
         'country',
         'ccy',
         'exCode',
-        'desc',
-        'ticker',
-        'refMat',
-        'minMat',
-        'maxMat',
-        'maxMatIssue',
-        'minAmt',       # float
+        'tickers',      # tuple of bond tickers that may be delivered
+        'refMat',       # int, nominal maturity in years
+        'minMat',       # int, minimum remaining maturity at delivery in months
+        'maxMat',       # int, maximum remaining maturity at delivery in months
+        'maxIssue',     # int, maximum original maturity in months
+        'dlvDates',
+        'minOut',       # float, minimum outstanding in millions
         'size',         # float
-        'cpn',          # float
+        'cpn',          # float, notional coupon
     )
 )
 def csvLine(*xs):
     xs = list(xs)
     xs[0] = datetime.datetime.strptime(xs[0], ISO_FMT).date()
+    xs[1] = xs[1].strip()
+    xs[7] = tuple(xs[7].split('|'))
+    xs[8] = int(xs[8])
+    xs[9] = tenorInMonths(xs[9])
+    xs[10] = tenorInMonths(xs[10])
+    xs[11] = tenorInMonths(xs[11])
+    xs[13] = float(xs[13])
     xs[14] = float(xs[14])
-    xs[14] = float(xs[15])
-    xs[14] = float(xs[16])
+    xs[15] = float(xs[15])
     return BFBasketRule(*xs)
 BFBasketRule.csvLine = csvLine
+
+
+def tenorInMonths(tenor):
+    # e.g. '1Y9M' -> 21, '11Y' -> 132, '6M' -> 6
+    years, _, months = tenor.upper().partition('Y')
+    if not _: years, months = '0', years
+    return int(years or 0) * 12 + int(months.rstrip('M') or 0)
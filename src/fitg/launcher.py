@@ -0,0 +1,228 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# Multi-process game launcher
+#
+# The launching process runs the hub Directory and the GameMaster on a MACHINE_MODE router, then spreads the agents
+# across a pool of worker processes, each with its own MACHINE_MODE router and a Directory that shares its entries
+# with the hub over ipc - so everything runs on one box with no external services. Agents with the same "group" are
+# put in the same worker (e.g. a venue and the dealers that hammer it) and groups are packed largest first onto the
+# least loaded worker. Agents start in stages - all of stage 1 (the venues and exchanges by default) across every
+# worker is up before stage 2 (everyone else) starts. Within a worker a stage's agents log in with one LOGIN_BULK and
+# start concurrently.
+#
+# CONFIG: {
+#   "workers": n,                   # default cpu count - 1
+#   "durationMs": ms,               # default run until interrupted
+#   "players": {player: pswd},      # GameMaster logins
+#   "login": {"user": player, "pswd": pswd},    # a user of "{name}" logs each agent in as its own player
+#   "agents": [{"type": ..., "name": "Dealer {i}", "count": n, "group": ..., "stage": ..., **kwargs}, ...]
+# }
+#
+# The GameMaster only clears trades reported by the token's own player, so agents that trade need to log in as
+# themselves - with the default "{name}" login every agent is a player with the login's pswd.
+#
+# kwargs are passed to the agent's constructor, "$bonds" and "$bondFuts" are replaced by the reference data and
+# "$bonds:DBR" by the bonds whose alias starts with DBR.
+#
+#   python -m fitg.launcher game.json
+
+
+# Python imports
+import asyncio, datetime, json, logging, multiprocessing, os, queue, sys
+
+# vlmessaging imports
+from vlmessaging import Router, VLM, Directory
+from vlmessaging.utils import co
+
+# fitg imports
+from fitg.agents.core import GameMaster, BondVenue, Exchange, SimpleBondDealer, SimpleBondLiquidityTaker, CurveService
+from fitg.agents.bootstrap import startInStages, stopAll
+from fitg.agents.simple_bond_dealer import startingYtms
+from fitg.core.ref_data import RefData
+from fitg.core.risk_manager import RiskManager
+
+_log = logging.getLogger(__name__)
+
+
+AGENT_TYPES = {c.__name__: c for c in (BondVenue, Exchange, SimpleBondDealer, SimpleBondLiquidityTaker, CurveService)}
+STAGE_BY_TYPE = {'BondVenue': 1, 'Exchange': 1}
+DEFAULT_STAGE = 2
+WORKER_POLL_MS = 200
+
+DEFAULT_CONFIG = {
+    'workers': None,
+    'durationMs': None,
+    'players': {'gamemaster': 'fred'},
+    'login': {'user': '{name}', 'pswd': 'fred'},
+    'agents': [
+        {'type': 'BondVenue', 'name': 'TWEB', 'assets': '$bonds'},
+        {'type': 'Exchange', 'name': 'EUREX', 'assets': '$bondFuts'},
+        {'type': 'SimpleBondDealer', 'name': 'Dealer {i}', 'count': 4, 'bondVenues': ['TWEB'], 'futExchanges': ['EUREX'],
+            'assets': '$bonds'},
+        {
+            'type': 'SimpleBondLiquidityTaker', 'name': 'Taker {i}', 'count': 1, 'bondVenues': ['TWEB'],
+            'futExchanges': ['EUREX'], 'assetsOfInterest': '$bonds:DBR',
+        },
+        {'type': 'CurveService', 'name': 'TWEB Curve', 'bondVenue': 'TWEB', 'assets': '$bonds'},
+    ],
+}
+
+dataFolder = os.path.join(os.path.dirname(__file__), 'data')
+
+
+# PLACEMENT
+
+def expandAgents(config) -> list[dict]:
+    """Answers one spec per agent - {'type', 'name', 'group', 'stage', 'kwargs'} - with the counts expanded."""
+    answer = []
+    for a in config['agents']:
+        a = dict(a)
+        tName, name, count = a.pop('type'), a.pop('name'), a.pop('count', 1)
+        if tName not in AGENT_TYPES: raise ValueError(f'Unknown agent type "{tName}"')
+        group, stage = a.pop('group', None), a.pop('stage', STAGE_BY_TYPE.get(tName, DEFAULT_STAGE))
+        for i in range(count):
+            n = name.format(i=i + 1)
+            answer.append({'type': tName, 'name': n, 'group': group or n, 'stage': stage, 'kwargs': a})
+    return answer
+
+def playersFor(config, specs) -> dict:
+    """Answers the GameMaster's {player: pswd} - the configured players and, for a "{name}" login, every agent."""
+    user, pswd = config['login']['user'], config['login']['pswd']
+    return config['players'] | {user.format(name=spec['name']): pswd for spec in specs}
+
+def loginFor(login, name) -> dict:
+    return {'user': login['user'].format(name=name), 'pswd': login['pswd']}
+
+def placeAgents(specs, nWorkers) -> list[list[dict]]:
+    """Answers the specs for each worker keeping groups together."""
+    specsByGroup = {}
+    for spec in specs:
+        specsByGroup.setdefault(spec['group'], []).append(spec)
+    answer = [[] for _ in range(nWorkers)]
+    for group in sorted(specsByGroup.values(), key=len, reverse=True):
+        min(answer, key=len).extend(group)
+    return [w for w in answer if w]
+
+
+# LAUNCHING PROCESS
+
+def run_game(config=None):
+    config = DEFAULT_CONFIG | (config or {})
+    nWorkers = config['workers'] or max(os.cpu_count() - 1, 1)
+    specs = expandAgents(config)
+    players = playersFor(config, specs)
+    placement = placeAgents(specs, nWorkers)
+    stages = sorted({spec['stage'] for w in placement for spec in w})
+    hubEp = f'ipc:///tmp/hub_fitg_{os.getpid()}'
+    ctx = multiprocessing.get_context('spawn')
+    statusQ = ctx.Queue()
+
+    async def _():
+        loop = asyncio.get_running_loop()
+        r = Router(mode=VLM.MACHINE_MODE)
+        d = Directory(r, vnets=[VLM.LOCAL_VNET], hubListen=hubEp)
+        bonds, settleDt = RefData.load(dataFolder).bonds.rows(), datetime.date.today()
+        riskManager = RiskManager.fromBonds(bonds, startingYtms(bonds, settleDt), settleDt)
+        gm = await GameMaster(r, 'fitg', players, riskManager=riskManager).start(vnets=[VLM.LOCAL_VNET])
+
+        workers = []
+        for i, specs in enumerate(placement):
+            cmdQ = ctx.Queue()
+            p = ctx.Process(target=_workerMain, args=(i, specs, hubEp, config['login'], cmdQ, statusQ), daemon=True)
+            p.start()
+            workers.append((p, cmdQ))
+        try:
+            for stage in stages:
+                for _, cmdQ in workers: cmdQ.put(('start', stage))
+                waiting = dict(enumerate(p for p, _ in workers))
+                while waiting:
+                    try:
+                        status, workerId, details = await loop.run_in_executor(None, _getStatus, statusQ)
+                    except queue.Empty:
+                        # a worker that died (e.g. killed, or crashed in native code) never reports so check on them
+                        for i, p in waiting.items():
+                            if not p.is_alive(): raise RuntimeError(f'worker {i} died in stage {stage} ({p.exitcode})')
+                        continue
+                    if status != 'started': raise RuntimeError(f'worker {workerId} failed to start stage {stage}: {details}')
+                    _log.info(f'worker {workerId} started {details}')
+                    del waiting[workerId]
+            _log.info(f'game running - {sum(map(len, placement))} agents in {len(workers)} workers')
+            if config['durationMs']:
+                await co.until(r.hasShutdown, timeout=config['durationMs'])
+            else:
+                await co.until(r.hasShutdown)
+        finally:
+            for _, cmdQ in workers: cmdQ.put(('stop', None))
+            for p, _ in workers: await loop.run_in_executor(None, p.join, 5)
+            for p, _ in workers:
+                if p.is_alive(): p.terminate()
+            await gm.stop()
+            r.shutdown()
+            await co.until(r.hasShutdown)
+
+    co.startEventLoopWith(_)
+
+def _getStatus(statusQ):
+    return statusQ.get(timeout=WORKER_POLL_MS / 1000)
+
+
+# WORKER PROCESS
+
+def _workerMain(workerId, specs, hubEp, login, cmdQ, statusQ):
+    asyncio.run(_runWorker(workerId, specs, hubEp, login, cmdQ, statusQ))
+
+async def _runWorker(workerId, specs, hubEp, login, cmdQ, statusQ):
+    loop = asyncio.get_running_loop()
+    try:
+        refData = RefData.load(dataFolder)
+        r = Router(mode=VLM.MACHINE_MODE)
+        d = Directory(r, vnets=[VLM.LOCAL_VNET], hubs=[hubEp])
+    except Exception as ex:
+        statusQ.put(('failed', workerId, repr(ex)))
+        return
+    agents = []
+    while True:
+        cmd, stage = await loop.run_in_executor(None, cmdQ.get)
+        if cmd == 'stop': break
+        try:
+            staged = []
+            for spec in specs:
+                if spec['stage'] != stage: continue
+                kwargs = {k: _resolve(v, refData) for k, v in spec['kwargs'].items()} | loginFor(login, spec['name'])
+                staged.append(AGENT_TYPES[spec['type']](r, name=spec['name'], **kwargs))
+            agents.extend(await startInStages([staged], vnets=[VLM.LOCAL_VNET]))
+            names = [a.name for a in staged]
+        except Exception as ex:
+            statusQ.put(('failed', workerId, repr(ex)))
+            break
+        statusQ.put(('started', workerId, names))
+    await stopAll(agents)
+    r.shutdown()
+    await co.until(r.hasShutdown)
+
+def _resolve(v, refData):
+    if not isinstance(v, str) or not v.startswith('$'): return v
+    what, _, prefix = v[1:].partition(':')
+    rows = {'bonds': refData.bonds, 'bondFuts': refData.bondFuts}[what].rows()
+    return [x for x in rows if x.alias.startswith(prefix)] if prefix else rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    config = None
+    if argv:
+        with open(argv[0]) as f:
+            config = json.load(f)
+    run_game(config)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
@@ -0,0 +1,102 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# pytest fixtures and helpers shared by the tests - run with
+#
+#   python -m pytest src/fitg/tests
+#
+# Agent tests send real messages through a LOCAL_MODE Router - playGame(fn) runs fn(router, gm) with a Directory and a
+# GameMaster up, and a Client is a bare connection that records what it's sent and can auto reply by subject.
+
+
+# Python imports
+import asyncio, datetime, os, sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# 3rd party imports
+import pytest
+
+# vlmessaging imports
+from vlmessaging import Router, VLM, Directory, Msg, Entry
+from vlmessaging.utils import co, Missing
+
+# fitg imports
+from fitg.agents.game_master import GameMaster
+from fitg.core.ref_data import RefData
+
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'data')
+SETTLE_DT = datetime.date(2026, 10, 19)
+PLAYERS = {'gamemaster': 'fred'}
+LOGIN = {'user': 'gamemaster', 'pswd': 'fred'}
+
+
+@pytest.fixture(scope='session')
+def refData():
+    return RefData.load(DATA_FOLDER)
+
+@pytest.fixture(scope='session')
+def bonds(refData):
+    return refData.bonds.rows()
+
+@pytest.fixture(scope='session')
+def liveBonds(bonds):
+    return [b for b in bonds if b.maturityDt > SETTLE_DT]
+
+
+# MESSAGING
+
+def playGame(fn, players=PLAYERS, **gmKwargs):
+    """Runs fn(router, gm) to completion on a fresh LOCAL_MODE router, answering its result."""
+    async def _():
+        r = Router(mode=VLM.LOCAL_MODE)
+        Directory(r)
+        gm = await GameMaster(r, 'fitg', players, **gmKwargs).start()
+        try:
+            return await fn(r, gm)
+        finally:
+            await gm.stop()
+            r.shutdown()
+            await co.until(r.hasShutdown)
+    return asyncio.run(_())
+
+
+class Client:
+    """A bare connection standing in for an agent."""
+
+    def __init__(self, router, replyFnBySubject=None):
+        self.inbox = []
+        self.replyFnBySubject = replyFnBySubject or {}
+        self.conn = router.newConnection(self._msgArrived)
+
+    @property
+    def addr(self):
+        return self.conn.addr
+
+    async def ask(self, addr, subject, contents=None, timeout=1000, additional_subjects=Missing):
+        return await self.conn.send(Msg(addr, subject, contents), timeout, additional_subjects)
+
+    def received(self, subject):
+        return [m.contents for m in self.inbox if m.subject == subject]
+
+    async def registerAs(self, entryType, params):
+        # lists this connection in the Directory, e.g. as a venue for an agent to find
+        entry = Entry(self.addr, entryType, params, [], None)
+        await self.conn.send(Msg(self.conn.directoryAddr, VLM.REGISTER_ENTRY, entry), 500)
+
+    async def _msgArrived(self, msg):
+        self.inbox.append(msg)
+        if (fn := self.replyFnBySubject.get(msg.subject)) is not None and (contents := fn(msg.contents)) is not None:
+            await self.conn.send(msg.reply(contents))
+
+
+async def settle(ms=20):
+    # lets messages in flight be delivered
+    await asyncio.sleep(ms / 1000)
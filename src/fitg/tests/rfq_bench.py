@@ -0,0 +1,312 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+# RFQ throughput and latency benchmark
+#
+# Starts a GameMaster and n BondVenues as rfq_play does, then drives them with minimal bench dealers (SUBMIT_INDIC at
+# a target rate, answering every RFQ_QUOTE_FOR) and bench takers (RFQ_START -> RFQ_QUOTES -> RFQ_ACCEPT at a target
+# rate). Latencies are wall clock (perf_counter_ns) even with --sim, where the pacing is on virtual time and the run
+# goes as fast as the agents can process. --packed has the dealers send SUBMIT_INDIC_PACKED rather than SUBMIT_INDIC.
+# Results are written as JSON, e.g.
+#
+#   python -m fitg.tests.rfq_bench --dealers 8 --takers 4 --venues 2 --assets 200 --indicRate 20 --rfqRate 5 --sim
+#
+# STEPS: SUBMIT_INDIC - send to reply
+#        RFQ_START - send to the venue id reply
+#        RFQ_QUOTES - RFQ_START sent to the quotes arriving at the taker
+#        RFQ_ACCEPT - send to the trade reply
+#        RFQ - end to end, RFQ_START sent to the trade reply
+
+
+# Python imports
+import argparse, asyncio, itertools, json, os, random, sys, time
+import numpy as np
+
+# vlmessaging imports
+from vlmessaging import Msg, Router, VLM, Directory
+from vlmessaging.utils import co, Missing
+
+# fitg imports
+from fitg.agents.core import GameMaster, BondVenue
+from fitg.agents.bond_venue import packIndications
+from fitg.agents._game_agent_base import GameAgent, handles
+from fitg.core.ref_data import RefData
+from fitg._utils.sim_clock import SimRouter, startSimEventLoopWith
+
+
+SEND_TIMEOUT_MS = 10_000
+STEPS = ('SUBMIT_INDIC', 'RFQ_START', 'RFQ_QUOTES', 'RFQ_ACCEPT', 'RFQ')
+
+dataFolder = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class BenchStats:
+
+    __slots__ = ['nsByStep', 'timeoutsByStep', 'countByOutcome']
+
+    def __init__(self):
+        self.nsByStep = {step: [] for step in STEPS}
+        self.timeoutsByStep = dict.fromkeys(STEPS, 0)
+        self.countByOutcome = {}
+
+    def record(self, step, startNs):
+        self.nsByStep[step].append(time.perf_counter_ns() - startNs)
+
+    def timedOut(self, step):
+        self.timeoutsByStep[step] += 1
+
+    def outcome(self, what):
+        self.countByOutcome[what] = self.countByOutcome.get(what, 0) + 1
+
+    def report(self, config, wallSecs, gameSecs) -> dict:
+        steps = {}
+        for step, xs in self.nsByStep.items():
+            us = np.asarray(xs, dtype=np.float64) / 1000.0
+            p50, p99, p999 = np.percentile(us, [50, 99, 99.9]).tolist() if len(us) else (None, None, None)
+            steps[step] = {
+                'count': len(us), 'perSec': len(us) / wallSecs if wallSecs else None, 'timeouts': self.timeoutsByStep[step],
+                'p50Us': p50, 'p99Us': p99, 'p999Us': p999, 'maxUs': float(us.max()) if len(us) else None,
+            }
+        return {'config': config, 'wallSecs': wallSecs, 'gameSecs': gameSecs, 'steps': steps, 'outcomes': self.countByOutcome}
+
+
+
+class BenchDealer(GameAgent):
+    ENTRY_TYPE = 'BenchDealer'
+
+    __slots__ = [
+        'venueAddrs', 'assets', 'midByAsset', 'spread', 'batch', 'intervalMs', 'benchStats', 'rng', '_tasks',
+        'packed', 'idByAssetByVenueAddr',
+    ]
+
+    def __init__(self, router, *, venueAddrs, assets, indicRate, batch, stats, seed, packed=False, **kwargs):
+        super().__init__(router, **kwargs)
+        self.venueAddrs = venueAddrs
+        self.packed = packed
+        self.idByAssetByVenueAddr = {}
+        self.assets = assets
+        self.rng = random.Random(seed)
+        self.midByAsset = {a: 100.0 + self.rng.uniform(-5, 5) for a in assets}
+        self.spread = 0.05
+        self.batch = min(batch, len(assets))
+        self.intervalMs = 1000.0 / indicRate
+        self.benchStats = stats
+        self._tasks = set()
+
+    async def start(self):
+        for addr in self.venueAddrs:
+            if (reply := await self.conn.send(Msg(addr, BondVenue.REGISTER_PROVIDER, self.name), SEND_TIMEOUT_MS)) is Missing:
+                raise Exception(f'{self.name} failed to register with {addr}')
+            self.idByAssetByVenueAddr[addr] = {a: i for i, a in enumerate(reply.contents)}
+        await self.submitIndications(self.assets)          # so every asset can be RFQ'd from the start
+        self.running = True
+        self.conn.scheduleFn(self.tick, after=self.rng.uniform(0, self.intervalMs))
+        return self
+
+    async def stop(self):
+        self.running = False
+        self.conn._router.unscheduleFn(self.tick)
+
+    async def tick(self):
+        if not self.running: return
+        moved = self.rng.sample(self.assets, self.batch)
+        for a in moved:
+            self.midByAsset[a] += self.rng.choice((-0.01, 0.01))
+        _spawn(self._tasks, self.submitIndications(moved))
+        self.conn.scheduleFn(self.tick, after=self.intervalMs)
+
+    async def submitIndications(self, assets):
+        h = self.spread / 2
+        indications = [(a, self.midByAsset[a] - h, self.midByAsset[a] + h) for a in assets]
+        for addr in self.venueAddrs:
+            t0 = time.perf_counter_ns()
+            if self.packed:
+                idByAsset = self.idByAssetByVenueAddr[addr]
+                mids = np.array([self.midByAsset[a] for a in assets])
+                msg = Msg(addr, BondVenue.SUBMIT_INDIC_PACKED, packIndications([idByAsset[a] for a in assets], mids - h, mids + h))
+            else:
+                msg = Msg(addr, BondVenue.SUBMIT_INDIC, indications)
+            if await self.conn.send(msg, SEND_TIMEOUT_MS) is Missing:
+                self.benchStats.timedOut('SUBMIT_INDIC')
+            else:
+                self.benchStats.record('SUBMIT_INDIC', t0)
+
+    @handles(BondVenue.RFQ_QUOTE_FOR)
+    async def _onRfqQuoteFor(self, msg):
+        venueId, asset, size = msg.contents
+        mid = self.midByAsset.get(asset, 100.0)
+        await self.conn.send(msg.reply((venueId, mid + self.spread / 2 if size > 0 else mid - self.spread / 2)))
+
+    @handles(BondVenue.RFQ_ACCEPTED, BondVenue.RFQ_NEAR_MISS, BondVenue.RFQ_NO_TRADE)
+    async def _onRfqOutcome(self, msg):
+        self.benchStats.outcome(f'dealer {msg.subject}')
+
+
+
+class BenchTaker(GameAgent):
+    ENTRY_TYPE = 'BenchTaker'
+
+    __slots__ = ['venueAddrs', 'assets', 'providers', 'intervalMs', 'benchStats', 'rng', '_takerIdSeed', '_pendingByTakerId', '_tasks']
+
+    def __init__(self, router, *, venueAddrs, assets, providers, rfqRate, stats, seed, **kwargs):
+        super().__init__(router, **kwargs)
+        self.venueAddrs = venueAddrs
+        self.assets = assets
+        self.providers = providers
+        self.intervalMs = 1000.0 / rfqRate
+        self.benchStats = stats
+        self.rng = random.Random(seed)
+        self._takerIdSeed = itertools.count(1)
+        self._pendingByTakerId = {}     # future for the RFQ_QUOTES by takerId
+        self._tasks = set()
+
+    async def start(self):
+        for addr in self.venueAddrs:
+            if await self.conn.send(Msg(addr, BondVenue.REGISTER_TAKER, self.name), SEND_TIMEOUT_MS) is Missing:
+                raise Exception(f'{self.name} failed to register with {addr}')
+        self.running = True
+        self.conn.scheduleFn(self.tick, after=self.rng.uniform(0, self.intervalMs))
+        return self
+
+    async def stop(self):
+        self.running = False
+        self.conn._router.unscheduleFn(self.tick)
+
+    async def tick(self):
+        if not self.running: return
+        _spawn(self._tasks, self.runRfq())
+        self.conn.scheduleFn(self.tick, after=self.intervalMs)
+
+    async def runRfq(self):
+        venueAddr = self.rng.choice(self.venueAddrs)
+        takerId = next(self._takerIdSeed)
+        size = self.rng.choice((-1, 1)) * self.rng.choice((1, 2, 5, 10))
+        quotes = asyncio.get_running_loop().create_future()
+        t0 = time.perf_counter_ns()
+        self._pendingByTakerId[takerId] = quotes
+        try:
+            msg = Msg(venueAddr, BondVenue.RFQ_START, (takerId, self.rng.choice(self.assets), size, self.providers))
+            reply = await self.conn.send(msg, SEND_TIMEOUT_MS, additional_subjects=[BondVenue.RFQ_NO_TRADE])
+            if reply is Missing: return self.benchStats.timedOut('RFQ_START')
+            self.benchStats.record('RFQ_START', t0)
+            if reply.subject == BondVenue.RFQ_NO_TRADE: return self.benchStats.outcome('taker RFQ_START refused')
+            done, _ = await co.until(quotes, timeout=SEND_TIMEOUT_MS)
+            if not done: return self.benchStats.timedOut('RFQ_QUOTES')
+            self.benchStats.record('RFQ_QUOTES', t0)
+            venueId, ranked = quotes.result()
+            if not ranked: return self.benchStats.outcome('taker no quotes')
+            t1 = time.perf_counter_ns()
+            reply = await self.conn.send(
+                Msg(venueAddr, BondVenue.RFQ_ACCEPT, venueId), SEND_TIMEOUT_MS, additional_subjects=[BondVenue.RFQ_NO_TRADE]
+            )
+            if reply is Missing: return self.benchStats.timedOut('RFQ_ACCEPT')
+            self.benchStats.record('RFQ_ACCEPT', t1)
+            self.benchStats.record('RFQ', t0)
+            self.benchStats.outcome(f'taker {reply.subject}')
+        finally:
+            self._pendingByTakerId.pop(takerId, None)
+
+    @handles(BondVenue.RFQ_QUOTES)
+    async def _onRfqQuotes(self, msg):
+        venueId, takerId, ranked = msg.contents
+        if (quotes := self._pendingByTakerId.get(takerId)) is not None and not quotes.done():
+            quotes.set_result((venueId, ranked))
+
+    @handles(BondVenue.RFQ_NO_TRADE)
+    async def _onRfqNoTrade(self, msg):
+        self.benchStats.outcome('taker RFQ_NO_TRADE (timed out)')
+
+
+def _spawn(tasks, coro):
+    # keep a reference so the task isn't collected mid flight
+    task = asyncio.get_running_loop().create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+def run_rfq_bench(*, dealers, takers, venues, assets, indicRate, rfqRate, indicBatch, durationMs, simulated, seed=1, packed=False) -> dict:
+    config = dict(
+        dealers=dealers, takers=takers, venues=venues, assets=assets, indicRate=indicRate, rfqRate=rfqRate,
+        indicBatch=indicBatch, durationMs=durationMs, simulated=simulated, seed=seed, packed=packed,
+    )
+    bonds = RefData.load(dataFolder).bonds.rows()[:assets]
+    assetNames = [b.alias for b in bonds]
+    stats = BenchStats()
+    answer = {}
+
+    async def _():
+        r = SimRouter() if simulated else Router(mode=VLM.LOCAL_MODE)
+        d = Directory(r)
+        unpswd = {'user': 'gamemaster', 'pswd': 'fred'}
+        gm = await GameMaster(r, 'fitg', {'gamemaster': 'fred'}).start()
+        vs = [await BondVenue(r, name=f'VENUE{i}', assets=bonds, **unpswd).start() for i in range(venues)]
+        venueAddrs = [v.conn.addr for v in vs]
+        providers = [f'DEALER{i}' for i in range(dealers)]
+        ds = [
+            await BenchDealer(
+                r, name=name, venueAddrs=venueAddrs, assets=assetNames, indicRate=indicRate, batch=indicBatch,
+                stats=stats, seed=seed * 1000 + i, packed=packed, **unpswd
+            ).start()
+            for i, name in enumerate(providers)
+        ]
+        ts = [
+            await BenchTaker(
+                r, name=f'TAKER{i}', venueAddrs=venueAddrs, assets=assetNames, providers=providers, rfqRate=rfqRate,
+                stats=stats, seed=seed * 1000 + 500 + i, **unpswd
+            ).start()
+            for i in range(takers)
+        ]
+        stats.__init__()                                # exclude the start up traffic
+        for a in [gm] + vs: a.stats.reset()
+        wall0, game0 = time.perf_counter(), asyncio.get_running_loop().time()
+        await co.until(timeout=durationMs)
+        for a in ds + ts: await a.stop()
+        wallSecs, gameSecs = time.perf_counter() - wall0, asyncio.get_running_loop().time() - game0
+        answer.update(stats.report(config, wallSecs, gameSecs))
+        answer['agentStats'] = {a.name: a.stats.snapshot() for a in [gm] + vs}
+        r.shutdown()
+        await co.until(r.hasShutdown)
+
+    if simulated:
+        startSimEventLoopWith(_)
+    else:
+        co.startEventLoopWith(_)
+    return answer
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='RFQ throughput and latency benchmark')
+    p.add_argument('--dealers', type=int, default=4)
+    p.add_argument('--takers', type=int, default=2)
+    p.add_argument('--venues', type=int, default=1)
+    p.add_argument('--assets', type=int, default=100)
+    p.add_argument('--indicRate', type=float, default=10.0, help='SUBMIT_INDICs per second per dealer')
+    p.add_argument('--indicBatch', type=int, default=10, help='assets moved per SUBMIT_INDIC')
+    p.add_argument('--rfqRate', type=float, default=2.0, help='RFQs per second per taker')
+    p.add_argument('--durationMs', type=float, default=10_000)
+    p.add_argument('--sim', action='store_true', help='pace on virtual time, i.e. as fast as possible')
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--packed', action='store_true', help='dealers send SUBMIT_INDIC_PACKED')
+    p.add_argument('--out', help='file for the JSON results, stdout by default')
+    args = p.parse_args(argv)
+    results = run_rfq_bench(
+        dealers=args.dealers, takers=args.takers, venues=args.venues, assets=args.assets, indicRate=args.indicRate,
+        rfqRate=args.rfqRate, indicBatch=args.indicBatch, durationMs=args.durationMs, simulated=args.sim, seed=args.seed,
+        packed=args.packed,
+    )
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
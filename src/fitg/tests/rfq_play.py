@@ -10,74 +10,86 @@
 # starts up bond trading agents in a single process on a single machine for playing with
 
 # Python imports
-import os, csv, datetime, sys
+import datetime, logging, os, sys
 
 # vlmessaging imports
-from vlmessaging import Msg, Addr, Router, VLM, Directory, Entry
-from vlmessaging.utils import co, wip, Missing, logging
-from vlmessaging._utils.utils import Timer
-from vlmessaging._utils.errors import NotYetImplemented
+from vlmessaging import Router, VLM, Directory
+from vlmessaging.utils import co
 
-
-from fitg.agents.core import GameMaster, BondVenue, SimpleBondDealer, SimpleBondLiquidityTaker, Exchange
-from fitg.core import structs
+# fitg imports
+from fitg.agents.core import GameMaster, BondVenue, SimpleBondDealer, SimpleBondLiquidityTaker, Exchange, CurveService
+from fitg.agents.bootstrap import startInStages
+from fitg.agents.simple_bond_dealer import startingYtms
+from fitg.core.ref_data import RefData
+from fitg.core.risk_manager import RiskManager
+from fitg._utils.sim_clock import SimRouter, startSimEventLoopWith
 
 _log = logging.getLogger(__name__)
 
+# every agent logs in as its own player as the GameMaster only clears trades reported by the token's player
 pswdByName = {
-    'gamemaster' : 'fred',
+    name: 'fred' for name in [
+        'TWEB', 'EUREX', 'TWEB Curve',
+        'Blackman Sucks', 'Squirrel Lench', 'Sack Jon', 'Coloring In Book Co', 'Brown Block',
+    ]
 }
 
-dataFolder = os.path.join(os.path.dirname(__file__), '..', 'data')
+def login(name):
+    return {'name': name, 'user': name, 'pswd': pswdByName[name]}
 
-bondFfn = os.path.join(dataFolder, 'bonds.csv')
-with open(bondFfn, 'r') as f:
-    bonds = [structs.BulletBond.csvLine(*line) for line in list(csv.reader(f))[1:]]
+dataFolder = os.path.join(os.path.dirname(__file__), '..', 'data')
 
-bontFutsFfn = os.path.join(dataFolder, 'bond_futs.csv')
-with open(bontFutsFfn, 'r') as f:
-    bondFuts = [structs.BondFut.csvLine(*line) for line in list(csv.reader(f))[1:]]
+refData = RefData.load(dataFolder)
+bonds = refData.bonds.rows()
+bondFuts = refData.bondFuts.rows()
 
-basketRulesFfn = os.path.join(dataFolder, 'basket_rules.csv')
-with open(basketRulesFfn, 'r') as f:
-    basketRules = [structs.BFBasketRule.csvLine(*line) for line in list(csv.reader(f))[1:]]
+TRADING_DAY_MS = 8 * 60 * 60 * 1000
 
-def run_rfq_play():
+def run_rfq_play(simulated=False, durationMs=TRADING_DAY_MS):
+    # simulated runs on virtual time, as fast as the CPU allows, and stops after durationMs of game time
 
     async def _():
-        r = Router(mode=VLM.LOCAL_MODE)
+        r = SimRouter() if simulated else Router(mode=VLM.LOCAL_MODE)
         d = Directory(r)
 
-        unpswd = {'user':'gamemaster', 'pswd':'fred'}
+        settleDt = datetime.date.today()
+        gm = GameMaster(r, 'fitg', pswdByName, riskManager=RiskManager.fromBonds(bonds, startingYtms(bonds, settleDt), settleDt))
 
-        gm = await GameMaster(r, 'fitg', pswdByName).start()
-
-        tweb = await BondVenue(r, name='TWEB', assets=bonds, **unpswd).start()
-        eurex = await Exchange(r, name='EUREX', assets=bondFuts, **unpswd).start()
+        tweb = BondVenue(r, assets=bonds, **login('TWEB'))
+        eurex = Exchange(r, assets=bondFuts, **login('EUREX'))
 
         venues = {'bondVenues':['TWEB'], 'futExchanges':['EUREX']}
+        quoting = {'assets':bonds}
 
-        blackmanSucks = await SimpleBondDealer(r, name='Blackman Sucks', **(venues | unpswd)).start()
-        squirrelLench = await SimpleBondDealer(r, name='Squirrel Lench', **(venues | unpswd)).start()
-        sackJon = await SimpleBondDealer(r, name='Sack Jon', **(venues | unpswd)).start()
-        cibc = await SimpleBondDealer(r, name='Coloring In Book Co', **(venues | unpswd)).start()
+        blackmanSucks = SimpleBondDealer(r, **(venues | quoting | login('Blackman Sucks')))
+        squirrelLench = SimpleBondDealer(r, **(venues | quoting | login('Squirrel Lench')))
+        sackJon = SimpleBondDealer(r, **(venues | quoting | login('Sack Jon')))
+        cibc = SimpleBondDealer(r, **(venues | quoting | login('Coloring In Book Co')))
 
         assets = {
             'assetsOfInterest':[b for b in bonds if b.alias.startswith('DBR')] #and b.maturityDt > 5 and b.maturityDt < 12]
         }
-        brownBlock = await SimpleBondLiquidityTaker(r, name='Brown Block', **(venues | assets | unpswd)).start()
+        brownBlock = SimpleBondLiquidityTaker(r, **(venues | assets | login('Brown Block')))
+
+        twebCurve = CurveService(r, bondVenue='TWEB', assets=bonds, **login('TWEB Curve'))
+
+        await startInStages([[gm], [tweb, eurex], [blackmanSucks, squirrelLench, sackJon, cibc, brownBlock, twebCurve]])
 
+        if simulated:
+            await co.until(r.hasShutdown, timeout=durationMs)
+            r.shutdown()
         await co.until(r.hasShutdown)
 
-    co.startEventLoopWith(_)
+    if simulated:
+        startSimEventLoopWith(_)
+    else:
+        co.startEventLoopWith(_)
 
 
 def main():
-    run_rfq_play()
-    'done' >> _log.info
+    run_rfq_play(simulated='--sim' in sys.argv)
+    _log.info('done')
 
 if __name__ == '__main__':
-    sink = logging.StreamSink(sys.stdout, formatter=logging.Formatter('%(message)s'))
-    logging.getLogger('fitb') >> sink
-    with logging.configure(levels={'fitb.*':logging.INFO}):
-        main()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    main()
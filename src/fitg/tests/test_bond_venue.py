@@ -0,0 +1,115 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import numpy as np
+import pytest
+
+from fitg.agents.bond_venue import BondVenue, ASSET_ID_DTYPE, packIndications, unpackIndications
+from fitg.utils.exceptions import FitgError
+from vlmessaging.utils import Missing
+from conftest import LOGIN, Client, playGame, settle
+
+
+def _venueGame(bonds, fn):
+    async def _(r, gm):
+        venue = await BondVenue(r, name='TWEB', assets=bonds[:4], **LOGIN).start()
+        try:
+            return await fn(r, venue)
+        finally:
+            await venue.stop()
+    return playGame(_)
+
+
+def test_packedIndicationsRoundTrip():
+    packed = packIndications([3, 0, 7], [99.0, np.nan, 101.25], [99.5, np.nan, 101.5])
+    assert [len(b) for b in packed] == [12, 24, 24]
+    ids, bids, asks = unpackIndications(packed)
+    assert ids.dtype == ASSET_ID_DTYPE and bids.dtype == asks.dtype == np.float64
+    assert ids.tolist() == [3, 0, 7] and asks.tolist()[::2] == [99.5, 101.5]
+    assert np.isnan(bids[1]) and np.isnan(asks[1])                  # NaN survives - it's the withdraw
+    assert not ids.flags.writeable
+    assert [len(x) for x in unpackIndications(packIndications([], [], []))] == [0, 0, 0]
+
+def test_packedIndicationsThatDontLineUpRaise():
+    with pytest.raises(FitgError):
+        packIndications([1, 2], [99.0], [99.5])
+    ids, bids, asks = packIndications([1, 2], [99.0, 98.0], [99.5, 98.5])
+    for bad in [(ids, bids[:8], asks), (ids, bids, asks + bytes(8)), (ids[:-1], bids, asks)]:
+        with pytest.raises(FitgError):
+            unpackIndications(bad)
+
+def test_providersAreKnownByTheirAddress(bonds):
+    async def _(r, venue):
+        p1, p2 = Client(r), Client(r)
+        reply = await p1.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P1')
+        assert reply.contents == [b.alias for b in bonds[:4]]
+        await p2.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P2')
+        assert venue.providerNameByAddr == {p1.addr: 'P1', p2.addr: 'P2'}
+        await settle()
+        assert p1.received(BondVenue.PROVIDER_JOINED) == ['P2']
+        assert (await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(bonds[0].alias, 99.0, 99.5)])).contents is True
+        stranger = await Client(r).ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(bonds[1].alias, 1.0, 2.0)], 200)
+        assert stranger is Missing                              # unknown providers aren't answered
+        return venue.compositeByAsset()
+    assert _venueGame(bonds, _) == {bonds[0].alias: [99.0, 99.5]}
+
+def test_compositesAverageTheProviders(bonds):
+    a, b = bonds[0].alias, bonds[1].alias
+    async def _(r, venue):
+        p1, p2 = Client(r), Client(r)
+        await p1.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P1')
+        await p2.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P2')
+        await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.0, 99.5), (b, 98.0, 98.5)])
+        await p2.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.2, 99.7)])
+        await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.4, 99.9)])        # replaces P1's earlier one
+        return (await p1.ask(venue.conn.addr, BondVenue.GET_COMPOSITES)).contents
+    composites = _venueGame(bonds, _)
+    assert composites == {a: pytest.approx([99.3, 99.8]), b: [98.0, 98.5]}
+
+def test_unregisteringAProviderTakesItOutOfTheComposites(bonds):
+    a, b = bonds[0].alias, bonds[1].alias
+    async def _(r, venue):
+        p1, p2, sub = Client(r), Client(r), Client(r)
+        await p1.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P1')
+        await p2.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P2')
+        await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.0, 99.5), (b, 98.0, 98.5)])
+        await p2.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.2, 99.7)])
+        seq, _ = (await sub.ask(venue.conn.addr, BondVenue.SUBSCRIBE_COMPOSITES, 'sub')).contents
+        await p1.ask(venue.conn.addr, BondVenue.UNREGISTER_PROVIDER, 'P1')
+        await settle()
+        assert not venue._isQuoting('P1', a) and venue._isQuoting('P2', a)
+        assert sub.received(BondVenue.COMPOSITE_DELTA) == [(seq + 1, {a: pytest.approx([99.2, 99.7]), b: None})]
+        assert p2.received(BondVenue.PROVIDER_LEFT) == ['P1']
+        return venue.compositeByAsset()
+    assert _venueGame(bonds, _) == {a: pytest.approx([99.2, 99.7])}
+
+def test_nanWithdrawsAnIndicationAndBadPackingIsRefused(bonds):
+    a, b = bonds[0].alias, bonds[1].alias
+    async def _(r, venue):
+        p1, p2, sub = Client(r), Client(r), Client(r)
+        ids = (await p1.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P1')).contents
+        await p2.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, 'P2')
+        ia, ib = ids.index(a), ids.index(b)
+        packed = packIndications([ia, ib], [99.0, 98.0], [99.5, 98.5])
+        assert (await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC_PACKED, packed)).contents is True
+        await p2.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, 99.2, 99.7)])
+        seq, _ = (await sub.ask(venue.conn.addr, BondVenue.SUBSCRIBE_COMPOSITES, 'sub')).contents
+        packed = packIndications([ia, ib], [np.nan, 98.2], [np.nan, 98.7])
+        assert (await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC_PACKED, packed)).contents is True
+        assert not venue._isQuoting('P1', a) and venue._isQuoting('P1', b)
+        await p2.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(a, None, None)])
+        for bad in [packed[:2] + (packed[2][:8],), packIndications([len(ids)], [1.0], [2.0])]:
+            assert (await p1.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC_PACKED, bad)).contents is False
+        await settle()
+        assert sub.received(BondVenue.COMPOSITE_DELTA) == [
+            (seq + 1, {a: pytest.approx([99.2, 99.7]), b: pytest.approx([98.2, 98.7])}),
+            (seq + 2, {a: None}),
+        ]
+        return venue.compositeByAsset()
+    assert _venueGame(bonds, _) == {b: pytest.approx([98.2, 98.7])}
@@ -0,0 +1,68 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import glob, os
+
+import pytest
+
+from fitg.core.book_keeper import BookKeeper, COUPON, EVENT_DTYPE
+from fitg.utils.exceptions import FitgError
+
+
+def _trade(bk):
+    bk.recordTrade('alice', 'bob', 'UKT1', 100, 99.5, ref=1)
+    bk.recordTrade('bob', 'alice', 'UKT1', 40, 100.0, ref=2)
+    bk.recordTrade('bob', 'carol', 'UKT2', 10, 101.0, ref=3)
+    bk.recordCash('carol', 2.5, kind=COUPON)
+
+def _state(bk):
+    return {a: (bk.cashOf(a), bk.positionsOf(a)) for a in bk.agents}
+
+
+def test_tradesMoveCashAndPositions(tmp_path):
+    bk = BookKeeper(str(tmp_path))
+    _trade(bk)
+    assert bk.positionsOf('alice') == {'UKT1': 60.0}
+    assert bk.positionsOf('bob') == {'UKT1': -60.0, 'UKT2': 10.0}
+    assert bk.cashOf('alice') == pytest.approx(-99.5 + 40.0)
+    assert bk.cashOf('carol') == pytest.approx(10.1 + 2.5)
+    assert bk.positionOf('dave', 'UKT1') == 0.0
+    with pytest.raises(FitgError):
+        bk.recordCash('alice', 1.0, kind=1)
+    bk.close()
+
+def test_restartReplaysTheLedger(tmp_path):
+    bk = BookKeeper(str(tmp_path))
+    _trade(bk)
+    expected = _state(bk)
+    bk.close()
+    bk = BookKeeper(str(tmp_path))
+    assert _state(bk) == expected and len(bk.ledger) == 4
+    bk.close()
+
+def test_restartLoadsTheSnapshotAndReplaysOnlyTheTail(tmp_path):
+    bk = BookKeeper(str(tmp_path), snapshotEvery=3)
+    _trade(bk)                                          # snapshot after the 3rd event, a tail of 1
+    expected = _state(bk)
+    bk.close()
+    assert [os.path.basename(f) for f in glob.glob(str(tmp_path / 'snapshot_*.npz'))] == ['snapshot_000000000003.npz']
+    bk = BookKeeper(str(tmp_path), snapshotEvery=3)
+    assert _state(bk) == expected and bk._sinceSnapshot == 1
+    bk.close()
+
+def test_aTornRecordIsDropped(tmp_path):
+    bk = BookKeeper(str(tmp_path))
+    _trade(bk)
+    bk.close()
+    with open(tmp_path / 'ledger.bin', 'ab') as f:
+        f.write(b'\0' * (EVENT_DTYPE.itemsize // 2))
+    bk = BookKeeper(str(tmp_path))
+    assert len(bk.ledger) == 4 and bk.positionsOf('alice') == {'UKT1': 60.0}
+    assert bk.recordTrade('alice', 'bob', 'UKT1', 1, 100.0) == 4
+    bk.close()
@@ -0,0 +1,39 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import math
+import numpy as np
+
+from fitg.core import calcs
+from conftest import SETTLE_DT
+
+
+def test_y2pThenP2yRoundTrips(liveBonds):
+    ytms = np.linspace(-0.5, 12.0, len(liveBonds))
+    prices = calcs.y2p(liveBonds, ytms, SETTLE_DT)
+    np.testing.assert_allclose(calcs.p2y(liveBonds, prices, SETTLE_DT), ytms, atol=1e-9)
+
+def test_singleBondAnswersAFloat(liveBonds):
+    price = calcs.y2p(liveBonds[0], 2.5, SETTLE_DT)
+    assert isinstance(price, float)
+    assert math.isclose(calcs.p2y(liveBonds[0], price, SETTLE_DT), 2.5, abs_tol=1e-9)
+
+def test_p2yIsNanWhenTheYieldIsOutsideTheBracket(liveBonds):
+    short = liveBonds[0]
+    assert math.isnan(calcs.p2y(short, 10.0, SETTLE_DT))              # > 100% yield
+    assert math.isnan(calcs.p2y(short, 500.0, SETTLE_DT))             # < -50% yield
+    ys = calcs.p2y(liveBonds[:3], [10.0, calcs.y2p(liveBonds[1], 3.0, SETTLE_DT), 500.0], SETTLE_DT)
+    assert np.isnan(ys[0]) and np.isnan(ys[2])
+    assert math.isclose(ys[1], 3.0, abs_tol=1e-9)
+
+def test_maturedBondsHaveNoPriceOrYield(bonds):
+    matured = [b for b in bonds if b.maturityDt <= SETTLE_DT]
+    assert matured
+    assert np.isnan(calcs.y2p(matured, 3.0, SETTLE_DT)).all()
+    assert np.isnan(calcs.p2y(matured, 100.0, SETTLE_DT)).all()
@@ -0,0 +1,58 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import numpy as np
+import pytest
+
+from fitg.core.curve import NssFitter, NssParams, TAU1_GRID, TAU2_GRID, MIN_POINTS, nssYields, fairPrices
+from fitg.utils.exceptions import FitgError
+from conftest import SETTLE_DT
+
+
+TRUE = NssParams(2.5, -1.0, 1.5, -0.5, TAU1_GRID[4], TAU2_GRID[6])     # taus on the grid so a fit can be exact
+_RMSE_TOL = 1e-4                        # sse from the sufficient statistics loses a few digits to cancellation
+
+
+def _fitter(bonds):
+    f = NssFitter(bonds, SETTLE_DT)
+    f.setYields(np.arange(len(bonds)), nssYields(TRUE, f.ts))
+    return f
+
+
+def test_aCurveOnTheGridIsRecovered(liveBonds):
+    fit = _fitter(liveBonds).fit()
+    assert not fit.warm and fit.n == len(liveBonds) and fit.rmse < _RMSE_TOL
+    assert fit.params == pytest.approx(TRUE, abs=1e-6)
+
+def test_pricesOnTheCurveFitBackToIt(liveBonds):
+    f = NssFitter(liveBonds, SETTLE_DT)
+    f.setPrices(dict(zip(f.assetNames, fairPrices(TRUE, liveBonds, SETTLE_DT))) | {'NOT A BOND': 100.0})
+    fit = f.fit()
+    assert fit.rmse < _RMSE_TOL and (fit.params.tau1, fit.params.tau2) == (TRUE.tau1, TRUE.tau2)
+    assert f.fairPrices() == pytest.approx(fairPrices(TRUE, liveBonds, SETTLE_DT), abs=1e-6)
+
+def test_aFewChangesWarmFitToTheSameAnswerAsACold(liveBonds):
+    f = _fitter(liveBonds)
+    f.fit()
+    idxs = [0, 3]
+    f.setYields(idxs, f.yields[idxs] + 0.02)
+    warm = f.fit()
+    cold = NssFitter(liveBonds, SETTLE_DT)
+    cold.setYields(np.arange(len(liveBonds)), f.yields)
+    cold = cold.fit()
+    assert warm.warm and not cold.warm
+    assert warm.params == pytest.approx(cold.params, abs=1e-9) and warm.rmse == pytest.approx(cold.rmse, abs=1e-9)
+
+def test_tooFewYieldsDontFit(liveBonds):
+    f = NssFitter(liveBonds, SETTLE_DT)
+    with pytest.raises(FitgError):
+        f.fairPrices()
+    f.setYields(range(MIN_POINTS - 1), [3.0] * (MIN_POINTS - 1))
+    f.setYields([MIN_POINTS], [np.nan])                 # e.g. a matured bond is ignored
+    assert f.fit() is None
@@ -0,0 +1,52 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+from vlmessaging import Msg
+
+from fitg.agents.bond_venue import BondVenue
+from fitg.agents.curve_service import CurveService
+from fitg.core.curve import NssParams, TAU1_GRID, TAU2_GRID, fairPrices
+from conftest import LOGIN, SETTLE_DT, Client, playGame, settle
+
+
+TRUE = NssParams(2.5, -1.0, 1.5, -0.5, TAU1_GRID[4], TAU2_GRID[6])
+
+
+def test_theCurveFollowsTheVenuesCompositesAndResyncsAfterAGap(liveBonds):
+    mids = dict(zip([b.alias for b in liveBonds], fairPrices(TRUE, liveBonds, SETTLE_DT).tolist()))
+    first = next(iter(mids))
+    snapshots = [
+        (3, {a: [m - 0.05, m + 0.05] for a, m in mids.items()}),
+        (9, {first: [mids[first] - 0.05, mids[first] + 0.05]}),
+    ]
+    async def _(r, gm):
+        venue = Client(r, {BondVenue.SUBSCRIBE_COMPOSITES: lambda name: snapshots.pop(0)})
+        await venue.registerAs(BondVenue.ENTRY_TYPE, 'TWEB')
+        curve = await CurveService(r, name='C', bondVenue='TWEB', assets=liveBonds, settleDt=SETTLE_DT, **LOGIN).start()
+        watcher = Client(r)
+        seq, fit = (await watcher.ask(curve.conn.addr, CurveService.SUBSCRIBE_CURVE)).contents
+        assert curve.subscription.venueAddr == venue.addr and curve.subscription.seq == 3
+        delta = lambda seq, changed: venue.conn.send(Msg(curve.conn.addr, BondVenue.COMPOSITE_DELTA, (seq, changed)))
+        await delta(3, {first: [0.0, 0.0]})                 # already in the snapshot
+        await delta(4, {first: [mids[first] + 0.95, mids[first] + 1.05]})
+        await settle()
+        moved = curve.midByAsset[first]
+        await delta(7, {first: [0.0, 0.0]})                 # a gap so resync
+        await settle()
+        nSubscribes, resynced = len(venue.received(BondVenue.SUBSCRIBE_COMPOSITES)), curve.subscription.seq
+        await curve.stop()
+        return (seq, fit), moved, nSubscribes, resynced, venue
+    (seq, fit), moved, nSubscribes, resynced, venue = playGame(_)
+    assert fit is not None and seq == 1                     # start fits the snapshot straight away
+    assert fit[0] == pytest.approx(tuple(TRUE), abs=1e-6)
+    assert moved == pytest.approx(mids[first] + 1.0)
+    assert (nSubscribes, resynced) == (2, 9)
+    assert len(venue.received(BondVenue.UNSUBSCRIBE_COMPOSITES)) == 1
@@ -0,0 +1,53 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+from types import SimpleNamespace
+
+from fitg.agents.exchange import Exchange
+from conftest import LOGIN, Client, playGame, settle
+
+
+FUTS = [SimpleNamespace(alias='RXZ6'), SimpleNamespace(alias='OEZ6')]
+
+
+def _exchangeGame(fn):
+    async def _(r, gm):
+        eurex = await Exchange(r, name='EUREX', assets=FUTS, **LOGIN).start()
+        try:
+            return await fn(r, eurex)
+        finally:
+            await eurex.stop()
+    return playGame(_)
+
+
+def test_restingOwnersAreSentTheirFills():
+    async def _(r, eurex):
+        mm, taker, watcher = Client(r), Client(r), Client(r)
+        assert (await watcher.ask(eurex.conn.addr, Exchange.SUBSCRIBE_TOP, 'RXZ6')).contents == \
+            ('RXZ6', None, 0, None, 0)
+        sellId, fills = (await mm.ask(eurex.conn.addr, Exchange.SUBMIT_ORDER, ('RXZ6', -10, 130.01))).contents
+        assert fills == []
+        buyId, fills = (await taker.ask(eurex.conn.addr, Exchange.SUBMIT_ORDER, ('RXZ6', 4, 130.019))).contents
+        assert [(f.restingOrderId, f.size, f.price) for f in fills] == [(sellId, 4, 130.01)]
+        await settle()
+        assert [(f.restingOrderId, f.size) for f in mm.received(Exchange.FILL)] == [(sellId, -4)]
+        assert watcher.received(Exchange.TOP_OF_BOOK) == [('RXZ6', None, 0, 130.01, 10), ('RXZ6', None, 0, 130.01, 6)]
+        assert (await taker.ask(eurex.conn.addr, Exchange.CANCEL_ORDER, ('RXZ6', sellId))).contents == 0
+        assert (await mm.ask(eurex.conn.addr, Exchange.CANCEL_ORDER, ('RXZ6', sellId))).contents == -6
+        return (await taker.ask(eurex.conn.addr, Exchange.GET_DEPTH, ('RXZ6', 5))).contents
+    assert _exchangeGame(_) == ([], [])
+
+def test_badOrdersAreAnsweredWithNone():
+    async def _(r, eurex):
+        c = Client(r)
+        return [
+            (await c.ask(eurex.conn.addr, Exchange.SUBMIT_ORDER, order)).contents
+            for order in [('XXX', 1, 100.0), ('RXZ6', 0, 100.0), ('RXZ6', 1, 250.0)]
+        ]
+    assert _exchangeGame(_) == [None, None, None]
@@ -0,0 +1,68 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+from fitg.agents.game_master import GameMaster, TradeReport, PENDING, CLEARED, DUPLICATE, MISMATCH, INVALID
+from conftest import Client, playGame
+
+
+PLAYERS = {'alice': 'a', 'bob': 'b'}
+
+
+async def _login(c, gm, player):
+    login = (player, PLAYERS[player])
+    subjects = [GameMaster.LOGIN_TOKEN, GameMaster.LOGIN_INVALID]
+    return (await c.ask(gm.conn.addr, GameMaster.LOGIN, login, additional_subjects=subjects)).contents
+
+async def _record(c, gm, token, reports):
+    return (await c.ask(gm.conn.addr, GameMaster.RECORD_TRADE, (token, reports))).contents
+
+def _reports(reporter, trades):
+    # trades is [(venueTradeId, alice's signed size, price), ...] with bob on the other side
+    return [
+        TradeReport('V', id, reporter, *(('alice', 'bob') if size > 0 else ('bob', 'alice')), 'X', abs(size), px)
+        for id, size, px in trades
+    ]
+
+
+def test_clearedTradesRealisePnlFifo():
+    trades = [(1, 100, 99.0), (2, 100, 101.0), (3, -150, 102.0)]
+    async def _(r, gm):
+        alice, bob = Client(r), Client(r)
+        aliceToken, bobToken = await _login(alice, gm, 'alice'), await _login(bob, gm, 'bob')
+        assert await _record(alice, gm, aliceToken, _reports('alice', trades)) == [PENDING] * 3
+        assert await _record(bob, gm, bobToken, _reports('bob', trades)) == [CLEARED] * 3
+        return (
+            (await alice.ask(gm.conn.addr, GameMaster.GET_PNL, (aliceToken, 'alice'))).contents,
+            (await bob.ask(gm.conn.addr, GameMaster.GET_PNL, (bobToken, 'bob'))).contents,
+            gm.pnlEngine.openLots('alice', 'X'),
+        )
+    alicePnl, bobPnl, aliceLots = playGame(_, PLAYERS)
+    assert alicePnl == pytest.approx(3.5) and bobPnl == pytest.approx(-3.5)
+    assert aliceLots == [(50, 101.0)]
+
+def test_aTokenOnlyReportsForItsOwnPlayer():
+    async def _(r, gm):
+        alice = Client(r)
+        token = await _login(alice, gm, 'alice')
+        return await _record(alice, gm, token, _reports('bob', [(1, 100, 99.0)]) + _reports('alice', [(1, 100, 99.0)]))
+    assert playGame(_, PLAYERS) == [INVALID, PENDING]
+
+def test_onlyAcceptedReportsTieTheReporterToAnAddress():
+    async def _(r, gm):
+        alice, aliceElsewhere, bob = Client(r), Client(r), Client(r)
+        aliceToken, bobToken = await _login(alice, gm, 'alice'), await _login(bob, gm, 'bob')
+        assert await _record(bob, gm, bobToken, _reports('bob', [(1, 100, 99.0)])) == [PENDING]
+        assert await _record(aliceElsewhere, gm, aliceToken, _reports('alice', [(1, 100, 98.0)])) == [MISMATCH]
+        assert 'alice' not in gm.addrByReporter
+        assert await _record(alice, gm, aliceToken, _reports('alice', [(1, 100, 99.0)])) == [CLEARED]
+        assert await _record(alice, gm, aliceToken, _reports('alice', [(1, 100, 99.0)])) == [DUPLICATE]
+        return await _record(aliceElsewhere, gm, aliceToken, _reports('alice', [(2, 100, 99.0)]))
+    assert playGame(_, PLAYERS) == [INVALID]
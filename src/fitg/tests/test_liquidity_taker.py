@@ -0,0 +1,53 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+from vlmessaging import Msg
+from vlmessaging.utils import Missing
+
+from fitg.agents.bond_venue import BondVenue
+from fitg.agents.simple_bond_liquidity_taker import SimpleBondLiquidityTaker
+from conftest import LOGIN, Client, playGame, settle
+
+
+def test_aVenueIsOnlyFoundOnceSubscribed():
+    snapshots = []
+    async def _(r, gm):
+        venue = Client(r, {BondVenue.SUBSCRIBE_COMPOSITES: lambda name: snapshots.pop(0) if snapshots else None})
+        await venue.registerAs(BondVenue.ENTRY_TYPE, 'TWEB')
+        taker = SimpleBondLiquidityTaker(r, name='T', bondVenues=['TWEB'], futExchanges=[], **LOGIN)
+        await taker.maybeInitiateRfq()                      # the venue doesn't answer
+        missed = taker.bondVenuesByName['TWEB']
+        snapshots.append((4, {'A': [99.0, 99.5]}))
+        await taker.maybeInitiateRfq()
+        r.unscheduleFn(taker.maybeInitiateRfq)
+        found = taker.bondVenuesByName['TWEB'] == venue.addr
+        return missed, found, taker.subscriptionByVenueAddr[venue.addr].composites
+    assert playGame(_) == (Missing, True, {'A': [99.0, 99.5]})
+
+def test_deltasAreAppliedInSequenceAndAGapResyncs():
+    snapshots = [(2, {'A': [1.0, 2.0]}), (6, {'A': [5.0, 6.0], 'B': [7.0, 8.0]})]
+    async def _(r, gm):
+        venue = Client(r, {BondVenue.SUBSCRIBE_COMPOSITES: lambda name: snapshots.pop(0)})
+        taker = SimpleBondLiquidityTaker(r, name='T', bondVenues=['TWEB'], futExchanges=[], **LOGIN)
+        assert await taker.subscribeToComposites(venue.addr)
+        delta = lambda seq, changed: venue.conn.send(Msg(taker.conn.addr, BondVenue.COMPOSITE_DELTA, (seq, changed)))
+        await delta(3, {'A': [3.0, 4.0], 'B': [9.0, 10.0]})
+        await delta(2, {'A': [0.0, 0.0]})                   # stale so ignored
+        await delta(4, {'B': None})                         # no one quotes B any more
+        await settle()
+        subscription = taker.subscriptionByVenueAddr[venue.addr]
+        before = dict(subscription.composites), len(venue.received(BondVenue.SUBSCRIBE_COMPOSITES))
+        await delta(6, {'A': [0.0, 0.0]})                   # 5 went missing so resync
+        await settle()
+        after = subscription.composites, subscription.seq
+        return before, after, len(venue.received(BondVenue.SUBSCRIBE_COMPOSITES))
+    before, after, nSubscribes = playGame(_)
+    assert before == ({'A': [3.0, 4.0]}, 1)
+    assert after == ({'A': [5.0, 6.0], 'B': [7.0, 8.0]}, 6)
+    assert nSubscribes == 2
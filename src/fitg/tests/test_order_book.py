@@ -0,0 +1,79 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+from fitg.core.order_book import OrderBook
+from fitg.utils.exceptions import FitgError
+
+
+def _book():
+    return OrderBook('UKT', 0.01, 0.0, 200.0)
+
+
+def test_priceTimePriority():
+    b = _book()
+    b.limit(1, 'a', -10, 100.02)
+    b.limit(2, 'b', -10, 100.01)
+    b.limit(3, 'c', -10, 100.01)
+    fills = b.limit(4, 'x', 25, 100.02)
+    assert [(f.resting, f.size, f.price) for f in fills] == [('b', 10, 100.01), ('c', 10, 100.01), ('a', 5, 100.02)]
+    assert b.top() == (None, 0, 100.02, 5)
+
+def test_offTickLimitsNeverCrossTheClientsLimit():
+    b = _book()
+    b.limit(1, 'a', -10, 100.01)
+    assert b.limit(2, 'x', 10, 100.006) == []            # the buy rests at 100.00 rather than lifting 100.01
+    assert b.top() == (100.0, 10, 100.01, 10)
+    b.limit(3, 'y', -10, 100.004)                        # the sell rests at 100.01 rather than hitting 100.00
+    assert b.top() == (100.0, 10, 100.01, 20)
+    b = _book()
+    b.limit(1, 'a', 1, 0.29)                             # (0.29 - 0) / 0.01 is 28.999... but 0.29 is on tick
+    b.limit(2, 'b', -1, 1.15)                            # and 114.999...
+    assert b.top() == (0.29, 1, 1.15, 1)
+
+def test_outsideTheBookRaises():
+    with pytest.raises(FitgError):
+        _book().limit(1, 'a', 10, 200.5)
+
+def test_nextLevelFoundAcrossEmptyTicks():
+    b = _book()
+    b.limit(1, 'a', 10, 0.01)
+    b.limit(2, 'b', 10, 150.0)
+    b.limit(3, 'c', -10, 199.99)
+    assert [f.resting for f in b.market(4, 'x', -15)] == ['b', 'a']
+    assert b.top() == (0.01, 5, 199.99, 10)
+    assert b.cancel(1) == 5
+    assert b.top() == (None, 0, 199.99, 10)
+    b.limit(5, 'd', 10, 50.0)
+    assert b.top()[:2] == (50.0, 10)
+
+def test_cancelledOrdersAreSkippedAndPruned():
+    b = _book()
+    for i in range(1, 11):
+        b.limit(i, f'p{i}', -1, 101.0)
+    for i in range(2, 10):
+        assert b.cancel(i) == -1
+    q = b._asks.queues[b.toTick(101.0)]
+    assert len(q) < 10 and sum(o.remaining for o in q) == 2
+    assert b.cancel(5) == 0                              # already gone
+    fills = b.market(11, 'x', 5)
+    assert [f.resting for f in fills] == ['p1', 'p10']
+    assert b.top() == (None, 0, None, 0)
+
+def test_cancellingALevelEmptiesItsQueue():
+    b = _book()
+    for i in range(1, 4):
+        b.limit(i, 'a', 1, 99.0)
+    b.limit(4, 'b', 1, 98.0)
+    for i in range(1, 4):
+        b.cancel(i)
+    assert not b._bids.queues[b.toTick(99.0)]
+    assert b.top()[:2] == (98.0, 1)
+    assert b.depth() == ([(98.0, 1)], [])
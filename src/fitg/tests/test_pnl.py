@@ -0,0 +1,53 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import numpy as np
+import pytest
+
+from fitg.core.pnl import PnlEngine
+
+
+def test_closesMatchTheOldestLotsFirst():
+    e = PnlEngine()
+    e.onFill('a', 'X', 100, 99.0)
+    e.onFill('a', 'X', 100, 101.0)
+    assert e.onFill('a', 'X', -150, 102.0) == pytest.approx((100 * 3.0 + 50 * 1.0) / 100)
+    assert e.openLots('a', 'X') == [(50, 101.0)]
+    assert e.position('a', 'X') == 50
+    assert e.realised('a') == pytest.approx(3.5)
+
+def test_partialCloseLeavesTheRestOfTheLotAtItsPrice():
+    e = PnlEngine()
+    e.onFill('a', 'X', -200, 100.0)
+    assert e.onFill('a', 'X', 50, 99.0) == pytest.approx(0.5)          # short 50 covered 1 point lower
+    assert e.openLots('a', 'X') == [(-150, 100.0)]
+    assert e.onFill('a', 'X', 50, 101.0) == pytest.approx(-0.5)
+    assert e.openLots('a', 'X') == [(-100, 100.0)]
+
+def test_aFillThroughFlatOpensTheRemainder():
+    e = PnlEngine()
+    e.onFill('a', 'X', 100, 100.0)
+    assert e.onFill('a', 'X', -300, 100.5) == pytest.approx(0.5)
+    assert e.openLots('a', 'X') == [(-200, 100.5)]
+    assert e.position('a', 'X') == -200
+
+def test_markToMarketIsPerAgentAndSkipsFlatSlots():
+    e = PnlEngine()
+    e.onFill('a', 'X', 100, 100.0)
+    e.onFill('b', 'X', -100, 100.0)
+    e.onFill('b', 'Y', 100, 50.0)
+    e.onFill('b', 'Y', -100, 51.0)                                     # flat so Y needs no mark
+    assert e.markToMarket({'X': 101.0}) == pytest.approx(np.array([1.0, -1.0]))
+    assert e.totalPnl({'X': 101.0}) == {'a': pytest.approx(1.0), 'b': pytest.approx(0.0)}
+
+def test_slotsGrowPastTheInitialCapacity():
+    e = PnlEngine()
+    for i in range(200):
+        e.onFill(f'p{i % 7}', f'A{i}', 100, 100.0)
+    assert e.markToMarket(np.full(len(e.assets), 100.5)).sum() == pytest.approx(200 * 0.5)
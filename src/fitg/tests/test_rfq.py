@@ -0,0 +1,120 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import asyncio
+
+from fitg.agents import bond_venue
+from fitg.agents.bond_venue import BondVenue
+from conftest import LOGIN, Client, playGame, settle
+
+
+ASSET_IDX = 0
+
+
+def _rfqGame(bonds, priceByProvider, fn):
+    # a venue with a taker and a provider quoting priceByProvider[name] (None => never answers RFQ_QUOTE_FOR)
+    asset = bonds[ASSET_IDX].alias
+    async def _(r, gm):
+        venue = await BondVenue(r, name='TWEB', assets=bonds[:4], **LOGIN).start()
+        try:
+            providers = {}
+            for name, price in priceByProvider.items():
+                quote = (lambda price: lambda c: None if price is None else (c[0], price))(price)
+                p = providers[name] = Client(r, {BondVenue.RFQ_QUOTE_FOR: quote})
+                await p.ask(venue.conn.addr, BondVenue.REGISTER_PROVIDER, name)
+                await p.ask(venue.conn.addr, BondVenue.SUBMIT_INDIC, [(asset, 99.0, 99.5)])
+            taker = Client(r)
+            await taker.ask(venue.conn.addr, BondVenue.REGISTER_TAKER, 'T')
+            return await fn(venue, taker, providers, asset)
+        finally:
+            await venue.stop()
+    return playGame(_)
+
+async def _start(venue, taker, asset, size, providers, takerId=7):
+    reply = await taker.ask(
+        venue.conn.addr, BondVenue.RFQ_START, (takerId, asset, size, providers),
+        additional_subjects=[BondVenue.RFQ_NO_TRADE]
+    )
+    return reply.subject, reply.contents
+
+async def _waitFor(client, subject, ms=2000):
+    for _ in range(ms // 10):
+        if client.received(subject): return client.received(subject)
+        await asyncio.sleep(0.01)
+    return []
+
+
+def test_quotesGoToTheTakerAsSoonAsEveryProviderHasQuoted(bonds):
+    async def _(venue, taker, providers, asset):
+        subject, venueId = await _start(venue, taker, asset, 10, ['P1', 'P2', 'P3'])
+        assert subject == BondVenue.RFQ_START
+        quotes = await _waitFor(taker, BondVenue.RFQ_QUOTES, 1000)            # well before RFQ_TIMEOUT_MS
+        return venueId, quotes
+    venueId, quotes = _rfqGame(bonds, {'P1': 99.6, 'P2': 99.4, 'P3': 99.5}, _)
+    assert quotes == [(venueId, 7, [('P2', 99.4), ('P3', 99.5), ('P1', 99.6)])]          # a buyer wants the lowest
+
+def test_anRfqWithNoQuotingProvidersIsNoTrade(bonds):
+    async def _(venue, taker, providers, asset):
+        return await _start(venue, taker, asset, 10, ['Nobody'])
+    assert _rfqGame(bonds, {'P1': 99.6}, _) == (BondVenue.RFQ_NO_TRADE, 7)
+
+def test_theTimerWheelShowsTheQuotesInOnTimeout(bonds, monkeypatch):
+    monkeypatch.setattr(bond_venue, 'RFQ_TIMEOUT_MS', 200)
+    async def _(venue, taker, providers, asset):
+        subject, venueId = await _start(venue, taker, asset, -10, ['P1', 'P2', 'SLOW'])
+        await settle(100)
+        early = taker.received(BondVenue.RFQ_QUOTES)
+        quotes = await _waitFor(taker, BondVenue.RFQ_QUOTES)
+        return venueId, early, quotes
+    venueId, early, quotes = _rfqGame(bonds, {'P1': 99.6, 'P2': 99.4, 'SLOW': None}, _)
+    assert early == []
+    assert quotes == [(venueId, 7, [('P1', 99.6), ('P2', 99.4)])]                        # a seller wants the highest
+
+def test_noAcceptInTimeIsNoTradeForEveryone(bonds, monkeypatch):
+    monkeypatch.setattr(bond_venue, 'RFQ_ACCEPT_TIMEOUT_MS', 200)
+    async def _(venue, taker, providers, asset):
+        subject, venueId = await _start(venue, taker, asset, 10, ['P1', 'P2'])
+        await _waitFor(taker, BondVenue.RFQ_NO_TRADE)
+        await settle()
+        late = await taker.ask(
+            venue.conn.addr, BondVenue.RFQ_ACCEPT, venueId, additional_subjects=[BondVenue.RFQ_NO_TRADE]
+        )
+        providerNoTrades = [p.received(BondVenue.RFQ_NO_TRADE) for p in providers.values()]
+        return venueId, taker.received(BondVenue.RFQ_NO_TRADE), providerNoTrades, late.subject, len(venue._rfqTimers), \
+            venue._rfqById
+    venueId, takerNoTrade, providerNoTrades, lateSubject, nTimers, rfqs = _rfqGame(bonds, {'P1': 99.6, 'P2': 99.4}, _)
+    assert takerNoTrade == [venueId]
+    assert providerNoTrades == [[venueId], [venueId]]
+    assert lateSubject == BondVenue.RFQ_NO_TRADE
+    assert (nTimers, rfqs) == (0, {})
+
+def test_acceptTradesWithTheBestAndTellsTheOthers(bonds):
+    async def _(venue, taker, providers, asset):
+        subject, venueId = await _start(venue, taker, asset, 10, ['P1', 'P2', 'P3'])
+        await _waitFor(taker, BondVenue.RFQ_QUOTES)
+        reply = await taker.ask(venue.conn.addr, BondVenue.RFQ_ACCEPT, venueId)
+        await settle()
+        return venueId, reply.contents, {n: [(m.subject, m.contents) for m in p.inbox] for n, p in providers.items()}
+    venueId, trade, inboxes = _rfqGame(bonds, {'P1': 99.6, 'P2': 99.4, 'P3': 99.5}, _)
+    asset = bonds[ASSET_IDX].alias
+    assert trade == (venueId, asset, 10, 99.4, 'P2')
+    assert (BondVenue.RFQ_ACCEPTED, (venueId, asset, 10, 99.4, 'T')) in inboxes['P2']
+    assert (BondVenue.RFQ_NEAR_MISS, venueId) in inboxes['P3']
+    assert (BondVenue.RFQ_NO_TRADE, venueId) in inboxes['P1']
+
+def test_declineIsNoTradeForEveryProvider(bonds):
+    async def _(venue, taker, providers, asset):
+        subject, venueId = await _start(venue, taker, asset, 10, ['P1', 'P2'])
+        await _waitFor(taker, BondVenue.RFQ_QUOTES)
+        await taker.ask(venue.conn.addr, BondVenue.RFQ_DECLINE, venueId)
+        await settle()
+        return venueId, [p.received(BondVenue.RFQ_NO_TRADE) for p in providers.values()], venue._rfqById
+    venueId, noTrades, rfqs = _rfqGame(bonds, {'P1': 99.6, 'P2': 99.4}, _)
+    assert noTrades == [[venueId], [venueId]]
+    assert rfqs == {}
@@ -0,0 +1,65 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import asyncio, time
+
+from vlmessaging.utils import co
+
+from fitg._utils.sim_clock import SimRouter, simNowMs, startSimEventLoopWith
+
+
+def test_timersDueTogetherRunInTheOrderScheduled():
+    async def _():
+        loop, ran = asyncio.get_running_loop(), []
+        t0 = loop.time()
+        for name in 'abcdefgh':
+            loop.call_later(1.0, ran.append, name)
+        loop.call_at(t0 + 1.0, ran.append, 'at')
+        loop.call_later(0.5, ran.append, 'early')
+        await asyncio.sleep(2.0)
+        return ran
+    assert startSimEventLoopWith(_) == ['early', *'abcdefgh', 'at']
+
+def test_idleTimeJumpsToTheNextTimer():
+    async def _():
+        t0 = simNowMs()
+        await asyncio.sleep(8 * 60 * 60)                # a trading day
+        return simNowMs() - t0
+    wall0 = time.perf_counter()
+    assert startSimEventLoopWith(_, startMs=1_000.0) == 8 * 60 * 60 * 1000
+    assert time.perf_counter() - wall0 < 1.0
+
+def test_routerScheduledFunctionsRunOnVirtualTime():
+    async def _():
+        r, fired = SimRouter(), []
+        async def tick(): fired.append(simNowMs())
+        async def never(): fired.append('never')
+        r.scheduleFn(tick, 500)
+        r.scheduleFn(tick, 3_000)
+        r.scheduleFn(never, 1_000)
+        r.unscheduleFn(never)
+        await asyncio.sleep(5.0)
+        r.shutdown()
+        await co.until(r.hasShutdown)
+        return fired
+    assert startSimEventLoopWith(_) == [500.0, 3_000.0]
+
+def test_runsAreRepeatable():
+    async def _():
+        ran = []
+        async def worker(name, delays):
+            for d in delays:
+                await asyncio.sleep(d)
+                ran.append((name, simNowMs()))
+        await asyncio.gather(worker('x', [0.25, 0.5, 0.25]), worker('y', [0.5, 0.5]), worker('z', [1.0]))
+        return ran
+    first = startSimEventLoopWith(_)
+    assert first == startSimEventLoopWith(_)
+    # all three wake at 1.0 in the order their sleeps were scheduled - z at 0, y at 0.5 then x at 0.75
+    assert first == [('x', 250.0), ('y', 500.0), ('x', 750.0), ('z', 1000.0), ('y', 1000.0), ('x', 1000.0)]
@@ -0,0 +1,76 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+import pytest
+
+from vlmessaging import Msg
+
+from fitg.agents.bond_venue import BondVenue, unpackIndications
+from fitg.agents.game_master import GameMaster, TradeReport, CLEARED
+from fitg.agents.simple_bond_dealer import SimpleBondDealer
+from conftest import SETTLE_DT, Client, playGame, settle
+
+
+PLAYERS = {'D': 'd', 'T': 't'}
+
+
+async def _startDealer(r, bonds):
+    venue = Client(r, {
+        BondVenue.REGISTER_PROVIDER: lambda name: [b.alias for b in reversed(bonds)],
+        BondVenue.SUBMIT_INDIC_PACKED: lambda packed: True,
+    })
+    await venue.registerAs(BondVenue.ENTRY_TYPE, 'TWEB')
+    dealer = SimpleBondDealer(
+        r, name='D', user='D', pswd='d', bondVenues=['TWEB'], futExchanges=[], assets=bonds, settleDt=SETTLE_DT
+    )
+    return venue, await dealer.start()
+
+
+def test_quotesTheVenueAndReportsItsTrades(liveBonds):
+    bonds = liveBonds[:5]
+    a = bonds[2].alias
+    async def _(r, gm):
+        venue, dealer = await _startDealer(r, bonds)
+        try:
+            ids, bids, asks = unpackIndications(venue.received(BondVenue.SUBMIT_INDIC_PACKED)[0])
+            assert sorted(ids.tolist()) == [0, 1, 2, 3, 4] and (bids < asks).all()
+            await venue.conn.send(Msg(dealer.conn.addr, BondVenue.RFQ_ACCEPTED, (7, a, 5.0, 101.25, 'T')))
+            await settle()
+            pending = dict(gm.pendingByTradeKey)
+            taker = Client(r)
+            subjects = [GameMaster.LOGIN_TOKEN]
+            token = (await taker.ask(gm.conn.addr, GameMaster.LOGIN, ('T', 't'), additional_subjects=subjects)).contents
+            report = TradeReport('TWEB', 7, 'T', 'T', 'D', a, 5.0, 101.25)
+            statuses = (await taker.ask(gm.conn.addr, GameMaster.RECORD_TRADE, (token, [report]))).contents
+            return pending, statuses, dealer.inventory[2], gm.pnlEngine.position('D', a)
+        finally:
+            await dealer.stop()
+    pending, statuses, inventory, position = playGame(_, PLAYERS)
+    assert pending == {('TWEB', 7): TradeReport('TWEB', 7, 'D', 'T', 'D', a, 5.0, 101.25)}
+    assert statuses == [CLEARED]
+    assert inventory == position == -5.0
+
+def test_unansweredReportsAreSentAgain(liveBonds):
+    bonds = liveBonds[:5]
+    async def _(r, gm):
+        venue, dealer = await _startDealer(r, bonds)
+        try:
+            await gm.stop()                                 # the GameMaster can't be found
+            await venue.conn.send(Msg(dealer.conn.addr, BondVenue.RFQ_ACCEPTED, (1, bonds[0].alias, -2.0, 99.0, 'T')))
+            await venue.conn.send(Msg(dealer.conn.addr, BondVenue.RFQ_ACCEPTED, (2, bonds[1].alias, 3.0, 98.0, 'T')))
+            await settle()
+            unreported = [(t.venueTradeId, t.buyer, t.seller) for t in dealer.unreportedTrades]
+            await gm.start()
+            await dealer.reportTrades()
+            return unreported, dealer.unreportedTrades, sorted(gm.pendingByTradeKey)
+        finally:
+            await dealer.stop()
+    unreported, left, pending = playGame(_, PLAYERS)
+    assert unreported == [(1, 'D', 'T'), (2, 'T', 'D')]
+    assert left == [] and pending == [('TWEB', 1), ('TWEB', 2)]
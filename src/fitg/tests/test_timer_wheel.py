@@ -0,0 +1,53 @@
+# **********************************************************************************************************************
+# Copyright 2026 David Briant, https://github.com/coppertop-bones. Licensed under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the License. You may obtain a copy of the  License at
+# http://www.apache.org/licenses/LICENSE-2.0. Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY  KIND,
+# either express or implied. See the License for the specific language governing permissions and limitations under the
+# License. See the NOTICE file distributed with this work for additional information regarding copyright ownership.
+# **********************************************************************************************************************
+
+from fitg._utils.timer_wheel import TimerWheel
+
+
+def test_keysExpireInDeadlineOrder():
+    w = TimerWheel(tickMs=50, nSlots=8)
+    w.schedule('c', 1_130)
+    w.schedule('a', 1_010)
+    w.schedule('b', 1_040)
+    assert w.advance(1_000) == []
+    assert w.advance(1_045) == ['a', 'b']
+    assert w.advance(1_200) == ['c']
+    assert len(w) == 0
+
+def test_deadlinesLaterInTheCurrentTickWait():
+    w = TimerWheel(tickMs=50, nSlots=8)
+    w.advance(1_000)
+    w.schedule('x', 1_030)
+    assert w.advance(1_020) == []
+    assert w.advance(1_030) == ['x']
+
+def test_deadlinesMoreThanARevolutionAwayWaitForTheirTurn():
+    w = TimerWheel(tickMs=50, nSlots=8)                 # a revolution is 400ms
+    w.advance(0)
+    w.schedule('far', 1_000)
+    for t in range(50, 1_000, 50):
+        assert w.advance(t) == []
+    assert w.advance(1_000) == ['far']
+
+def test_cancelAndReschedule():
+    w = TimerWheel(tickMs=50, nSlots=8)
+    w.schedule('a', 100)
+    w.schedule('b', 100)
+    w.cancel('a')
+    w.schedule('b', 300)                                # moves b
+    assert 'a' not in w and 'b' in w
+    assert w.advance(200) == []
+    assert w.advance(300) == ['b']
+
+def test_aLongPauseExpiresEverythingDue():
+    w = TimerWheel(tickMs=50, nSlots=8)
+    w.advance(0)
+    for i in range(20):
+        w.schedule(i, 100 + 37 * i)
+    assert w.advance(10_000) == list(range(20))